@@ -11,10 +11,13 @@ os.environ.setdefault("DJANGO_SETTINGS_MODULE", "django_server.settings")
 django_asgi_app = get_asgi_application()
 
 from farminsight_dashboard_backend.routing import websocket_urlpatterns
+from farminsight_dashboard_backend.utils import has_process_role, ROLE_WEB, ROLE_INGEST, ROLE_REALTIME
 
-application = ProtocolTypeRouter(
-    {
-        "http": django_asgi_app,
-        "websocket": AllowedHostsOriginValidator(AuthMiddlewareStack(URLRouter(websocket_urlpatterns))),
-    }
-)
\ No newline at end of file
+# Only route the protocols of the roles of this process, see the PROCESS_ROLES setting
+protocols = {}
+if has_process_role(ROLE_WEB) or has_process_role(ROLE_INGEST):
+    protocols["http"] = django_asgi_app
+if has_process_role(ROLE_REALTIME):
+    protocols["websocket"] = AllowedHostsOriginValidator(AuthMiddlewareStack(URLRouter(websocket_urlpatterns)))
+
+application = ProtocolTypeRouter(protocols)
@@ -0,0 +1,14 @@
+"""
+URL configuration for processes that only ingest data of the FPFs, see the PROCESS_ROLES setting.
+The paths are the same as in django_server.urls, so the FPFs do not have to know which process serves them.
+"""
+from django.urls import path
+
+from farminsight_dashboard_backend.views import MeasurementView, post_log_message, post_log_message_insecure
+
+urlpatterns = [
+    path('api/measurements/<str:sensor_id>', MeasurementView.as_view(), name='sensor-measurements'),
+    path('api/log_messages', post_log_message, name='post_log_message'),
+    path('api/log-messages-insecure/<str:resource_id>/<str:message>', post_log_message_insecure,
+         name='post_log_message_insecure'),
+]
@@ -13,6 +13,7 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 from pathlib import Path
 import environ
 import os
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -41,6 +42,14 @@ INFLUXDB_CLIENT_SETTINGS = {
     "org": env("DOCKER_INFLUXDB_INIT_ORG"),
 }
 
+# Size of the HTTP connection pool and request timeout of the InfluxDB client.
+# After INFLUXDB_CIRCUIT_FAILURE_THRESHOLD consecutive connection errors requests fail fast,
+# InfluxDB is health-checked again after INFLUXDB_CIRCUIT_RESET_SECONDS.
+INFLUXDB_CONNECTION_POOL_SIZE = env.int("INFLUXDB_CONNECTION_POOL_SIZE", default=20)
+INFLUXDB_TIMEOUT_MS = env.int("INFLUXDB_TIMEOUT_MS", default=10000)
+INFLUXDB_CIRCUIT_FAILURE_THRESHOLD = env.int("INFLUXDB_CIRCUIT_FAILURE_THRESHOLD", default=3)
+INFLUXDB_CIRCUIT_RESET_SECONDS = env.int("INFLUXDB_CIRCUIT_RESET_SECONDS", default=10)
+
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = env("DEBUG") == "True"
 
@@ -53,6 +62,12 @@ CORS_ALLOWED_ORIGINS = env("CORS_ALLOWED_ORIGINS").split(",")
 # Camera snapshot storage config
 MEDIA_URL = "/"
 MEDIA_ROOT = BASE_DIR
+# Snapshots that look like the previous snapshot of the camera share its file, e.g. at night. Compared by a perceptual
+# hash, at most IMAGE_PERCEPTUAL_DEDUP_DISTANCE of its 64 bits may differ. Byte-identical snapshots always share a file.
+IMAGE_PERCEPTUAL_DEDUP = env.bool("IMAGE_PERCEPTUAL_DEDUP", default=False)
+IMAGE_PERCEPTUAL_DEDUP_DISTANCE = env.int("IMAGE_PERCEPTUAL_DEDUP_DISTANCE", default=2)
+# Images read and deleted per query by the hourly thinning of the images according to the retention of the cameras
+IMAGE_RETENTION_CHUNK_SIZE = env.int("IMAGE_RETENTION_CHUNK_SIZE", default=500)
 SITE_URL = env(
     "SITE_URL", default="http://farminsight-backend.etce.isse.tu-clausthal.de"
 )
@@ -87,7 +102,17 @@ MIDDLEWARE = [
 
 CORS_ORIGIN_ALLOW_ALL = True
 
-ROOT_URLCONF = "django_server.urls"
+# Roles of this process, comma separated: web (REST API), ingest (measurement and log endpoints of the FPFs),
+# realtime (WebSocket consumers), worker (schedulers) or all. Set per process by the serve command.
+PROCESS_ROLES = env.list("PROCESS_ROLES", default=["all"])
+# Number of ASGI server processes started by the serve command
+SERVER_WORKERS = env.int("SERVER_WORKERS", default=1)
+
+# Processes without the web role only serve the endpoints of the FPFs
+if {"all", "web"} & {role.strip().lower() for role in PROCESS_ROLES}:
+    ROOT_URLCONF = "django_server.urls"
+else:
+    ROOT_URLCONF = "django_server.ingest_urls"
 
 TEMPLATES = [
     {
@@ -107,15 +132,24 @@ TEMPLATES = [
 
 ASGI_APPLICATION = "django_server.asgi.application"
 
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer"
-        # "BACKEND": "channels_redis.core.RedisChannelLayer",
-        # "CONFIG": {
-        #    "hosts": [("127.0.0.1", 6379)],
-        # },
-    },
-}
+# The in memory channel layer only reaches consumers in the same process. When measurements are ingested by another
+# process than the realtime consumers run in, e.g. with multiple server workers, set CHANNEL_REDIS_URL.
+CHANNEL_REDIS_URL = env("CHANNEL_REDIS_URL", default=None)
+if CHANNEL_REDIS_URL:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {
+                "hosts": [CHANNEL_REDIS_URL],
+            },
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer"
+        },
+    }
 
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
@@ -262,6 +296,117 @@ DB_LOG_RETENTION_DAYS = env("DB_LOG_RETENTION_DAYS", default=7)
 DB_QUEUE_RETENTION_DAYS = env("DB_QUEUE_RETENTION_DAYS", default=7)
 
 
+# Measurements of closed time windows are cached in chunks ('hour' or 'day') in memory or on local disk ('memory' or 'disk').
+# Chunks become cacheable once they ended more than MEASUREMENT_CACHE_SETTLE_SECONDS ago.
+# Late measurements invalidate their chunks in the ingesting process, other processes only see that through the disk
+# backend. 'auto' uses memory if this one process serves the API and the ingest (SERVER_WORKERS=1), otherwise disk.
+# Processes on different hosts need a shared MEASUREMENT_CACHE_DIR, or MEASUREMENT_CACHE_ENABLED=False.
+# MEASUREMENT_CACHE_MAX_BYTES bounds the whole MEASUREMENT_CACHE_DIR, the processes sharing it resync their view every minute.
+MEASUREMENT_CACHE_ENABLED = env.bool("MEASUREMENT_CACHE_ENABLED", default=True)
+MEASUREMENT_CACHE_BACKEND = env("MEASUREMENT_CACHE_BACKEND", default="auto")
+MEASUREMENT_CACHE_CHUNK = env("MEASUREMENT_CACHE_CHUNK", default="day")
+MEASUREMENT_CACHE_MAX_BYTES = env.int("MEASUREMENT_CACHE_MAX_BYTES", default=64 * 1024 * 1024)
+MEASUREMENT_CACHE_SETTLE_SECONDS = env.int("MEASUREMENT_CACHE_SETTLE_SECONDS", default=300)
+MEASUREMENT_CACHE_DIR = env("MEASUREMENT_CACHE_DIR", default=str(BASE_DIR / ".cache" / "measurements"))
+
+
+# Weather forecasts of open-meteo are cached per location (coordinates rounded to WEATHER_COORDINATE_PRECISION decimals)
+# until the next multiple of WEATHER_CACHE_TTL_SECONDS, then served stale for up to WEATHER_CACHE_STALE_SECONDS while they are refreshed,
+# never after the end of the day. At most WEATHER_CACHE_MAX_ENTRIES locations are cached.
+# OPEN_METEO_URL can point to the local stub (manage.py open_meteo_stub) for tests and benchmarks.
+OPEN_METEO_URL = env("OPEN_METEO_URL", default="https://api.open-meteo.com/v1/forecast")
+WEATHER_REQUEST_TIMEOUT_SECONDS = env.int("WEATHER_REQUEST_TIMEOUT_SECONDS", default=10)
+WEATHER_COORDINATE_PRECISION = env.int("WEATHER_COORDINATE_PRECISION", default=2)
+WEATHER_CACHE_TTL_SECONDS = env.int("WEATHER_CACHE_TTL_SECONDS", default=3600)
+WEATHER_CACHE_STALE_SECONDS = env.int("WEATHER_CACHE_STALE_SECONDS", default=6 * 3600)
+WEATHER_CACHE_MAX_ENTRIES = env.int("WEATHER_CACHE_MAX_ENTRIES", default=1000)
+WEATHER_CONNECTION_POOL_SIZE = env.int("WEATHER_CONNECTION_POOL_SIZE", default=10)
+# The daily forecast job requests up to WEATHER_BATCH_SIZE locations per open-meteo request,
+# a failed request is retried up to WEATHER_BATCH_RETRIES times.
+WEATHER_BATCH_SIZE = env.int("WEATHER_BATCH_SIZE", default=50)
+WEATHER_BATCH_RETRIES = env.int("WEATHER_BATCH_RETRIES", default=2)
+
+
+# Composite dashboard endpoints fetch their independent parts concurrently on a shared thread pool,
+# parts that take longer than FAN_OUT_TIMEOUT_SECONDS after their start, or wait longer than
+# FAN_OUT_QUEUE_TIMEOUT_SECONDS for a free worker, are left empty.
+FAN_OUT_MAX_WORKERS = env.int("FAN_OUT_MAX_WORKERS", default=16)
+FAN_OUT_TIMEOUT_SECONDS = env.float("FAN_OUT_TIMEOUT_SECONDS", default=10)
+FAN_OUT_QUEUE_TIMEOUT_SECONDS = env.float("FAN_OUT_QUEUE_TIMEOUT_SECONDS", default=5)
+
+
+# All scheduled jobs share one scheduler, the thread pools of its executors limit how many jobs of a kind run at once:
+# io for network and database bound jobs, cpu for maintenance jobs, actuator for jobs triggering actions on the hardware.
+SCHEDULER_IO_WORKERS = env.int("SCHEDULER_IO_WORKERS", default=10)
+SCHEDULER_CPU_WORKERS = env.int("SCHEDULER_CPU_WORKERS", default=2)
+SCHEDULER_ACTUATOR_WORKERS = env.int("SCHEDULER_ACTUATOR_WORKERS", default=4)
+
+# The action queue executes the entries of different hardware in parallel on ACTION_QUEUE_WORKERS threads, the entries
+# of one hardware one after another. A script run fails after ACTION_SCRIPT_TIMEOUT_SECONDS unless the script sets its
+# own timeout, failed entries stay in the queue and are tried again after ACTION_QUEUE_RETRY_SECONDS.
+ACTION_QUEUE_WORKERS = env.int("ACTION_QUEUE_WORKERS", default=8)
+ACTION_SCRIPT_TIMEOUT_SECONDS = env.int("ACTION_SCRIPT_TIMEOUT_SECONDS", default=30)
+ACTION_QUEUE_RETRY_SECONDS = env.int("ACTION_QUEUE_RETRY_SECONDS", default=60)
+
+# The action scripts share one event loop with one HTTP connection pool of at most ACTUATOR_HTTP_CONNECTIONS
+# connections to the devices.
+ACTUATOR_HTTP_CONNECTIONS = env.int("ACTUATOR_HTTP_CONNECTIONS", default=32)
+
+# The MQTT action scripts keep one connection per broker. Connecting, the acknowledgement of a command and its
+# confirmation on the state topic of the device each time out after MQTT_TIMEOUT_SECONDS.
+MQTT_TIMEOUT_SECONDS = env.int("MQTT_TIMEOUT_SECONDS", default=10)
+MQTT_KEEPALIVE_SECONDS = env.int("MQTT_KEEPALIVE_SECONDS", default=60)
+
+# Logged in sessions to Tapo plugs are reused for TAPO_SESSION_TTL_SECONDS, the plugs expire them after 24 hours.
+TAPO_SESSION_TTL_SECONDS = env.int("TAPO_SESSION_TTL_SECONDS", default=3600)
+
+# Scheduled snapshots of cameras behind the same smart plug within CAMERA_SNAPSHOT_BATCH_SECONDS share one power-on
+# of the plug. The cameras are polled for up to CAMERA_READY_TIMEOUT_SECONDS and captured on CAMERA_SNAPSHOT_WORKERS threads.
+CAMERA_SNAPSHOT_BATCH_SECONDS = env.int("CAMERA_SNAPSHOT_BATCH_SECONDS", default=5)
+CAMERA_READY_TIMEOUT_SECONDS = env.int("CAMERA_READY_TIMEOUT_SECONDS", default=30)
+CAMERA_SNAPSHOT_WORKERS = env.int("CAMERA_SNAPSHOT_WORKERS", default=8)
+
+# Snapshots of a camera that is streamed are taken from the latest livestream frame if it is at most
+# LIVESTREAM_SNAPSHOT_MAX_AGE_SECONDS old. Processes that stream without the worker role or next to other
+# SERVER_WORKERS share the frames through files in LIVESTREAM_FRAME_DIR, written at most every
+# LIVESTREAM_FRAME_SHARE_SECONDS per camera. A shared frame also keeps the camera plug on when the HLS livestream of
+# the camera stops, running snapshot batches mark their cameras in the same directory.
+LIVESTREAM_SNAPSHOT_MAX_AGE_SECONDS = env.int("LIVESTREAM_SNAPSHOT_MAX_AGE_SECONDS", default=5)
+LIVESTREAM_FRAME_DIR = env("LIVESTREAM_FRAME_DIR", default=os.path.join(MEDIA_ROOT, "livestream"))
+LIVESTREAM_FRAME_SHARE_SECONDS = env.int("LIVESTREAM_FRAME_SHARE_SECONDS", default=1)
+
+# HLS livestreams: ffmpeg writes a ring of HLS_PLAYLIST_SEGMENTS fMP4 segments of HLS_SEGMENT_SECONDS per camera to
+# HLS_DIR and is stopped when no viewer reloaded the playlist for HLS_VIEWER_TIMEOUT_SECONDS. HLS_VIDEO_CODEC is
+# copy (remux), libx264 (transcode) or auto, which remuxes RTSP streams and transcodes the others, e.g. MJPEG.
+FFMPEG_BINARY = env("FFMPEG_BINARY", default="ffmpeg")
+HLS_DIR = env("HLS_DIR", default=os.path.join(tempfile.gettempdir(), "farminsight-hls"))
+HLS_SEGMENT_SECONDS = env.int("HLS_SEGMENT_SECONDS", default=2)
+HLS_PLAYLIST_SEGMENTS = env.int("HLS_PLAYLIST_SEGMENTS", default=6)
+HLS_VIEWER_TIMEOUT_SECONDS = env.int("HLS_VIEWER_TIMEOUT_SECONDS", default=30)
+HLS_START_TIMEOUT_SECONDS = env.int("HLS_START_TIMEOUT_SECONDS", default=15)
+# The segment URIs of a playlist carry a token for the camera, valid for HLS_SEGMENT_TOKEN_SECONDS
+HLS_SEGMENT_TOKEN_SECONDS = env.int("HLS_SEGMENT_TOKEN_SECONDS", default=60)
+HLS_VIDEO_CODEC = env("HLS_VIDEO_CODEC", default="auto")
+
+# With multiple server processes only the leader runs the schedulers, it holds a lease in the database which is renewed
+# every LEADER_LEASE_SECONDS / 3. When the leader dies, another process takes over after at most LEADER_LEASE_SECONDS.
+# A leader that could not renew its lease steps down while at least LEADER_LEASE_SECONDS / 6 of it is left.
+# Every process also sends a heartbeat at this rate, the leader fails the started queue entries of processes that are
+# gone for LEADER_LEASE_SECONDS, so they are tried again.
+LEADER_ELECTION_ENABLED = env.bool("LEADER_ELECTION_ENABLED", default=True)
+LEADER_LEASE_SECONDS = env.int("LEADER_LEASE_SECONDS", default=30)
+
+# Action schedules, model fetches, camera snapshots, weather fetches and queue retries are stored in the database and
+# restored when the schedulers start.
+# One-off jobs overdue by more than SCHEDULED_JOB_MISFIRE_GRACE_SECONDS are dropped instead of running late, other
+# overdue jobs run once, SCHEDULED_JOB_STAGGER_SECONDS apart. Changes of other processes reach the leader within
+# SCHEDULER_CHANGE_POLL_SECONDS, all jobs are compared every SCHEDULED_JOB_SYNC_SECONDS.
+SCHEDULED_JOB_MISFIRE_GRACE_SECONDS = env.int("SCHEDULED_JOB_MISFIRE_GRACE_SECONDS", default=300)
+SCHEDULED_JOB_STAGGER_SECONDS = env.int("SCHEDULED_JOB_STAGGER_SECONDS", default=2)
+SCHEDULED_JOB_SYNC_SECONDS = env.int("SCHEDULED_JOB_SYNC_SECONDS", default=60)
+SCHEDULER_CHANGE_POLL_SECONDS = env.float("SCHEDULER_CHANGE_POLL_SECONDS", default=2)
+
+
 # To send emails from the backend to notify users there needs to be a configured mail account
 # on a smtp server that accepts pw authentication
 # for gmail this means creating an app password
@@ -1,5 +1,8 @@
 from .typed_action_script_factory import TypedActionScriptFactory
 from .typed_action_script import TypedSensor
+from .actuator_runtime import ActuatorRuntime
+from .mqtt_connection_pool import MqttConnectionPool
+from .tapo_session_cache import TapoSessionCache
 from .tapo_p100_action_script import TapoP100SmartPlugActionScriptWithDelay
 from .shelly_plug_s_http_action_script import ShellyPlugHttpActionScript, ShellyPlugMqttActionScript
 from .farmbot_watering_action_script import FarmbotSequenceActionScript
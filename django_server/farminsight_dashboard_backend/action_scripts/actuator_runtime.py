@@ -0,0 +1,112 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Coroutine
+
+import aiohttp
+from django.conf import settings
+
+from farminsight_dashboard_backend.utils import get_logger
+
+logger = get_logger()
+
+
+class ActuatorRuntime:
+    """
+    Long-lived event loop for the action scripts, implemented as a Singleton.
+    The loop runs on its own daemon thread, the sync run methods of the scripts hand their coroutines over to it
+    instead of creating a new event loop per actuation. The loop owns one aiohttp session, so the HTTP scripts reuse
+    their connections to the devices. The pool is limited to ACTUATOR_HTTP_CONNECTIONS connections.
+    Blocking device libraries have to be called with asyncio.to_thread to not stall the other scripts.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __new__(cls, *args, **kwargs):
+        return super(ActuatorRuntime, cls).__new__(cls)
+
+    def __init__(self):
+        if not getattr(self, "_initialized", False):
+            self._start_lock = threading.Lock()
+            self._loop = None
+            self._thread = None
+            self._http_session = None
+            self._initialized = True
+
+    def _get_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None or self._loop.is_closed() or not self._thread.is_alive():
+                self._loop = asyncio.new_event_loop()
+                self._http_session = None
+                self._thread = threading.Thread(target=self._loop.run_forever, name='actuator-runtime', daemon=True)
+                self._thread.start()
+                logger.debug("ActuatorRuntime started.")
+            return self._loop
+
+    def run(self, coro: Coroutine, timeout: float = None):
+        """
+        Run the coroutine on the runtime and wait for its result.
+        :param coro: The coroutine.
+        :param timeout: Seconds to wait, the coroutine is cancelled after that.
+        :return: The result of the coroutine.
+        """
+        loop = self._get_loop()
+        if self._in_runtime():
+            raise RuntimeError("ActuatorRuntime.run can not wait from within the runtime, await the coroutine instead.")
+        future = asyncio.run_coroutine_threadsafe(coro, loop)
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def submit(self, coro: Coroutine) -> Future:
+        """
+        Run the coroutine on the runtime without waiting for it, e.g. to revert an action after a delay.
+        Errors are logged.
+        """
+        future = asyncio.run_coroutine_threadsafe(coro, self._get_loop())
+        future.add_done_callback(self._log_error)
+        return future
+
+    def http_session(self) -> aiohttp.ClientSession:
+        """
+        The shared HTTP session, only usable from coroutines running on the runtime.
+        """
+        if not self._in_runtime():
+            raise RuntimeError("The HTTP session of the ActuatorRuntime can only be used on the runtime.")
+        if self._http_session is None or self._http_session.closed:
+            self._http_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=getattr(settings, 'ACTUATOR_HTTP_CONNECTIONS', 32)),
+            )
+        return self._http_session
+
+    def shutdown(self):
+        with self._start_lock:
+            loop, self._loop = self._loop, None
+            session, self._http_session = self._http_session, None
+        if loop is None or loop.is_closed():
+            return
+        if session is not None:
+            asyncio.run_coroutine_threadsafe(session.close(), loop).result(timeout=5)
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(timeout=5)
+        loop.close()
+
+    def _in_runtime(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    @staticmethod
+    def _log_error(future: Future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Background action script task failed: {future.exception()}")
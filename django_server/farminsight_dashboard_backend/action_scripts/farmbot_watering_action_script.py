@@ -91,13 +91,14 @@ class FarmbotSequenceActionScript(TypedSensor):
         """
         try:
             logger.info(f"Executing Farmbot sequence: '{self.sequence_name}' on server: {self.server}")
+            # The farmbot library is blocking, it runs on a worker thread to keep the ActuatorRuntime free
             fb = Farmbot()
             logger.info("Acquiring Farmbot token...")
-            token = fb.get_token(self.email, self.password, self.server)
+            token = await asyncio.to_thread(fb.get_token, self.email, self.password, self.server)
             fb.set_token(token)
             logger.info("Token acquired. Executing sequence.")
 
-            fb.sequence(self.sequence_name)
+            await asyncio.to_thread(fb.sequence, self.sequence_name)
             logger.info(f"Successfully triggered Farmbot sequence: '{self.sequence_name}'")
 
         except Exception as e:
@@ -106,6 +107,6 @@ class FarmbotSequenceActionScript(TypedSensor):
     def run(self, action_value):
         try:
             logger.info(f"Running Farmbot sequence action for sequence: {self.sequence_name}")
-            asyncio.run(self.run_sequence())
+            self.run_async(self.run_sequence())
         except Exception as e:
             logger.error(f"Exception during Farmbot sequence run: {e}", extra={'resource_id': self.controllable_action.id})
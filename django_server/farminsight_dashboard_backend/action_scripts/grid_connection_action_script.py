@@ -1,11 +1,15 @@
 import json
-import requests
 import asyncio
 
+import aiohttp
+from asgiref.sync import sync_to_async
+
 from farminsight_dashboard_backend.utils import get_logger
 from farminsight_dashboard_backend.action_scripts.action_script_description import ActionScriptDescription, \
     FieldDescription, ValidHttpEndpointRule, FieldType
 from farminsight_dashboard_backend.action_scripts.typed_action_script import TypedSensor
+from farminsight_dashboard_backend.action_scripts.actuator_runtime import ActuatorRuntime
+from farminsight_dashboard_backend.action_scripts.mqtt_connection_pool import MqttConnectionPool
 
 
 logger = get_logger()
@@ -72,12 +76,16 @@ class GridConnectionActionScript(TypedSensor):
             params = {"turn": relay_state}
 
             if self.maximumDurationInSeconds > 0:
-                params["timer"] = self.maximumDurationInSeconds
+                params["timer"] = str(self.maximumDurationInSeconds)
 
-            # Send HTTP request
-            response = requests.get(url, params=params, timeout=10)
+            # Send HTTP request over the shared connection pool
+            session = ActuatorRuntime.get_instance().http_session()
+            async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                status = response.status
+                # Reading the body releases the connection back into the pool
+                await response.read()
 
-            if response.status_code == 200:
+            if status == 200:
                 logger.info(
                     f"Successfully sent '{action_lower}' command to grid controller.",
                     extra={'resource_id': self.controllable_action.id}
@@ -85,23 +93,23 @@ class GridConnectionActionScript(TypedSensor):
 
                 # Log the grid state change
                 from farminsight_dashboard_backend.services.log_message_services import write_log_message
-                write_log_message(
+                await sync_to_async(write_log_message)(
                     resource_id=str(self.controllable_action.id),
                     resource_type="controllable_action",
                     message=f"Grid {'connected' if action_lower == 'connect' else 'disconnected'} successfully"
                 )
             else:
                 logger.error(
-                    f"Failed to control grid connection. Status code: {response.status_code}",
+                    f"Failed to control grid connection. Status code: {status}",
                     extra={'resource_id': self.controllable_action.id}
                 )
 
-        except requests.exceptions.Timeout:
+        except asyncio.TimeoutError:
             logger.error(
                 "Timeout while attempting to control grid connection.",
                 extra={'resource_id': self.controllable_action.id}
             )
-        except requests.exceptions.ConnectionError as e:
+        except aiohttp.ClientConnectionError as e:
             logger.error(
                 f"Connection error while controlling grid: {e}",
                 extra={'resource_id': self.controllable_action.id}
@@ -118,7 +126,7 @@ class GridConnectionActionScript(TypedSensor):
         :param action_value: 'Connect' or 'Disconnect'
         """
         try:
-            asyncio.run(self.control_grid_connection(action_value=str(action_value).strip().lower()))
+            self.run_async(self.control_grid_connection(action_value=str(action_value).strip().lower()))
         except Exception as e:
             logger.error(
                 f"Exception during grid connection control: {e}",
@@ -131,12 +139,14 @@ class GridConnectionMqttActionScript(TypedSensor):
     MQTT-based grid connection controller for systems using MQTT protocol.
     """
     mqtt_topic = None
+    mqtt_state_topic = None
     mqtt_broker = None
     mqtt_port = 1883
 
     def init_additional_information(self):
         additional_information = json.loads(self.controllable_action.additionalInformation)
         self.mqtt_topic = additional_information.get('mqtt_topic')
+        self.mqtt_state_topic = additional_information.get('mqtt_state_topic') or None
         self.mqtt_broker = additional_information.get('mqtt_broker')
         self.mqtt_port = additional_information.get('mqtt_port', 1883)
 
@@ -171,6 +181,13 @@ class GridConnectionMqttActionScript(TypedSensor):
                     description="MQTT topic for grid control commands.;MQTT Topic für Netzsteuerungsbefehle.",
                     type=FieldType.STRING,
                     rules=[]
+                ),
+                FieldDescription(
+                    id='mqtt_state_topic',
+                    name='MQTT State Topic;MQTT Status Topic',
+                    description="Optional topic on which the controller reports its state, the command waits for its confirmation.;Optionales Topic auf dem der Controller seinen Status meldet, der Befehl wartet auf dessen Bestätigung.",
+                    type=FieldType.STRING,
+                    rules=[]
                 )
             ]
         )
@@ -181,15 +198,11 @@ class GridConnectionMqttActionScript(TypedSensor):
         :param action_value: 'Connect' or 'Disconnect'
         """
         try:
-            import paho.mqtt.client as mqtt
-
             action_lower = action_value.lower().strip()
             payload = "ON" if action_lower == "connect" else "OFF"
 
-            client = mqtt.Client()
-            client.connect(self.mqtt_broker, self.mqtt_port, 60)
-            client.publish(self.mqtt_topic, payload)
-            client.disconnect()
+            connection = MqttConnectionPool.get_instance().get_connection(self.mqtt_broker, self.mqtt_port)
+            connection.publish(self.mqtt_topic, payload, state_topic=self.mqtt_state_topic)
 
             logger.info(
                 f"Successfully sent '{action_lower}' command via MQTT to {self.mqtt_topic}",
@@ -0,0 +1,182 @@
+import threading
+import uuid
+from collections import defaultdict
+
+import paho.mqtt.client as mqtt
+from django.conf import settings
+
+from farminsight_dashboard_backend.utils import get_logger
+
+logger = get_logger()
+
+
+class MqttConnection:
+    """
+    Persistent connection to one MQTT broker. The network loop of paho runs on its own thread and reconnects
+    automatically, the state topics subscribed for confirmations are subscribed again after a reconnect.
+    """
+    def __init__(self, broker: str, port: int, username: str = None, password: str = None):
+        self.broker = broker
+        self.port = port
+        self.timeout_seconds = getattr(settings, 'MQTT_TIMEOUT_SECONDS', 10)
+        self._connected = threading.Event()
+        self._state_condition = threading.Condition()
+        # State topic -> (number of messages received, last payload)
+        self._states = {}
+
+        self._client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2, client_id=f"farminsight-{uuid.uuid4().hex[:12]}")
+        if username and password:
+            self._client.username_pw_set(username, password)
+        self._client.reconnect_delay_set(min_delay=1, max_delay=30)
+        self._client.on_connect = self._on_connect
+        self._client.on_disconnect = self._on_disconnect
+        self._client.on_message = self._on_message
+
+    @property
+    def is_connected(self) -> bool:
+        return self._connected.is_set()
+
+    def connect(self):
+        """
+        Connect and start the network loop.
+        :raises ConnectionError: If the broker did not accept the connection in time.
+        """
+        self._client.connect_async(self.broker, self.port, getattr(settings, 'MQTT_KEEPALIVE_SECONDS', 60))
+        self._client.loop_start()
+        if not self._connected.wait(self.timeout_seconds):
+            self.close()
+            raise ConnectionError(f"Could not connect to MQTT broker {self.broker}:{self.port}.")
+        logger.info(f"Connected to MQTT broker {self.broker}:{self.port}.")
+
+    def publish(self, topic: str, payload: str, qos: int = 1, state_topic: str = None, expected_state: str = None):
+        """
+        Publish a message and wait until the broker acknowledged it.
+        :param topic: Topic to publish to.
+        :param payload: The message.
+        :param qos: 1 waits for the PUBACK of the broker, 2 for the complete QoS 2 handshake.
+        :param state_topic: Optional topic on which the device reports its state, to wait for the confirmation.
+        :param expected_state: State that confirms the command, compared case-insensitive, by default the payload.
+        :raises TimeoutError: If the message was not acknowledged or confirmed in time.
+        """
+        if not self._connected.wait(self.timeout_seconds):
+            raise ConnectionError(f"Not connected to MQTT broker {self.broker}:{self.port}.")
+
+        if state_topic:
+            self._subscribe_state(state_topic)
+            with self._state_condition:
+                received_before = self._states.get(state_topic, (0, None))[0]
+
+        info = self._client.publish(topic, payload, qos=qos)
+        if info.rc != mqtt.MQTT_ERR_SUCCESS:
+            raise RuntimeError(f"Failed to publish MQTT message to topic '{topic}'. Return code: {info.rc}")
+        info.wait_for_publish(self.timeout_seconds)
+        if not info.is_published():
+            raise TimeoutError(f"MQTT message to topic '{topic}' was not acknowledged within {self.timeout_seconds} seconds.")
+
+        if state_topic:
+            expected = str(expected_state if expected_state is not None else payload).lower()
+
+            def confirmed():
+                received, state = self._states.get(state_topic, (0, None))
+                return received > received_before and state == expected
+
+            with self._state_condition:
+                if not self._state_condition.wait_for(confirmed, self.timeout_seconds):
+                    raise TimeoutError(f"Device did not confirm '{payload}' on '{state_topic}' within {self.timeout_seconds} seconds.")
+
+    def close(self):
+        self._client.loop_stop()
+        self._client.disconnect()
+        self._connected.clear()
+
+    def _subscribe_state(self, state_topic: str):
+        with self._state_condition:
+            if state_topic in self._states:
+                return
+            self._states[state_topic] = (0, None)
+        self._client.subscribe(state_topic, qos=1)
+
+    def _on_connect(self, client, userdata, flags, reason_code, properties):
+        if reason_code.is_failure:
+            logger.warning(f"MQTT broker {self.broker}:{self.port} refused the connection: {reason_code}")
+            return
+        with self._state_condition:
+            state_topics = list(self._states)
+        for state_topic in state_topics:
+            client.subscribe(state_topic, qos=1)
+        self._connected.set()
+
+    def _on_disconnect(self, client, userdata, disconnect_flags, reason_code, properties):
+        self._connected.clear()
+        if reason_code != 0:
+            logger.warning(f"Lost connection to MQTT broker {self.broker}:{self.port} ({reason_code}), reconnecting.")
+
+    def _on_message(self, client, userdata, message):
+        with self._state_condition:
+            if message.topic in self._states:
+                received = self._states[message.topic][0]
+                self._states[message.topic] = (received + 1, message.payload.decode(errors='replace').strip().lower())
+                self._state_condition.notify_all()
+
+
+class MqttConnectionPool:
+    """
+    Persistent MQTT connections of the action scripts, one per broker, port and credentials, implemented as a Singleton.
+    Saves the TCP and MQTT handshake and the authentication of every command.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __new__(cls, *args, **kwargs):
+        return super(MqttConnectionPool, cls).__new__(cls)
+
+    def __init__(self):
+        if not getattr(self, "_initialized", False):
+            self._connections = {}
+            self._connections_lock = threading.Lock()
+            # One lock per broker, so a slow broker only delays the first commands to itself
+            self._connect_locks = defaultdict(threading.Lock)
+            self._initialized = True
+
+    def get_connection(self, broker: str, port: int = 1883, username: str = None, password: str = None) -> MqttConnection:
+        """
+        The connection to the broker, connected on first use.
+        :raises ConnectionError: If a new connection could not be established.
+        """
+        key = (broker, int(port or 1883), username or None, password or None)
+        with self._connections_lock:
+            connection = self._connections.get(key)
+            if connection is not None:
+                return connection
+            connect_lock = self._connect_locks[key]
+
+        # Connecting under the lock of the broker, so concurrent first commands share one connection
+        with connect_lock:
+            with self._connections_lock:
+                connection = self._connections.get(key)
+            if connection is None:
+                connection = MqttConnection(*key)
+                connection.connect()
+                with self._connections_lock:
+                    self._connections[key] = connection
+            return connection
+
+    def close_all(self):
+        with self._connections_lock:
+            connections, self._connections = list(self._connections.values()), {}
+        for connection in connections:
+            connection.close()
+
+    def get_stats(self) -> dict:
+        with self._connections_lock:
+            return {
+                "connections": len(self._connections),
+                "connected": sum(1 for connection in self._connections.values() if connection.is_connected),
+            }
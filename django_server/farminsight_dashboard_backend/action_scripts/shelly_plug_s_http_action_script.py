@@ -1,12 +1,14 @@
 import json
-import requests
 import asyncio
-import paho.mqtt.client as mqtt
+
+import aiohttp
 
 from farminsight_dashboard_backend.utils import get_logger
 from farminsight_dashboard_backend.action_scripts.action_script_description import ActionScriptDescription, \
     FieldDescription, ValidHttpEndpointRule, FieldType
 from farminsight_dashboard_backend.action_scripts.typed_action_script import TypedSensor
+from farminsight_dashboard_backend.action_scripts.actuator_runtime import ActuatorRuntime
+from farminsight_dashboard_backend.action_scripts.mqtt_connection_pool import MqttConnectionPool
 
 
 logger = get_logger()
@@ -61,18 +63,21 @@ class ShellyPlugHttpActionScript(TypedSensor):
             params = {"turn": action_value}
 
             if self.maximumDurationInSeconds > 0:
-                params["timer"] = self.maximumDurationInSeconds
+                params["timer"] = str(self.maximumDurationInSeconds)
                 logger.info(f"Action will be reversed after {self.maximumDurationInSeconds} seconds.")
 
-            # Send HTTP request
-            response = requests.get(url, params=params, timeout=5)
+            # Send HTTP request over the shared connection pool
+            session = ActuatorRuntime.get_instance().http_session()
+            async with session.get(url, params=params, timeout=aiohttp.ClientTimeout(total=5)) as response:
+                # Reading the body releases the connection back into the pool
+                status, text = response.status, await response.text()
 
-            if response.status_code == 200:
+            if status == 200:
                 logger.info(f"Successfully sent '{action_value}' command to Shelly plug at {self.http_endpoint}.")
             else:
-                logger.error(f"Failed to control Shelly plug at {self.http_endpoint}. Status: {response.status_code}, Response: {response.text}", extra={'resource_id': self.controllable_action.id})
+                logger.error(f"Failed to control Shelly plug at {self.http_endpoint}. Status: {status}, Response: {text}", extra={'resource_id': self.controllable_action.id})
 
-        except requests.exceptions.RequestException as e:
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             logger.error(f"HTTP request failed for Shelly plug at {self.http_endpoint}: {e}", extra={'resource_id': self.controllable_action.id})
         except Exception as e:
             logger.error(f"An unexpected error occurred during Shelly smart plug control: {e}", extra={'resource_id': self.controllable_action.id})
@@ -80,7 +85,7 @@ class ShellyPlugHttpActionScript(TypedSensor):
     def run(self, action_value):
         try:
             logger.info(f"Running Shelly Plug HTTP action with value: {action_value}")
-            asyncio.run(self.control_smart_plug(action_value=str(action_value).strip().lower()))
+            self.run_async(self.control_smart_plug(action_value=str(action_value).strip().lower()))
         except Exception as e:
             logger.error(f"Exception during smart plug control execution: {e}", extra={'resource_id': self.controllable_action.id})
 
@@ -91,6 +96,7 @@ class ShellyPlugMqttActionScript(TypedSensor):
     mqtt_username = None
     mqtt_password = None
     mqtt_topic = None
+    mqtt_state_topic = None
     maximumDurationInSeconds = 0
 
     def init_additional_information(self):
@@ -102,6 +108,7 @@ class ShellyPlugMqttActionScript(TypedSensor):
         self.mqtt_username = info.get('mqtt-username')
         self.mqtt_password = info.get('mqtt-password')
         self.mqtt_topic = info['mqtt-topic']
+        self.mqtt_state_topic = info.get('mqtt-state-topic') or None
         logger.info(f"Shelly Plug S (MQTT) initialized for broker: {self.mqtt_broker}, topic: {self.mqtt_topic}")
 
     @staticmethod
@@ -146,28 +153,23 @@ class ShellyPlugMqttActionScript(TypedSensor):
                     description="MQTT topic to send the command to. Example: 'shellies/shellyplug-s-1234/relay/0/command';MQTT Thema an den der Befehl gesendet wird. Beispiel: 'shellies/shellyplug-s-1234/relay/0/command'",
                     type=FieldType.STRING,
                     rules=[]),
+                FieldDescription(
+                    id='mqtt-state-topic',
+                    name='MQTT state topic;MQTT Status Thema',
+                    description="Optional topic on which the plug reports its state, the command waits for its confirmation. Example: 'shellies/shellyplug-s-1234/relay/0';Optionales Thema auf dem der Stecker seinen Status meldet, der Befehl wartet auf dessen Bestätigung. Beispiel: 'shellies/shellyplug-s-1234/relay/0'",
+                    type=FieldType.STRING,
+                    rules=[]),
             ]
         )
 
     def send_mqtt_command(self, topic: str, payload: str):
         try:
             logger.info(f"Sending MQTT command. Topic: '{topic}', Payload: '{payload}'")
-            client = mqtt.Client()
-            if self.mqtt_username and self.mqtt_password:
-                client.username_pw_set(self.mqtt_username, self.mqtt_password)
-
-            client.connect(self.mqtt_broker, self.mqtt_port, 60)
-            client.loop_start()
-            result = client.publish(topic, payload)
-            result.wait_for_publish()
-            client.loop_stop()
-            client.disconnect()
-
-            if result.rc == mqtt.MQTT_ERR_SUCCESS:
-                logger.info(f"Successfully sent '{payload}' to topic '{topic}'")
-            else:
-                logger.error(f"Failed to publish MQTT message to topic '{topic}'. Return code: {result.rc}", extra={'resource_id': self.controllable_action.id})
-                raise RuntimeError(f"Failed to publish message. MQTT return code: {result.rc}")
+            connection = MqttConnectionPool.get_instance().get_connection(
+                self.mqtt_broker, self.mqtt_port, self.mqtt_username, self.mqtt_password
+            )
+            connection.publish(topic, payload, state_topic=self.mqtt_state_topic)
+            logger.info(f"Successfully sent '{payload}' to topic '{topic}'")
         except Exception as e:
             logger.error(f"Exception during MQTT communication: {e}", extra={'resource_id': self.controllable_action.id})
             raise RuntimeError(f"Exception during MQTT communication: {e}")
@@ -184,7 +186,8 @@ class ShellyPlugMqttActionScript(TypedSensor):
             if self.maximumDurationInSeconds > 0:
                 opposite_action = "off" if action_value == "on" else "on"
                 logger.info(f"Action will be reversed to '{opposite_action}' after {self.maximumDurationInSeconds} seconds.")
-                asyncio.run(self.delayed_action(self.maximumDurationInSeconds, opposite_action))
+                # Reverted in the background, the actuation itself is done
+                ActuatorRuntime.get_instance().submit(self.delayed_action(self.maximumDurationInSeconds, opposite_action))
 
         except Exception as e:
             logger.error(f"Exception during Shelly smart plug control: {e}", extra={'resource_id': self.controllable_action.id})
@@ -193,7 +196,7 @@ class ShellyPlugMqttActionScript(TypedSensor):
     async def delayed_action(self, delay_seconds: int, action: str):
         await asyncio.sleep(delay_seconds)
         logger.info(f"Executing delayed action: '{action}'")
-        self.send_mqtt_command(self.mqtt_topic, action)
+        await asyncio.to_thread(self.send_mqtt_command, self.mqtt_topic, action)
 
     def run(self, action_value):
         try:
@@ -5,7 +5,7 @@ from farminsight_dashboard_backend.utils import get_logger
 from farminsight_dashboard_backend.action_scripts.action_script_description import ActionScriptDescription, \
     FieldDescription, FieldType
 from farminsight_dashboard_backend.action_scripts.typed_action_script import TypedSensor
-from PyP100 import PyP100
+from farminsight_dashboard_backend.action_scripts.tapo_session_cache import TapoSessionCache
 
 logger = get_logger()
 
@@ -69,33 +69,40 @@ class TapoP100SmartPlugActionScriptWithDelay(TypedSensor):
                 logger.error(f"Invalid action value: {action_value}. Expected 'on' or 'off'.")
                 raise RuntimeError(f"Invalid action value: {action_value}. Expected 'on' or 'off'.")
 
-            p100 = PyP100.P100(self.ip_address, self.tapo_account_email, self.tapo_account_password)
-            logger.info("Performing handshake and login...")
-            p100.handshake()
-            p100.login()
-            logger.info("Login successful.")
-
             if action_value == 'on':
                 logger.info("Turning plug on.")
-                p100.turnOn()
+                await self._call(lambda p100: p100.turnOn())
                 if self.maximumDurationInSeconds > 0:
                     logger.info(f"Will turn off after {self.maximumDurationInSeconds} seconds.")
-                    p100.turnOffWithDelay(self.maximumDurationInSeconds)
+                    await self._call(lambda p100: p100.turnOffWithDelay(self.maximumDurationInSeconds))
             else:
                 logger.info("Turning plug off.")
-                p100.turnOff()
+                await self._call(lambda p100: p100.turnOff())
                 if self.maximumDurationInSeconds > 0:
                     logger.info(f"Will turn on after {self.maximumDurationInSeconds} seconds.")
-                    p100.turnOnWithDelay(self.maximumDurationInSeconds)
+                    await self._call(lambda p100: p100.turnOnWithDelay(self.maximumDurationInSeconds))
             logger.info("Smart plug action completed successfully.")
         except Exception as e:
             logger.error(f"Failed to control smart plug with value '{action_value}': {e}")
             raise RuntimeError(f"Failed to control smart plug with value '{action_value}': {e}")
 
+    async def _call(self, command):
+        # PyP100 is blocking, it runs on a worker thread to keep the ActuatorRuntime free for the other scripts
+        return await asyncio.to_thread(
+            TapoSessionCache.get_instance().call,
+            self.ip_address, self.tapo_account_email, self.tapo_account_password, command
+        )
+
+    def release(self):
+        # Drops the session logged in with the previous address or credentials
+        TapoSessionCache.get_instance().invalidate(
+            self.ip_address, self.tapo_account_email, self.tapo_account_password
+        )
+
     def run(self, action_value):
         try:
             logger.info(f"Running smart plug control for action: {action_value}")
-            asyncio.run(self.control_smart_plug(action_value=str(action_value).strip().lower()))
+            self.run_async(self.control_smart_plug(action_value=str(action_value).strip().lower()))
         except Exception as e:
             logger.error(f"Exception during smart plug control: {e}")
             raise RuntimeError(f"Exception during smart plug control: {e}")
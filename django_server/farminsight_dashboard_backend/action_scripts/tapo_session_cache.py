@@ -0,0 +1,93 @@
+import threading
+import time
+from collections import defaultdict
+from typing import Callable
+
+from django.conf import settings
+from PyP100 import PyP100
+
+from farminsight_dashboard_backend.utils import get_logger
+
+logger = get_logger()
+
+
+class TapoSessionCache:
+    """
+    Authenticated sessions to Tapo plugs, one per IP address and account, implemented as a Singleton.
+    The handshake and login take several round trips with an RSA key exchange, the cached session is reused until
+    it is older than TAPO_SESSION_TTL_SECONDS, which has to stay below the session timeout of the plug.
+    A command failing on a cached session is repeated once on a new session, e.g. after the plug restarted.
+    The commands to one plug run one after another, the P100 client is not thread safe.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __new__(cls, *args, **kwargs):
+        return super(TapoSessionCache, cls).__new__(cls)
+
+    def __init__(self):
+        if not getattr(self, "_initialized", False):
+            self.ttl_seconds = getattr(settings, 'TAPO_SESSION_TTL_SECONDS', 3600)
+            # (ip address, email, password) -> (P100 client, expires at)
+            self._sessions = {}
+            self._device_locks = defaultdict(threading.Lock)
+            self._device_locks_lock = threading.Lock()
+            self.logins = 0
+            self._initialized = True
+
+    def call(self, ip_address: str, email: str, password: str, command: Callable):
+        """
+        Run the command on an authenticated session of the plug. Blocking, call it from a worker thread.
+        :param ip_address: IP address of the plug.
+        :param email: Tapo account email.
+        :param password: Tapo account password.
+        :param command: Function called with the logged in PyP100.P100 client.
+        :return: The result of the command.
+        """
+        key = (ip_address, email, password)
+        with self._device_locks_lock:
+            device_lock = self._device_locks[key]
+
+        with device_lock:
+            cached = self._sessions.get(key)
+            if cached is not None and cached[1] > time.monotonic():
+                try:
+                    return command(cached[0])
+                except Exception as e:
+                    logger.info(f"Command on the cached Tapo session of {ip_address} failed, logging in again: {e}")
+
+            p100 = self._login(ip_address, email, password)
+            self._sessions[key] = (p100, time.monotonic() + self.ttl_seconds)
+            try:
+                return command(p100)
+            except Exception:
+                self._sessions.pop(key, None)
+                raise
+
+    def invalidate(self, ip_address: str, email: str, password: str):
+        """
+        Drop the session to the plug with the account, the next command logs in again.
+        """
+        key = (ip_address, email, password)
+        with self._device_locks_lock:
+            device_lock = self._device_locks.get(key)
+        if device_lock is None:
+            return
+        with device_lock:
+            self._sessions.pop(key, None)
+
+    def _login(self, ip_address: str, email: str, password: str) -> PyP100.P100:
+        logger.info(f"Performing handshake and login with Tapo plug at {ip_address}...")
+        p100 = PyP100.P100(ip_address, email, password)
+        p100.handshake()
+        p100.login()
+        self.logins += 1
+        logger.info("Login successful.")
+        return p100
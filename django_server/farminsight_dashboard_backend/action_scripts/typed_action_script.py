@@ -1,10 +1,14 @@
 from abc import ABC, abstractmethod
 
 from farminsight_dashboard_backend.action_scripts.action_script_description import ActionScriptDescription
+from farminsight_dashboard_backend.action_scripts.actuator_runtime import ActuatorRuntime
 from farminsight_dashboard_backend.models import ControllableAction
 
 
 class TypedSensor(ABC):
+    # Seconds a run may take before it counts as failed, None for the ACTION_SCRIPT_TIMEOUT_SECONDS setting
+    timeout_seconds = None
+
     def __init__(self, controllable_action:ControllableAction):
         self.controllable_action = controllable_action
         self.init_additional_information()
@@ -21,3 +25,16 @@ class TypedSensor(ABC):
     @abstractmethod
     def run(self, action_value):
         pass
+
+    def release(self):
+        """
+        Release the connections and sessions kept for this script, called when the script instance is replaced or
+        dropped. Nothing by default.
+        """
+        pass
+
+    def run_async(self, coro):
+        """
+        Run a coroutine of the script on the ActuatorRuntime and wait for its result, for the sync run method.
+        """
+        return ActuatorRuntime.get_instance().run(coro)
@@ -1,6 +1,8 @@
+import threading
 from typing import Type
 
 from farminsight_dashboard_backend.action_scripts.typed_action_script import TypedSensor
+from farminsight_dashboard_backend.models import ControllableAction
 
 
 def all_subclasses(cls):
@@ -10,6 +12,9 @@ def all_subclasses(cls):
 
 class TypedActionScriptFactory:
     registry = None
+    # Controllable action ID -> (configuration, script instance), shared by all factories
+    _scripts = {}
+    _scripts_lock = threading.Lock()
 
     def __init__(self, **kwargs):
         if self.registry is None:
@@ -31,3 +36,40 @@ class TypedActionScriptFactory:
 
     def get_typed_action_script_class(self, action_script_class_id: str) -> Type[TypedSensor]:
         return self.registry[action_script_class_id]
+
+    def get_typed_action_script(self, controllable_action: ControllableAction) -> TypedSensor:
+        """
+        The script instance of the controllable action. Instances are kept per action, so connections and sessions of
+        a script are reused by the following actuations. A new instance is created when the configuration changed.
+        """
+        configuration = (
+            str(controllable_action.actionClassId),
+            controllable_action.additionalInformation,
+            controllable_action.maximumDurationSeconds,
+        )
+        with self._scripts_lock:
+            cached = self._scripts.get(str(controllable_action.id))
+            if cached is not None and cached[0] == configuration:
+                script = cached[1]
+                # Keep the action up to date for the script, e.g. its name
+                script.controllable_action = controllable_action
+                return script
+
+        script = self.get_typed_action_script_class(configuration[0])(controllable_action)
+        with self._scripts_lock:
+            replaced = self._scripts.get(str(controllable_action.id))
+            self._scripts[str(controllable_action.id)] = (configuration, script)
+        # The configuration changes in the web process, the script is replaced in the process running the actuations
+        if replaced is not None and replaced[1] is not script:
+            replaced[1].release()
+        return script
+
+    @classmethod
+    def invalidate(cls, controllable_action_id):
+        """
+        Drop the script instance of the controllable action, e.g. after it was changed or deleted.
+        """
+        with cls._scripts_lock:
+            cached = cls._scripts.pop(str(controllable_action_id), None)
+        if cached is not None:
+            cached[1].release()
@@ -4,11 +4,12 @@ import os
 import threading
 
 from django.apps import AppConfig
+from django.conf import settings
 from django.db.utils import OperationalError
 from django.db.migrations.executor import MigrationExecutor
 from django.db import connections
 
-from farminsight_dashboard_backend.utils import get_logger
+from farminsight_dashboard_backend.utils import get_logger, has_process_role, get_process_roles, ROLE_WORKER
 
 
 class FarminsightDashboardBackendConfig(AppConfig):
@@ -18,6 +19,7 @@ class FarminsightDashboardBackendConfig(AppConfig):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.log = get_logger()
+        self._background_jobs_started = False
 
     def initialize_app(self, max_retries=3, retry_interval=3):
         """
@@ -32,22 +34,26 @@ class FarminsightDashboardBackendConfig(AppConfig):
                     time.sleep(retry_interval)
                     retry_count += 1
                 else:
-                    from farminsight_dashboard_backend.services import InfluxDBManager, CameraScheduler, DataRetentionScheduler, WeatherForecastScheduler, AutoTriggerScheduler, ModelScheduler, FPFHealthScheduler, ForecastActionScheduler, MatrixScheduler
+                    from farminsight_dashboard_backend.services import InfluxDBManager, LeaderElection, MatrixScheduler, \
+                        ProcessHeartbeat, collect_background_job_stats
                     from farminsight_dashboard_backend.services.trigger.MeasurementTriggerManager import \
                         MeasurementTriggerManager
 
                     InfluxDBManager.get_instance().initialize_connection()
+                    # Every process sends its own notifications
                     MatrixScheduler.get_instance().start()
-                    CameraScheduler.get_instance().start()
-                    DataRetentionScheduler.get_instance().start()
-                    WeatherForecastScheduler.get_instance().start()
-                    AutoTriggerScheduler.get_instance().start()
-                    FPFHealthScheduler.get_instance().start()
-                    ModelScheduler.get_instance().start()
-                    ForecastActionScheduler.get_instance().start()
                     MeasurementTriggerManager.build_trigger_mapping()
+                    # Lets the leader recover the queue entries of this process once it is gone
+                    ProcessHeartbeat.get_instance().start()
+                    # Only one worker process runs the background jobs, the others only serve requests
+                    if has_process_role(ROLE_WORKER):
+                        LeaderElection.get_instance().start(
+                            on_elected=self.start_background_jobs,
+                            on_demoted=self.pause_background_jobs,
+                            collect_stats=collect_background_job_stats
+                        )
 
-                    self.log.info("Started successfully.")
+                    self.log.info(f"Started successfully with roles {', '.join(sorted(get_process_roles()))}.")
                     break
             except OperationalError as e:
                 self.log.error(f"Database not ready yet: {e}")
@@ -59,6 +65,46 @@ class FarminsightDashboardBackendConfig(AppConfig):
         if retry_count == max_retries:
             self.log.error("Max retries reached. App did not start.")
 
+    def start_background_jobs(self):
+        """
+        Start all schedulers, or resume them if this process was the leader before.
+        """
+        from farminsight_dashboard_backend.services import SchedulerRuntime, ScheduledJobStore, CameraScheduler, DataRetentionScheduler, WeatherForecastScheduler, AutoTriggerScheduler, ModelScheduler, FPFHealthScheduler, ForecastActionScheduler, fail_stale_queue_entries
+
+        if self._background_jobs_started:
+            # Pick up the jobs the other leader stored in the meantime
+            ScheduledJobStore.get_instance().restore()
+            fail_stale_queue_entries()
+            ForecastActionScheduler.get_instance().load()
+            SchedulerRuntime.get_instance().resume()
+            return
+
+        ScheduledJobStore.get_instance().start()
+        # Queue entries whose script was still running when its process stopped are never ended otherwise
+        fail_stale_queue_entries()
+        SchedulerRuntime.get_instance().add_job(
+            'ActionQueue',
+            fail_stale_queue_entries,
+            executor=SchedulerRuntime.CPU,
+            trigger='interval',
+            seconds=getattr(settings, 'LEADER_LEASE_SECONDS', 30),
+            id='stale_queue_entries',
+            replace_existing=True,
+        )
+        CameraScheduler.get_instance().start()
+        DataRetentionScheduler.get_instance().start()
+        WeatherForecastScheduler.get_instance().start()
+        AutoTriggerScheduler.get_instance().start()
+        FPFHealthScheduler.get_instance().start()
+        ModelScheduler.get_instance().start()
+        ForecastActionScheduler.get_instance().start()
+        SchedulerRuntime.get_instance().start()
+        self._background_jobs_started = True
+
+    def pause_background_jobs(self):
+        from farminsight_dashboard_backend.services import SchedulerRuntime
+        SchedulerRuntime.get_instance().pause()
+
     def has_pending_migrations(self) -> bool:
         """
         Check if there are any pending migrations.
@@ -75,7 +121,8 @@ class FarminsightDashboardBackendConfig(AppConfig):
 
     def ready(self):
         """
-        Start a new thread to check for pending migrations and start the app if ready
+        Start a new thread to check for pending migrations and start the app if ready.
+        Runs in the reloaded process of runserver and in the processes started by the serve command.
         """
-        if os.environ.get('RUN_MAIN') == 'true':
+        if os.environ.get('RUN_MAIN') == 'true' or os.environ.get('SERVER_PROCESS') == 'true':
             threading.Thread(target=self.initialize_app, daemon=True).start()
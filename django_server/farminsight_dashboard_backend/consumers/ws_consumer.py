@@ -4,9 +4,9 @@ import json
 from asgiref.sync import sync_to_async
 from channels.generic.websocket import AsyncWebsocketConsumer
 
-from farminsight_dashboard_backend.models import LogMessage
-from farminsight_dashboard_backend.services import sensor_exists, get_active_camera_by_id
-from farminsight_dashboard_backend.services.camera_services import trigger_camera_plug
+from farminsight_dashboard_backend.models import LogMessage, Sensor
+from farminsight_dashboard_backend.services import sensor_exists, get_active_camera_by_id, AsyncInfluxDBManager
+from farminsight_dashboard_backend.services.camera_services import trigger_camera_plug, release_camera_plug
 from farminsight_dashboard_backend.services.fpf_streaming_services import websocket_stream
 from farminsight_dashboard_backend.utils import get_logger
 
@@ -23,9 +23,10 @@ class SensorUpdatesConsumer(AsyncWebsocketConsumer):
             self.room_name = self.scope['url_route']['kwargs']['sensor_id']
             self.room_group_name = f'sensor_updates_{self.room_name}'
 
-            if sensor_exists(self.room_name):
+            if await sensor_exists(self.room_name):
                 await self.channel_layer.group_add(self.room_group_name, self.channel_name)
                 await self.accept()
+                await self.send_latest_measurement()
             else:
                 await self.close()
         except Exception as e:
@@ -37,6 +38,20 @@ class SensorUpdatesConsumer(AsyncWebsocketConsumer):
     async def disconnect(self, close_code):
         await self.channel_layer.group_discard(self.room_group_name, self.channel_name)
 
+    async def send_latest_measurement(self):
+        """
+        Send the latest stored measurement right after connecting, so the client does not wait for the next one.
+        """
+        sensor_id, fpf_id = await Sensor.objects.filter(id=self.room_name).values_list('id', 'FPF_id').aget()
+        try:
+            latest = await AsyncInfluxDBManager.get_instance().fetch_latest_sensor_measurements(str(fpf_id), [str(sensor_id)])
+        except Exception as e:
+            logger.warning(f"Could not fetch the latest measurement of sensor {sensor_id}: {e}")
+            return
+        measurement = latest.get(str(sensor_id))
+        if measurement is not None:
+            await self.send(text_data=json.dumps({'measurement': [measurement]}))
+
     async def sensor_measurement(self, event):
         measurement = event['measurement']
         await self.send(text_data=json.dumps({'measurement': measurement}))
@@ -124,7 +139,7 @@ class WebsocketStreamingManager:
                 logger.error(f"Failed to turn on camera plug: {e}")
 
             stop_event = asyncio.Event()
-            task = asyncio.create_task(websocket_stream(livestream_url, group_name, max_fps=max_fps, stop_event=stop_event))
+            task = asyncio.create_task(websocket_stream(livestream_url, group_name, max_fps=max_fps, stop_event=stop_event, camera_id=camera_id))
 
             # cleanup if task is done
             def _done_callback(t, cid=camera_id):
@@ -148,9 +163,9 @@ class WebsocketStreamingManager:
                 # Stop the streaming task
                 entry['stop_event'].set()
                 
-                # Stream stopping - Turn OFF Smart Plug
+                # Stream stopping - Turn OFF Smart Plug, unless the HLS livestream or a snapshot still need the camera
                 try:
-                    await sync_to_async(trigger_camera_plug)(camera_id, "Off")
+                    await sync_to_async(release_camera_plug)(camera_id, 'websocket')
                 except Exception as e:
                     logger.error(f"Failed to turn off camera plug: {e}")
 
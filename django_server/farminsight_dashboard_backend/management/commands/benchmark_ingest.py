@@ -0,0 +1,91 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+import requests
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = ("Measures the measurement ingest throughput of the serve command with an increasing number of workers. "
+            "Writes the measurements to the configured InfluxDB for the given sensor.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sensor-id', required=True)
+        parser.add_argument('--api-key', required=True, help="API key of the FPF of the sensor.")
+        parser.add_argument('--workers', default='1,2,4', help="Comma separated worker counts to compare.")
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=32)
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--startup-timeout', type=float, default=60.0)
+
+    def handle(self, *args, **options):
+        url = f"http://127.0.0.1:{options['port']}/api/measurements/{options['sensor_id']}"
+        headers = {'Authorization': f"ApiKey {options['api_key']}"}
+        worker_counts = [int(workers) for workers in options['workers'].split(',')]
+
+        for workers in worker_counts:
+            server = subprocess.Popen(
+                [sys.executable, os.path.abspath(sys.argv[0]), 'serve', '--role', 'ingest',
+                 '--workers', str(workers), '--host', '127.0.0.1', '--port', str(options['port'])],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+            try:
+                self._wait_until_ready(url, headers, options['startup_timeout'], server)
+                # Every worker process handles a few requests first, so its imports and connections are set up
+                self._run(url, headers, workers * 20, options['concurrency'])
+                elapsed, latencies, errors = self._run(url, headers, options['requests'], options['concurrency'])
+            finally:
+                server.send_signal(signal.SIGTERM)
+                server.wait()
+
+            latencies.sort()
+            self.stdout.write(
+                f"{workers:>3} workers: {len(latencies) / elapsed:8.1f} req/s, "
+                f"p50 {latencies[len(latencies) // 2] * 1000:6.1f}ms, "
+                f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:6.1f}ms, {errors} errors"
+            )
+
+    def _wait_until_ready(self, url: str, headers: dict, timeout: float, server: subprocess.Popen):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"The server exited with code {server.returncode}.")
+            try:
+                response = requests.post(url, json=self._measurements(0), headers=headers, timeout=5)
+                if response.status_code == 201:
+                    return
+                raise CommandError(f"Measurement was not accepted: {response.status_code} {response.text[:200]}")
+            except (requests.ConnectionError, requests.Timeout):
+                time.sleep(0.5)
+        raise CommandError("The server did not start in time.")
+
+    def _run(self, url: str, headers: dict, count: int, concurrency: int) -> tuple[float, list, int]:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=concurrency)
+        session.mount('http://', adapter)
+
+        def post(i):
+            started = time.perf_counter()
+            try:
+                response = session.post(url, json=self._measurements(i), headers=headers, timeout=30)
+                ok = response.status_code == 201
+            except requests.RequestException:
+                ok = False
+            return time.perf_counter() - started, ok
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            results = list(executor.map(post, range(count)))
+        elapsed = time.perf_counter() - started
+        session.close()
+        return elapsed, [latency for latency, _ in results], sum(1 for _, ok in results if not ok)
+
+    @staticmethod
+    def _measurements(i: int) -> list:
+        measured_at = datetime.now(timezone.utc) - timedelta(milliseconds=i)
+        return [{'measuredAt': measured_at.isoformat(), 'value': float(i % 100)}]
@@ -0,0 +1,84 @@
+import time
+import uuid
+
+import paho.mqtt.client as mqtt
+from django.core.management.base import BaseCommand
+
+from farminsight_dashboard_backend.action_scripts.mqtt_connection_pool import MqttConnection
+from farminsight_dashboard_backend.utils import MqttBrokerStub
+
+
+class Command(BaseCommand):
+    help = ("Compares sending MQTT commands over a new connection per command, as the MQTT action scripts did before, "
+            "with the pooled persistent connection. Without --broker a local MqttBrokerStub is started.")
+
+    def add_arguments(self, parser):
+        parser.add_argument('--broker', help="Host of the MQTT broker, e.g. a local mosquitto.")
+        parser.add_argument('--port', type=int, default=1883)
+        parser.add_argument('--username')
+        parser.add_argument('--password')
+        parser.add_argument('--commands', type=int, default=200)
+        parser.add_argument('--latency', type=float, default=0.0,
+                            help="Artificial latency per answer of the started stub in seconds.")
+
+    def handle(self, *args, **options):
+        stub = None
+        broker, port = options['broker'], options['port']
+        if broker is None:
+            stub = MqttBrokerStub(latency=options['latency']).start()
+            broker, port = stub.address
+        topic = f"farminsight-benchmark/{uuid.uuid4().hex[:8]}/relay/0"
+
+        try:
+            self._report("connect per command", self._run_connect_per_command(
+                broker, port, options['username'], options['password'], topic, options['commands']))
+
+            connection = MqttConnection(broker, port, options['username'], options['password'])
+            connection.connect()
+            try:
+                self._report("pooled, QoS 1", self._run(
+                    lambda payload: connection.publish(f"{topic}/command", payload), options['commands']))
+                if stub is not None:
+                    # Only the stub answers on the state topic like a Shelly plug
+                    self._report("pooled, confirmed", self._run(
+                        lambda payload: connection.publish(f"{topic}/command", payload, state_topic=topic),
+                        options['commands']))
+            finally:
+                connection.close()
+        finally:
+            if stub is not None:
+                self.stdout.write(f"Broker saw {stub.connections} connections for {stub.messages} messages.")
+                stub.stop()
+
+    def _run_connect_per_command(self, broker, port, username, password, topic, count) -> tuple[float, list]:
+        def send(payload):
+            client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
+            if username and password:
+                client.username_pw_set(username, password)
+            client.connect(broker, port, 60)
+            client.loop_start()
+            result = client.publish(f"{topic}/command", payload, qos=1)
+            result.wait_for_publish(10)
+            client.loop_stop()
+            client.disconnect()
+
+        return self._run(send, count)
+
+    @staticmethod
+    def _run(send, count: int) -> tuple[float, list]:
+        latencies = []
+        started = time.perf_counter()
+        for i in range(count):
+            command_started = time.perf_counter()
+            send('on' if i % 2 == 0 else 'off')
+            latencies.append(time.perf_counter() - command_started)
+        return time.perf_counter() - started, latencies
+
+    def _report(self, name: str, result: tuple[float, list]):
+        elapsed, latencies = result
+        latencies.sort()
+        self.stdout.write(
+            f"{name:>20}: {len(latencies) / elapsed:8.1f} cmd/s, "
+            f"p50 {latencies[len(latencies) // 2] * 1000:6.1f}ms, "
+            f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:6.1f}ms"
+        )
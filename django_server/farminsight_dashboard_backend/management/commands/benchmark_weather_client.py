@@ -0,0 +1,53 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.core.management.base import BaseCommand
+
+from farminsight_dashboard_backend.services.weather_client_services import WeatherClient
+from farminsight_dashboard_backend.utils import OpenMeteoStubServer
+
+
+class Command(BaseCommand):
+    help = "Compares uncached open-meteo requests with the shared WeatherClient, using the local open-meteo stub."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Number of dashboard requests.")
+        parser.add_argument('--locations', type=int, default=5)
+        parser.add_argument('--concurrency', type=int, default=20)
+        parser.add_argument('--latency', type=float, default=0.2, help="Latency of the stub in seconds.")
+
+    def handle(self, *args, **options):
+        server = OpenMeteoStubServer(latency=options['latency']).start()
+        coordinates = [(51.8 + i * 0.1, 10.3 + i * 0.1) for i in range(options['locations'])]
+        work = [coordinates[i % len(coordinates)] for i in range(options['requests'])]
+
+        def uncached(coordinate):
+            response = requests.get(server.url, params={
+                'latitude': coordinate[0], 'longitude': coordinate[1],
+                'hourly': 'temperature_2m', 'daily': 'weather_code,precipitation_probability_max',
+                'timezone': 'Europe/Berlin',
+            }, timeout=10)
+            return response.json()
+
+        client = WeatherClient.get_instance()
+        client.url = server.url
+        client.invalidate()
+
+        def cached(coordinate):
+            return client.get_forecast(*coordinate)
+
+        try:
+            for name, fn in [('uncached', uncached), ('WeatherClient', cached)]:
+                requests_before = server.requests
+                started = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+                    list(executor.map(fn, work))
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f"{name:>14}: {elapsed:.3f}s for {len(work)} requests, "
+                    f"{server.requests - requests_before} upstream requests"
+                )
+            self.stdout.write(f"WeatherClient stats: {client.get_stats()}")
+        finally:
+            server.stop()
@@ -0,0 +1,65 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from farminsight_dashboard_backend.models import Image
+from farminsight_dashboard_backend.services.image_services import store_image_content, compute_perceptual_hash
+
+
+class Command(BaseCommand):
+    help = (
+        "Moves the images stored before content addressing into the storage sharded by camera and day, named by "
+        "their content hash. Images with the same content of a camera end up sharing one file, the old files are "
+        "deleted once no image refers to them anymore."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--perceptual', action='store_true', help="Also compute the perceptual hashes.")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the images to migrate.")
+
+    def handle(self, *args, **options):
+        pending = Image.objects.filter(contentHash__isnull=True).order_by('measuredAt')
+        if options['dry_run']:
+            self.stdout.write(f"{pending.count()} images to migrate.")
+            return
+
+        migrated = 0
+        deduplicated = 0
+        freed_bytes = 0
+        skipped = set()
+        while True:
+            batch = list(pending.exclude(id__in=skipped).only('id', 'camera_id', 'measuredAt', 'image')[:options['batch_size']])
+            if not batch:
+                break
+
+            for image in batch:
+                old_name = image.image.name
+                try:
+                    with default_storage.open(old_name, 'rb') as f:
+                        content = f.read()
+                except OSError:
+                    skipped.add(image.id)
+                    self.stderr.write(f"Missing file {old_name} of image {image.id}, skipped.")
+                    continue
+
+                store_image_content(image, content)
+                update_fields = ['image', 'contentHash']
+                if options['perceptual']:
+                    image.perceptualHash = compute_perceptual_hash(content)
+                    update_fields.append('perceptualHash')
+                image.save(update_fields=update_fields)
+                migrated += 1
+
+                if Image.objects.filter(image=image.image.name).exclude(id=image.id).exists():
+                    # Shares the file of an image with the same content
+                    deduplicated += 1
+                    freed_bytes += len(content)
+                if image.image.name != old_name and not Image.objects.filter(image=old_name).exists():
+                    default_storage.delete(old_name)
+
+            self.stdout.write(f"{migrated} images migrated...")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Migrated {migrated} images, {deduplicated} of them share the file of an identical image "
+            f"({freed_bytes / 1024 / 1024:.1f} MB freed), {len(skipped)} files missing."
+        ))
@@ -0,0 +1,67 @@
+import json
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from farminsight_dashboard_backend.models import Organization
+from farminsight_dashboard_backend.services import InfluxDBManager
+from farminsight_dashboard_backend.services.influx_services import _weather_forecast_point
+
+LEGACY_MEASUREMENT = "WeatherForecast"
+
+
+class Command(BaseCommand):
+    help = (
+        "Converts the weather forecasts stored as JSON strings (measurement WeatherForecast) into typed points "
+        "of the DailyWeatherForecast measurement, keeping their fetch time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=365, help="How many days back to migrate.")
+        parser.add_argument('--window-days', type=int, default=30, help="Days converted per query.")
+        parser.add_argument('--delete', action='store_true', help="Delete the JSON forecasts after migrating.")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the forecasts to migrate.")
+
+    def handle(self, *args, **options):
+        connection = InfluxDBManager.get_instance().connection
+        stop = timezone.now()
+        start = stop - timedelta(days=options['days'])
+        window = timedelta(days=options['window_days'])
+
+        for organization in Organization.objects.all():
+            bucket = str(organization.id)
+            migrated = 0
+            failed = 0
+            window_start = start
+            while window_start < stop:
+                window_stop = min(window_start + window, stop)
+                result = connection.query(
+                    f'from(bucket: "{bucket}") '
+                    f'|> range(start: {window_start.isoformat()}, stop: {window_stop.isoformat()}) '
+                    f'|> filter(fn: (r) => r["_measurement"] == "{LEGACY_MEASUREMENT}" and r["_field"] == "forecast") '
+                )
+
+                points = []
+                for table in result:
+                    for record in table.records:
+                        try:
+                            data = json.loads(record.get_value())
+                            points.append(_weather_forecast_point(
+                                record.values['locationId'], data['ForecastDate'], data, record.get_time()
+                            ))
+                        except Exception as e:
+                            failed += 1
+                            self.stderr.write(f"Skipping forecast of {record.values.get('locationId')} at {record.get_time()}: {e}")
+
+                if points and not options['dry_run']:
+                    connection.write(bucket, points)
+                migrated += len(points)
+                window_start = window_stop
+
+            if options['delete'] and not options['dry_run'] and migrated and not failed:
+                connection.client.delete_api().delete(
+                    start, stop, f'_measurement="{LEGACY_MEASUREMENT}"', bucket=bucket, org=connection.influxdb_settings['org']
+                )
+
+            self.stdout.write(f"{organization.name}: {migrated} forecasts migrated, {failed} skipped.")
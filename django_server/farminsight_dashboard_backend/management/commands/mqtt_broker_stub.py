@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from farminsight_dashboard_backend.utils import MqttBrokerStub
+
+
+class Command(BaseCommand):
+    help = "Runs a minimal local MQTT broker that confirms commands like a Shelly plug, as a stand-in for mosquitto."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=1883)
+        parser.add_argument('--latency', type=float, default=0.0, help="Artificial latency per answer in seconds.")
+
+    def handle(self, *args, **options):
+        broker = MqttBrokerStub(options['host'], options['port'], options['latency'])
+        host, port = broker.address
+        self.stdout.write(f"MQTT broker stub listening on {host}:{port}")
+        try:
+            broker.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            broker.stop()
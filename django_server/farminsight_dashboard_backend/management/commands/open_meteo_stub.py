@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from farminsight_dashboard_backend.utils import OpenMeteoStubServer
+
+
+class Command(BaseCommand):
+    help = "Runs a local stub of the open-meteo forecast API, point OPEN_METEO_URL to it."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8099)
+        parser.add_argument('--latency', type=float, default=0.0, help="Artificial latency per request in seconds.")
+
+    def handle(self, *args, **options):
+        server = OpenMeteoStubServer(options['host'], options['port'], options['latency'])
+        self.stdout.write(f"open-meteo stub listening on {server.url}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
@@ -0,0 +1,110 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from farminsight_dashboard_backend.utils import get_logger, parse_process_roles, ROLE_WEB, ROLE_INGEST, ROLE_REALTIME
+
+
+class Command(BaseCommand):
+    help = ("Runs the server with the given process roles on the daphne ASGI server. "
+            "All server processes accept connections on one shared socket and are restarted when they exit.")
+
+    RESTART_DELAY_SECONDS = 1
+    SHUTDOWN_TIMEOUT_SECONDS = 10
+
+    def add_arguments(self, parser):
+        parser.add_argument('--role', default=','.join(settings.PROCESS_ROLES),
+                            help="Comma separated roles: web, ingest, realtime, worker or all. Default: PROCESS_ROLES.")
+        parser.add_argument('--workers', type=int, default=settings.SERVER_WORKERS,
+                            help="Number of server processes. Default: SERVER_WORKERS.")
+        parser.add_argument('--host', default='0.0.0.0')
+        parser.add_argument('--port', type=int, default=8000)
+
+    def handle(self, *args, **options):
+        self.log = get_logger()
+        try:
+            roles = parse_process_roles(options['role'])
+        except ValueError as e:
+            raise CommandError(e)
+        if options['workers'] < 1:
+            raise CommandError("--workers must be at least 1.")
+
+        self._stop = threading.Event()
+        if os.environ.get('SERVER_PROCESS') == 'true':
+            # Started by the serve command without a protocol to serve, the app runs the background jobs on ready
+            self._wait_for_signal()
+            return
+
+        if not getattr(settings, 'CHANNEL_REDIS_URL', None) and ROLE_REALTIME in roles and \
+                (options['workers'] > 1 or ROLE_INGEST not in roles):
+            self.log.warning("Measurements only reach WebSocket consumers of the same process, set CHANNEL_REDIS_URL.")
+
+        role = ','.join(sorted(roles))
+        env = {**os.environ, 'PROCESS_ROLES': role, 'SERVER_PROCESS': 'true'}
+        listener = None
+        if roles & {ROLE_WEB, ROLE_INGEST, ROLE_REALTIME}:
+            listener = self._listen(options['host'], options['port'])
+            command = [sys.executable, '-m', 'daphne', '--fd', str(listener.fileno()), 'django_server.asgi:application']
+            self.stdout.write(f"Serving {role} on http://{options['host']}:{options['port']} with {options['workers']} workers.")
+        else:
+            # Additional worker processes are standbys, the leader election picks the one running the background jobs
+            command = [sys.executable, os.path.abspath(sys.argv[0]), 'serve', '--role', role]
+            self.stdout.write(f"Running {role} with {options['workers']} processes.")
+
+        pass_fds = (listener.fileno(),) if listener else ()
+        processes = [self._spawn(command, env, pass_fds) for _ in range(options['workers'])]
+
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        signal.signal(signal.SIGINT, self._handle_signal)
+        try:
+            while not self._stop.wait(self.RESTART_DELAY_SECONDS):
+                for i, process in enumerate(processes):
+                    if process.poll() is not None:
+                        self.log.warning(f"Server process {process.pid} exited with code {process.returncode}, restarting it.")
+                        processes[i] = self._spawn(command, env, pass_fds)
+        finally:
+            self._terminate(processes)
+            if listener:
+                listener.close()
+
+    def _listen(self, host: str, port: int) -> socket.socket:
+        listener = socket.socket(socket.AF_INET6 if ':' in host else socket.AF_INET, socket.SOCK_STREAM)
+        listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            listener.bind((host, port))
+        except OSError as e:
+            listener.close()
+            raise CommandError(f"Could not listen on {host}:{port}: {e}")
+        listener.listen(socket.SOMAXCONN)
+        listener.set_inheritable(True)
+        return listener
+
+    def _spawn(self, command: list, env: dict, pass_fds: tuple) -> subprocess.Popen:
+        return subprocess.Popen(command, env=env, pass_fds=pass_fds, cwd=settings.BASE_DIR)
+
+    def _terminate(self, processes: list):
+        for process in processes:
+            if process.poll() is None:
+                process.terminate()
+        deadline = time.monotonic() + self.SHUTDOWN_TIMEOUT_SECONDS
+        for process in processes:
+            try:
+                process.wait(timeout=max(deadline - time.monotonic(), 0))
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    def _wait_for_signal(self):
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        signal.signal(signal.SIGINT, self._handle_signal)
+        while not self._stop.wait(self.RESTART_DELAY_SECONDS):
+            pass
+
+    def _handle_signal(self, signum, frame):
+        self._stop.set()
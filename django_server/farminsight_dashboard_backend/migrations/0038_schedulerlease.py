@@ -0,0 +1,22 @@
+# Generated by Django 5.1.15 on 2026-10-19 00:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farminsight_dashboard_backend', '0037_energyconsumer_forecastbufferdays_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchedulerLease',
+            fields=[
+                ('name', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('holder', models.CharField(max_length=256)),
+                ('acquiredAt', models.DateTimeField()),
+                ('expiresAt', models.DateTimeField()),
+            ],
+        ),
+    ]
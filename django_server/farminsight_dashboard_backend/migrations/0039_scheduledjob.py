@@ -0,0 +1,27 @@
+# Generated by Django 5.1.15 on 2026-10-19 00:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farminsight_dashboard_backend', '0038_schedulerlease'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduledJob',
+            fields=[
+                ('id', models.CharField(max_length=191, primary_key=True, serialize=False)),
+                ('owner', models.CharField(max_length=64)),
+                ('func', models.CharField(max_length=256)),
+                ('args', models.JSONField(blank=True, default=list)),
+                ('executor', models.CharField(max_length=32)),
+                ('runAt', models.DateTimeField()),
+                ('intervalSeconds', models.PositiveIntegerField(blank=True, null=True)),
+                ('lastRunAt', models.DateTimeField(blank=True, null=True)),
+                ('createdAt', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
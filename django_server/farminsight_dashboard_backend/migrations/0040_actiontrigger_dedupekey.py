@@ -0,0 +1,45 @@
+# Generated by Django 5.1.15 on 2026-10-19 00:19
+
+import hashlib
+import json
+from datetime import datetime, timezone
+
+from django.db import migrations, models
+
+
+def set_forecast_dedupe_keys(apps, schema_editor):
+    """
+    Set the dedupe key of the pending forecast triggers, same as forecast_dedupe_key.
+    Their jobs in the ScheduledJob table are replaced by the forecast timeline, which loads the active forecast triggers.
+    """
+    ActionTrigger = apps.get_model('farminsight_dashboard_backend', 'ActionTrigger')
+    ScheduledJob = apps.get_model('farminsight_dashboard_backend', 'ScheduledJob')
+
+    for trigger in ActionTrigger.objects.filter(type='forecast', isActive=True):
+        try:
+            run_at = datetime.fromisoformat(json.loads(trigger.triggerLogic)['timestamp'].replace('Z', '+00:00'))
+        except (TypeError, ValueError, KeyError):
+            continue
+        if run_at.tzinfo is None:
+            run_at = run_at.replace(tzinfo=timezone.utc)
+        key = f"{trigger.action_id}|{run_at.astimezone(timezone.utc).isoformat()}|{trigger.actionValue}"
+        trigger.dedupeKey = hashlib.sha1(key.encode()).hexdigest()
+        trigger.save(update_fields=['dedupeKey'])
+
+    ScheduledJob.objects.filter(owner__in=['ForecastActionScheduler', 'ModelActionInjection']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farminsight_dashboard_backend', '0039_scheduledjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='actiontrigger',
+            name='dedupeKey',
+            field=models.CharField(blank=True, db_index=True, max_length=40, null=True),
+        ),
+        migrations.RunPython(set_forecast_dedupe_keys, migrations.RunPython.noop),
+    ]
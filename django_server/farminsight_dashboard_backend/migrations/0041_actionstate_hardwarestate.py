@@ -0,0 +1,67 @@
+# Generated by Django 5.1.15 on 2026-10-19 00:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Max
+
+
+def build_action_states(apps, schema_editor):
+    """
+    Compute the states of the actions and hardware once from the existing queue history.
+    """
+    ActionQueue = apps.get_model('farminsight_dashboard_backend', 'ActionQueue')
+    ActionState = apps.get_model('farminsight_dashboard_backend', 'ActionState')
+    HardwareState = apps.get_model('farminsight_dashboard_backend', 'HardwareState')
+    ControllableAction = apps.get_model('farminsight_dashboard_backend', 'ControllableAction')
+    Hardware = apps.get_model('farminsight_dashboard_backend', 'Hardware')
+
+    executed = ActionQueue.objects.filter(startedAt__isnull=False, endedAt__isnull=False)
+    for action in ControllableAction.objects.all():
+        active_entry = executed.filter(action=action).order_by('createdAt').last()
+        latest_entry = ActionQueue.objects.filter(action=action, endedAt__isnull=False).order_by('endedAt', 'createdAt').last()
+        if latest_entry is not None:
+            ActionState.objects.create(
+                action=action, activeEntry=active_entry, latestEntry=latest_entry, latestEndedAt=latest_entry.endedAt
+            )
+
+    for hardware in Hardware.objects.all():
+        hardware_entries = executed.filter(action__hardware=hardware)
+        active_entry = hardware_entries.order_by('createdAt').last()
+        if active_entry is not None:
+            HardwareState.objects.create(
+                hardware=hardware,
+                activeEntry=active_entry,
+                lastManualEntry=hardware_entries.filter(trigger__type='manual').order_by('createdAt').last(),
+                busyUntil=hardware_entries.aggregate(Max('endedAt'))['endedAt__max'],
+            )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farminsight_dashboard_backend', '0040_actiontrigger_dedupekey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ActionState',
+            fields=[
+                ('action', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='state', serialize=False, to='farminsight_dashboard_backend.controllableaction')),
+                ('latestEndedAt', models.DateTimeField(blank=True, null=True)),
+                ('updatedAt', models.DateTimeField(auto_now=True)),
+                ('activeEntry', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='farminsight_dashboard_backend.actionqueue')),
+                ('latestEntry', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='farminsight_dashboard_backend.actionqueue')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='HardwareState',
+            fields=[
+                ('hardware', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='state', serialize=False, to='farminsight_dashboard_backend.hardware')),
+                ('busyUntil', models.DateTimeField(blank=True, null=True)),
+                ('updatedAt', models.DateTimeField(auto_now=True)),
+                ('activeEntry', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='farminsight_dashboard_backend.actionqueue')),
+                ('lastManualEntry', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='farminsight_dashboard_backend.actionqueue')),
+            ],
+        ),
+        migrations.RunPython(build_action_states, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-19 00:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farminsight_dashboard_backend', '0041_actionstate_hardwarestate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='actionqueue',
+            name='error',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='actionqueue',
+            name='failedAt',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.15 on 2026-10-19 00:53
+
+import farminsight_dashboard_backend.models.image
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farminsight_dashboard_backend', '0042_actionqueue_error_actionqueue_failedat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='image',
+            name='contentHash',
+            field=models.CharField(blank=True, db_index=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='image',
+            name='perceptualHash',
+            field=models.CharField(blank=True, max_length=16, null=True),
+        ),
+        migrations.AlterField(
+            model_name='image',
+            name='image',
+            field=models.ImageField(upload_to=farminsight_dashboard_backend.models.image.image_upload_path),
+        ),
+    ]
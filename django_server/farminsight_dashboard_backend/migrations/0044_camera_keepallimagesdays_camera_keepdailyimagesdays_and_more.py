@@ -0,0 +1,32 @@
+# Generated by Django 5.1.15 on 2026-10-19 00:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farminsight_dashboard_backend', '0043_image_contenthash_image_perceptualhash_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='camera',
+            name='keepAllImagesDays',
+            field=models.IntegerField(default=14),
+        ),
+        migrations.AddField(
+            model_name='camera',
+            name='keepDailyImagesDays',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='camera',
+            name='keepHourlyImagesDays',
+            field=models.IntegerField(default=180),
+        ),
+        migrations.AddIndex(
+            model_name='image',
+            index=models.Index(fields=['camera', 'measuredAt'], name='farminsight_camera__48b77c_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-19 01:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farminsight_dashboard_backend', '0044_camera_keepallimagesdays_camera_keepdailyimagesdays_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedulerlease',
+            name='stats',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='schedulerlease',
+            name='statsUpdatedAt',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
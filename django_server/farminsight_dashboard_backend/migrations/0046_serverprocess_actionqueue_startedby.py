@@ -0,0 +1,26 @@
+# Generated by Django 5.1.15 on 2026-10-19 02:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farminsight_dashboard_backend', '0045_schedulerlease_stats_schedulerlease_statsupdatedat'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ServerProcess',
+            fields=[
+                ('identity', models.CharField(max_length=256, primary_key=True, serialize=False)),
+                ('startedAt', models.DateTimeField()),
+                ('lastSeenAt', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='actionqueue',
+            name='startedBy',
+            field=models.CharField(blank=True, max_length=256, null=True),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.1.15 on 2026-10-19 02:40
+
+from django.db import migrations, models
+
+
+def clear_default_retention_policies(apps, schema_editor):
+    """
+    Cameras that still have the former default policy never opted in to thinning out their images, keep all of them.
+    """
+    Camera = apps.get_model('farminsight_dashboard_backend', 'Camera')
+    Camera.objects.filter(keepAllImagesDays=14, keepHourlyImagesDays=180, keepDailyImagesDays__isnull=True).update(
+        keepAllImagesDays=None, keepHourlyImagesDays=None
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farminsight_dashboard_backend', '0046_serverprocess_actionqueue_startedby'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='camera',
+            name='keepAllImagesDays',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='camera',
+            name='keepHourlyImagesDays',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.RunPython(clear_default_retention_policies, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.15 on 2026-10-19 03:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('farminsight_dashboard_backend', '0047_camera_image_retention_opt_in'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SchedulerVersion',
+            fields=[
+                ('name', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+    ]
@@ -20,3 +20,8 @@ from .action_mapping import ActionMapping
 from .notification import Notification
 from .energy_consumer import EnergyConsumer
 from .energy_source import EnergySource
+from .scheduler_lease import SchedulerLease
+from .scheduled_job import ScheduledJob
+from .action_state import ActionState, HardwareState
+from .server_process import ServerProcess
+from .scheduler_version import SchedulerVersion
@@ -8,8 +8,12 @@ class ActionQueue(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     createdAt = models.DateTimeField(auto_now_add=True, null=True)
     startedAt = models.DateTimeField(null=True)
+    # Identity of the process executing the entry, see ProcessHeartbeat
+    startedBy = models.CharField(max_length=256, null=True, blank=True)
     endedAt = models.DateTimeField(null=True)
     value = models.TextField(null=True)
+    failedAt = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(null=True, blank=True)
     action = models.ForeignKey(ControllableAction, related_name='queueEntries', on_delete=models.CASCADE)
     trigger = models.ForeignKey(ActionTrigger, on_delete=models.CASCADE)
 
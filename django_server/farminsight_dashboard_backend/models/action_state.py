@@ -0,0 +1,35 @@
+from django.db import models
+
+from .action_queue import ActionQueue
+from .controllable_action import ControllableAction
+from .hardware import Hardware
+
+
+class ActionState(models.Model):
+    """
+    What a controllable action is doing now, updated by the action queue whenever one of its queue entries ends.
+    activeEntry is the last executed entry, latestEntry the entry that ended last, executed or cancelled.
+    """
+    action = models.OneToOneField(ControllableAction, primary_key=True, related_name='state', on_delete=models.CASCADE)
+    activeEntry = models.ForeignKey(ActionQueue, related_name='+', on_delete=models.SET_NULL, null=True, blank=True)
+    latestEntry = models.ForeignKey(ActionQueue, related_name='+', on_delete=models.SET_NULL, null=True, blank=True)
+    latestEndedAt = models.DateTimeField(null=True, blank=True)
+    updatedAt = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.action_id}: active {self.activeEntry_id}"
+
+
+class HardwareState(models.Model):
+    """
+    What a hardware is doing now, updated by the action queue whenever an action of the hardware was executed.
+    busyUntil is the latest end of the executed actions, lastManualEntry the last executed manual action.
+    """
+    hardware = models.OneToOneField(Hardware, primary_key=True, related_name='state', on_delete=models.CASCADE)
+    activeEntry = models.ForeignKey(ActionQueue, related_name='+', on_delete=models.SET_NULL, null=True, blank=True)
+    lastManualEntry = models.ForeignKey(ActionQueue, related_name='+', on_delete=models.SET_NULL, null=True, blank=True)
+    busyUntil = models.DateTimeField(null=True, blank=True)
+    updatedAt = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.hardware_id}: active {self.activeEntry_id} busy until {self.busyUntil}"
@@ -14,6 +14,8 @@ class ActionTrigger(models.Model):
     description = models.TextField(null=True)
     isActive = models.BooleanField(default=False)
     action = models.ForeignKey(ControllableAction, related_name='triggers', on_delete=models.CASCADE)
+    # Identifies forecast triggers by action, time and value, see forecast_dedupe_key
+    dedupeKey = models.CharField(max_length=40, null=True, blank=True, db_index=True)
 
     def __str__(self):
         return f"{self.action.name}: {self.type} {self.actionValue} active: {self.isActive} description: {self.description}"
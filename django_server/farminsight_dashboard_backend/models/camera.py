@@ -24,6 +24,12 @@ class Camera(models.Model):
     livestreamUrl = models.CharField(max_length=256)
     FPF = models.ForeignKey(FPF, related_name='cameras', on_delete=models.CASCADE)
     orderIndex = models.IntegerField(default=get_order_index_default)
+    # Image retention, opt-in: without keepAllImagesDays all images are kept. Otherwise all images for
+    # keepAllImagesDays, then the first image per hour up to keepHourlyImagesDays, then the first image per day,
+    # deleted after keepDailyImagesDays. A tier that is not set lasts forever.
+    keepAllImagesDays = models.IntegerField(null=True, blank=True)
+    keepHourlyImagesDays = models.IntegerField(null=True, blank=True)
+    keepDailyImagesDays = models.IntegerField(null=True, blank=True)
 
     class Meta:
         ordering = ['orderIndex']
@@ -4,11 +4,30 @@ from django.utils import timezone
 from .camera import Camera
 
 
+def image_upload_path(instance, filename) -> str:
+    """
+    Images are sharded by camera and day and named by the SHA-256 of their content, if known.
+    """
+    measured_at = timezone.localtime(instance.measuredAt)
+    name = f"{instance.contentHash}.jpg" if instance.contentHash else filename
+    return f"images/{instance.camera_id}/{measured_at:%Y/%m/%d}/{name}"
+
+
 class Image(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     measuredAt = models.DateTimeField(default=timezone.now)
-    image = models.ImageField(upload_to='images/')
+    image = models.ImageField(upload_to=image_upload_path)
     camera = models.ForeignKey(Camera, related_name='images', on_delete=models.CASCADE)
+    # SHA-256 of the file, images with the same content share one file
+    contentHash = models.CharField(max_length=64, null=True, blank=True, db_index=True)
+    # 64 bit difference hash, used to detect near duplicates of the previous image
+    perceptualHash = models.CharField(max_length=16, null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Date range queries and the retention of the images of a camera
+            models.Index(fields=['camera', 'measuredAt']),
+        ]
 
     def __str__(self):
         return f"{self.camera.name} {self.measuredAt} {self.camera}"
@@ -0,0 +1,20 @@
+from django.db import models
+
+
+class ScheduledJob(models.Model):
+    """
+    Durable copy of a scheduler job, restored into the SchedulerRuntime when the background jobs start.
+    One-off jobs have no intervalSeconds and are deleted after they ran.
+    """
+    id = models.CharField(max_length=191, primary_key=True)
+    owner = models.CharField(max_length=64)
+    func = models.CharField(max_length=256)
+    args = models.JSONField(default=list, blank=True)
+    executor = models.CharField(max_length=32)
+    runAt = models.DateTimeField()
+    intervalSeconds = models.PositiveIntegerField(null=True, blank=True)
+    lastRunAt = models.DateTimeField(null=True, blank=True)
+    createdAt = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.id} ({self.owner}) next run: {self.runAt}"
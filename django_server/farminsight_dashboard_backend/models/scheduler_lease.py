@@ -0,0 +1,14 @@
+from django.db import models
+
+
+class SchedulerLease(models.Model):
+    """
+    Lease on the background jobs, held by the one server process that runs the schedulers.
+    The holder also publishes the stats of its schedulers here, for the admin views served by the other processes.
+    """
+    name = models.CharField(max_length=64, primary_key=True)
+    holder = models.CharField(max_length=256)
+    acquiredAt = models.DateTimeField()
+    expiresAt = models.DateTimeField()
+    stats = models.JSONField(default=dict, blank=True)
+    statsUpdatedAt = models.DateTimeField(null=True, blank=True)
@@ -0,0 +1,13 @@
+from django.db import models
+
+
+class SchedulerVersion(models.Model):
+    """
+    Counts the changes of a kind of scheduler jobs made by processes that do not run the schedulers.
+    The leader polls the versions, so it applies these changes within seconds instead of with its next full sync.
+    """
+    name = models.CharField(max_length=64, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.version}"
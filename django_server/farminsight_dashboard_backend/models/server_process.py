@@ -0,0 +1,14 @@
+from django.db import models
+
+
+class ServerProcess(models.Model):
+    """
+    A running server process, kept alive by the ProcessHeartbeat of the process.
+    Work a process started, e.g. queue entries, is recovered once the heartbeat of the process stopped.
+    """
+    identity = models.CharField(max_length=256, primary_key=True)
+    startedAt = models.DateTimeField()
+    lastSeenAt = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.identity} last seen: {self.lastSeenAt}"
@@ -28,4 +28,4 @@ class ActionQueueSerializerDescriptive(serializers.ModelSerializer):
 
     class Meta:
         model = ActionQueue
-        fields = ['id', 'createdAt', 'startedAt', 'endedAt', 'value', 'controllableAction', 'actionTrigger']
+        fields = ['id', 'createdAt', 'startedAt', 'endedAt', 'failedAt', 'error', 'value', 'controllableAction', 'actionTrigger']
@@ -21,6 +21,9 @@ class CameraSerializer(serializers.ModelSerializer):
             'snapshotUrl',
             'orderIndex',
             'lastImageAt',
+            'keepAllImagesDays',
+            'keepHourlyImagesDays',
+            'keepDailyImagesDays',
         ]
 
     def get_lastImageAt(self, obj: Camera):
@@ -35,6 +38,22 @@ class CameraSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("Interval must be a positive number.")
         return value
 
+    def validate(self, data):
+        keep_all = data.get('keepAllImagesDays', getattr(self.instance, 'keepAllImagesDays', None))
+        keep_hourly = data.get('keepHourlyImagesDays', getattr(self.instance, 'keepHourlyImagesDays', None))
+        keep_daily = data.get('keepDailyImagesDays', getattr(self.instance, 'keepDailyImagesDays', None))
+        if keep_all is None:
+            if keep_hourly is not None or keep_daily is not None:
+                raise serializers.ValidationError({'keepAllImagesDays': "Must be set to thin out the images."})
+            return data
+        if keep_all < 0:
+            raise serializers.ValidationError({'keepAllImagesDays': "Must not be negative."})
+        if keep_hourly is not None and keep_hourly < keep_all:
+            raise serializers.ValidationError({'keepHourlyImagesDays': "Must not be shorter than keepAllImagesDays."})
+        if keep_daily is not None and keep_daily < (keep_hourly if keep_hourly is not None else keep_all):
+            raise serializers.ValidationError({'keepDailyImagesDays': "Must not be shorter than keepHourlyImagesDays."})
+        return data
+
 class CameraImageSerializer(serializers.ModelSerializer):
     images = ImageURLSerializer(many=True)
 
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from farminsight_dashboard_backend.models import ControllableAction, Sensor, Hardware, ActionQueue
+from farminsight_dashboard_backend.models import ControllableAction, Sensor, Hardware, ActionState
 from farminsight_dashboard_backend.serializers.hardware_serializer import HardwareSerializer
 from farminsight_dashboard_backend.serializers.action_trigger_serializer import ActionTriggerSerializer
 
@@ -43,9 +43,8 @@ class ControllableActionSerializer(serializers.ModelSerializer):
                   ] #'sensorId',
 
     def get_status(self, obj):
-        latest_entry = ActionQueue.objects.filter(
-            action__id=obj.id
-        ).order_by('-endedAt', '-createdAt').first()
+        action_state = ActionState.objects.select_related('latestEntry__trigger').filter(pk=obj.id).first()
+        latest_entry = action_state.latestEntry if action_state else None
 
         if latest_entry:
             trigger = latest_entry.trigger
@@ -10,12 +10,19 @@ from .membership_services import create_membership, get_memberships, update_memb
 from .userprofile_services import search_userprofiles, update_userprofile_name, set_password_to_random_password, all_userprofiles, set_active_status
 from .data_services import get_all_fpf_data, get_all_sensor_data
 from .influx_services import InfluxDBManager
+from .influx_async_services import AsyncInfluxDBManager
+from .scheduler_runtime_services import SchedulerRuntime
+from .process_heartbeat_services import ProcessHeartbeat
+from .leader_election_services import LeaderElection
+from .scheduled_job_services import ScheduledJobStore
 from .sensor_services import get_sensor, update_sensor, create_sensor, sensor_exists, set_sensor_order
 from .growing_cycle_services import update_growing_cycle, create_growing_cycle, remove_growing_cycle, get_growing_cycles_by_fpf_id, set_growing_cycle_order
 from .fpf_connection_services import get_sensor_hardware_configuration, post_fpf_id, post_fpf_api_key, get_sensor_types, put_update_sensor, post_sensor
 from .auth_services import get_auth_token, valid_api_key_for_sensor, create_single_use_token, valid_api_key_for_fpf
 from .camera_services import get_active_camera_by_id, create_camera, update_camera, delete_camera, get_camera_by_id, get_active_camera_count, fetch_camera_snapshot, set_camera_order
-from .image_services import get_images_by_camera
+from .image_services import get_images_by_camera, save_camera_image
+from .snapshot_orchestrator_services import SnapshotOrchestrator
+from .hls_streaming_services import HlsStreamingManager
 from .camera_scheduler_services import CameraScheduler
 from .harvest_services import create_harvest, remove_harvest, update_harvest, get_harvests_by_growing_cycle_id
 from .log_message_services import write_log_message, get_log_messages_by_amount, get_log_messages_by_date
@@ -23,7 +30,8 @@ from .data_retention_services import DataRetentionScheduler
 from .location_services import create_location, update_location, remove_location, get_location_by_id, gather_locations_by_organization_id
 from .weather_forcast_scheduler_services import WeatherForecastScheduler
 from .controllable_action_services import get_active_controllable_action_by_id, create_controllable_action, update_controllable_action, delete_controllable_action, get_controllable_action_by_id, set_is_automated, set_controllable_action_order
-from .action_queue_services import is_new_action, create_auto_triggered_actions_in_queue, process_action_queue, get_active_state, is_already_enqueued, get_action_queue_by_fpf_id
+from .action_state_services import get_action_state, get_hardware_state
+from .action_queue_services import is_new_action, create_auto_triggered_actions_in_queue, process_action_queue, get_active_state, is_already_enqueued, get_action_queue_by_fpf_id, fail_stale_queue_entries
 from .hardware_services import get_hardware_for_fpf, get_or_create_hardware, set_hardware_order, update_hardware, remove_hardware, create_hardware
 from .threshold_services import create_threshold, remove_threshold, update_threshold
 from .action_trigger_services import create_action_trigger, get_action_trigger, get_all_auto_timeOfDay_action_triggers, get_all_auto_interval_triggers, get_all_active_auto_triggers
@@ -35,6 +43,7 @@ from .action_mapping_services import create_action_mappings
 from .model_scheduler_services import ModelScheduler
 from .notification_services import create_notification, remove_notification, get_all_notifications
 from .forecast_action_scheduler_services import ForecastActionScheduler
+from .background_job_stats_services import collect_background_job_stats, get_background_job_stats
 from .matrix_scheduler import MatrixScheduler
 from .resource_management_model_services import get_model_by_id, update_model, delete_model, create_model
 from .energy_consumer_services import get_energy_consumer_by_id, get_energy_consumers_by_fpf_id, get_active_energy_consumers_by_fpf_id, create_energy_consumer, update_energy_consumer, delete_energy_consumer, get_total_consumption_by_fpf_id, get_consumers_by_priority
@@ -0,0 +1,165 @@
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from django.conf import settings
+from django.db import connections
+
+from farminsight_dashboard_backend.utils import get_logger
+
+
+class ActionScriptTimeoutError(TimeoutError):
+    """
+    The script did not finish in time but is still running, it may still succeed.
+    """
+
+
+class _ScriptRun:
+    def __init__(self):
+        self.done = threading.Event()
+        self.lock = threading.Lock()
+        self.result = None
+        self.error = None
+        self.on_late_result = None
+        self.late = False
+        self.key = None
+
+
+class ActionExecutor:
+    """
+    Executes the entries of the action queue, implemented as a Singleton.
+    The entries of different hardware run in parallel on a pool of ACTION_QUEUE_WORKERS threads, the entries of one
+    hardware run one after another in their order, also when the queue is processed by several threads at once.
+    Every script runs on its own thread, its timeout (timeout_seconds of the script or ACTION_SCRIPT_TIMEOUT_SECONDS)
+    starts with the script. Timed out runs can not be interrupted, they keep their thread and report their result
+    when they finish, so hung devices never delay the scripts of other hardware. Until then their hardware is busy,
+    its further entries stay in the queue.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __new__(cls, *args, **kwargs):
+        return super(ActionExecutor, cls).__new__(cls)
+
+    def __init__(self):
+        if not getattr(self, "_initialized", False):
+            self.log = get_logger()
+            max_workers = getattr(settings, 'ACTION_QUEUE_WORKERS', 8)
+            self.script_timeout_seconds = getattr(settings, 'ACTION_SCRIPT_TIMEOUT_SECONDS', 30)
+            self._hardware_pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='action-queue')
+            self._hardware_locks = defaultdict(threading.Lock)
+            self._hardware_locks_lock = threading.Lock()
+            # Hardware key -> number of timed out scripts that are still running
+            self._late_runs = defaultdict(int)
+            self._local = threading.local()
+            self._initialized = True
+
+    def run_per_hardware(self, entries_by_hardware: dict, func: Callable):
+        """
+        Call func for every entry and wait until all calls finished.
+        :param entries_by_hardware: Dictionary hardware key -> entries in the order to run them.
+        :param func: Function called with one entry, errors are logged.
+        """
+        if len(entries_by_hardware) <= 1 or getattr(self._local, 'in_pool', False):
+            # Nothing to run in parallel, or the queue is processed from within an action script
+            for key, entries in entries_by_hardware.items():
+                self._run_serialized(key, entries, func)
+            return
+
+        futures = [
+            self._hardware_pool.submit(self._run_in_pool, key, entries, func)
+            for key, entries in entries_by_hardware.items()
+        ]
+        for future in futures:
+            future.result()
+
+    def run_script(self, script, action_value, on_late_result: Callable = None):
+        """
+        Run the action script with its timeout.
+        :param script: The action script.
+        :param action_value: Value to run the script with.
+        :param on_late_result: Called with the error or None when a timed out script finishes after all.
+        :return: The result of the script.
+        :raises ActionScriptTimeoutError: If the script did not finish in time, it keeps running.
+        """
+        timeout = getattr(script, 'timeout_seconds', None) or self.script_timeout_seconds
+        run = _ScriptRun()
+        run.key = getattr(self._local, 'key', None)
+        threading.Thread(
+            target=self._run_script_thread, args=(run, script, action_value), name='action-script', daemon=True
+        ).start()
+        if not run.done.wait(timeout):
+            with run.lock:
+                if not run.done.is_set():
+                    run.on_late_result = on_late_result
+                    run.late = True
+                    with self._hardware_locks_lock:
+                        self._late_runs[run.key] += 1
+                    raise ActionScriptTimeoutError(f"{type(script).__name__} did not finish within {timeout} seconds.")
+        if run.error is not None:
+            raise run.error
+        return run.result
+
+    def is_running_late(self, key) -> bool:
+        """
+        :param key: Hardware key of the queue entries.
+        :return: True if a timed out script of the hardware is still running.
+        """
+        with self._hardware_locks_lock:
+            return self._late_runs.get(key, 0) > 0
+
+    def _run_in_pool(self, key, entries: list, func: Callable):
+        self._local.in_pool = True
+        try:
+            self._run_serialized(key, entries, func)
+        finally:
+            self._local.in_pool = False
+            # Pool threads open their own database connections, don't keep them around
+            connections.close_all()
+
+    def _run_serialized(self, key, entries: list, func: Callable):
+        with self._hardware_locks_lock:
+            hardware_lock = self._hardware_locks[key]
+        with hardware_lock:
+            self._local.key = key
+            for entry in entries:
+                if self.is_running_late(key):
+                    self.log.debug(f"Skipping the queue entries of {key}, a timed out script of it is still running.")
+                    break
+                try:
+                    func(entry)
+                except Exception as e:
+                    self.log.error(f"Failed to process queue entry {entry}: {e}")
+
+    def _run_script_thread(self, run: _ScriptRun, script, action_value):
+        self._local.in_pool = True
+        try:
+            try:
+                run.result = script.run(action_value)
+            except Exception as e:
+                run.error = e
+            with run.lock:
+                run.done.set()
+                on_late_result = run.on_late_result
+            if run.late:
+                with self._hardware_locks_lock:
+                    self._late_runs[run.key] -= 1
+                    if not self._late_runs[run.key]:
+                        del self._late_runs[run.key]
+            if on_late_result is not None:
+                self.log.info(f"{type(script).__name__} finished after its timeout.")
+                try:
+                    on_late_result(run.error)
+                except Exception as e:
+                    self.log.error(f"Failed to record the late result of {type(script).__name__}: {e}")
+        finally:
+            self._local.in_pool = False
+            connections.close_all()
@@ -1,19 +1,30 @@
-from datetime import timedelta
+import threading
+from collections import defaultdict
+from datetime import timedelta, datetime
 
+from django.conf import settings
 from django.utils.timezone import now
 
-from farminsight_dashboard_backend.models import ActionQueue
+from farminsight_dashboard_backend.models import ActionQueue, ScheduledJob
 from farminsight_dashboard_backend.serializers import ActionQueueSerializerDescriptive
 # Import directly from module to avoid circular import
 from farminsight_dashboard_backend.services.controllable_action_services import get_controllable_action_by_id
+from farminsight_dashboard_backend.services.action_state_services import get_action_state, get_hardware_state, \
+    save_ended_queue_entry
 
 from farminsight_dashboard_backend.services.action_trigger_services import get_all_active_auto_triggers
 from farminsight_dashboard_backend.services.trigger.trigger_handler_factory import TriggerHandlerFactory
+from farminsight_dashboard_backend.services.scheduler_runtime_services import SchedulerRuntime
+from farminsight_dashboard_backend.services.scheduled_job_services import ScheduledJobStore
+from farminsight_dashboard_backend.services.action_executor_services import ActionExecutor, ActionScriptTimeoutError
+from farminsight_dashboard_backend.services.process_heartbeat_services import ProcessHeartbeat
 from farminsight_dashboard_backend.utils import get_logger
 from farminsight_dashboard_backend.action_scripts import TypedActionScriptFactory
 
 typed_action_script_factory = TypedActionScriptFactory()
 
+_retry_lock = threading.Lock()
+
 logger = get_logger()
 
 def get_active_state_of_action(controllable_action_id):
@@ -24,22 +35,19 @@ def get_active_state_of_action(controllable_action_id):
     :return:
     """
 
-    last_action =  ActionQueue.objects.filter(
-        action__id=controllable_action_id,
-        endedAt__isnull=False,
-        startedAt__isnull=False,
-    ).order_by('createdAt').last()
+    action_state = get_action_state(controllable_action_id)
+    last_action = action_state.activeEntry if action_state else None
 
     if last_action is None:
         return None
 
     # For auto actions, return them always. (we check here anyway if the action has a matching isAutomated)
-    if last_action.trigger.type != 'manual' and get_controllable_action_by_id(controllable_action_id).isAutomated:
+    if last_action.trigger.type != 'manual' and last_action.action.isAutomated:
         return last_action
 
     # Return manual action only if the action is in manual mode.
     # We need this to activate a manual trigger which was in auto mode.
-    if last_action.trigger.type == 'manual' and not get_controllable_action_by_id(controllable_action_id).isAutomated:
+    if last_action.trigger.type == 'manual' and not last_action.action.isAutomated:
         return last_action
     else:
         return None
@@ -51,13 +59,8 @@ def get_active_state_of_hardware(hardware_id):
     :param hardware_id:
     :return:
     """
-    last_action = ActionQueue.objects.filter(
-        action__hardware_id=hardware_id,
-        endedAt__isnull=False,
-        startedAt__isnull=False,
-    ).order_by('createdAt').last()
-
-    return last_action
+    hardware_state = get_hardware_state(hardware_id)
+    return hardware_state.activeEntry if hardware_state else None
 
 def is_already_enqueued(trigger_id):
     """
@@ -81,68 +84,187 @@ def process_action_queue():
     """
 
     # Filter out finished and cancelled actions
-    pending_actions = ActionQueue.objects.filter(endedAt__isnull=True, startedAt__isnull=True).order_by('createdAt')
+    pending_actions = ActionQueue.objects.filter(endedAt__isnull=True, startedAt__isnull=True) \
+        .select_related('action__hardware', 'trigger').order_by('createdAt')
 
+    # Entries of the same hardware are executed one after another, different hardware in parallel
+    entries_by_hardware = defaultdict(list)
     for queue_entry in pending_actions:
-        action = queue_entry.action
-        trigger = queue_entry.trigger
-        hardware = action.hardware
+        key = ('hardware', queue_entry.action.hardware_id) if queue_entry.action.hardware_id else ('action', queue_entry.action_id)
+        entries_by_hardware[key].append(queue_entry)
 
-        # Don't execute actions for inactive controllable action
-        if not action.isActive:
-            logger.debug(f"Skipping action because it is not active.", extra={'resource_id':action.id})
-            continue
+    ActionExecutor.get_instance().run_per_hardware(entries_by_hardware, process_queue_entry)
+
+
+def process_queue_entry(queue_entry: ActionQueue):
+    """
+    Checks if the pending queue entry is executable and executes it.
+    The start is recorded first, so an entry is executed only once when the queue is processed by several threads.
+    A failed entry stays in the queue with its error and is tried again after ACTION_QUEUE_RETRY_SECONDS. An entry whose
+    script timed out stays started and is not tried again while the script may still succeed, unless its process is
+    gone in the meantime, see fail_stale_queue_entries.
+    :param queue_entry:
+    :return:
+    """
+    action = queue_entry.action
+    trigger = queue_entry.trigger
+    hardware = action.hardware
+
+    # Don't execute actions for inactive controllable action
+    if not action.isActive:
+        logger.debug(f"Skipping action because it is not active.", extra={'resource_id':action.id})
+        return
+
+    # Don't execute auto actions if manual action is active, cancel the auto action in the queue
+    # New auto action would need to be triggered again
+    if trigger.type != 'manual' and not action.isAutomated:
+        logger.info(f"Cancel execution, because action is set to manual.", extra={'resource_id':action.id})
+        queue_entry.endedAt = now()
+        save_ended_queue_entry(queue_entry, executed=False)
+        return
+
+    # Don't execute if another action for the same hardware is still running
+    if hardware is not None:
+        hardware_state = get_hardware_state(hardware.id)
+        if hardware_state and hardware_state.busyUntil and hardware_state.busyUntil > now():
+            logger.info(f"Skipping execution, hardware {hardware} is busy until {hardware_state.busyUntil}", extra={'resource_id':action.id})
+            schedule_action_queue_retry(hardware_state.busyUntil)
+            return
+
+        # Don't execute if other actions with the same hardware are on Manual mode while this one is on auto.
+        manual_action = hardware_state.lastManualEntry if hardware_state else None
+
+        # No other active manual action for the same hardware when the action is in manual mode
+        # when this action is in auto mode
+        if manual_action and not manual_action.action.isAutomated and action.isAutomated:
+            logger.info(f"Skipping execution, hardware {hardware} has another action in MANUAL mode, which is blocking this auto trigger.", extra={'resource_id':action.id})
+            # Tried again until the manual action is switched back to automatic mode
+            schedule_action_queue_retry(now() + timedelta(seconds=getattr(settings, 'ACTION_QUEUE_RETRY_SECONDS', 60)))
+            return
+
+    started_at = now()
+    started_by = ProcessHeartbeat.get_instance().identity
+    if not ActionQueue.objects.filter(id=queue_entry.id, startedAt__isnull=True, endedAt__isnull=True) \
+            .update(startedAt=started_at, startedBy=started_by):
+        # Executed or cancelled in the meantime
+        return
+    queue_entry.startedAt = started_at
+    queue_entry.startedBy = started_by
+
+    # Execute the action
+    try:
+        script = typed_action_script_factory.get_typed_action_script(action)
+        ActionExecutor.get_instance().run_script(
+            script, trigger.actionValue, on_late_result=lambda error: finish_late_queue_entry(queue_entry.id, error, started_at)
+        )
+    except ActionScriptTimeoutError as e:
+        # The script may still succeed, the entry stays started until it finished, see finish_late_queue_entry
+        logger.warning(f"{e} Its result is recorded when it finishes.", extra={'resource_id': action.id})
+        ActionQueue.objects.filter(id=queue_entry.id).update(error=str(e))
+        return
+    except Exception as e:
+        record_queue_entry_result(queue_entry, e)
+        return
+    record_queue_entry_result(queue_entry, None)
+
+
+def record_queue_entry_result(queue_entry: ActionQueue, error: Exception = None):
+    """
+    End the executed queue entry, or keep it in the queue with its error and retry it after ACTION_QUEUE_RETRY_SECONDS.
+    :param queue_entry: The started queue entry.
+    :param error: The error of the script, None if it succeeded.
+    """
+    action = queue_entry.action
+    if error is None:
+        # Set endedAt with the given maximum duration of the action
+        queue_entry.endedAt = now() + timedelta(seconds=action.maximumDurationSeconds or 0)
+        save_ended_queue_entry(queue_entry, executed=True)
+        logger.info(f"Executed successfully", extra={'resource_id': action.id})
+        return
+
+    logger.error(f"Failed to execute: {error}", extra={'resource_id': action.id})
+    failed_at = now()
+    ActionQueue.objects.filter(id=queue_entry.id).update(startedAt=None, startedBy=None, failedAt=failed_at, error=str(error))
+    schedule_action_queue_retry(failed_at + timedelta(seconds=getattr(settings, 'ACTION_QUEUE_RETRY_SECONDS', 60)))
 
-        # Don't execute auto actions if manual action is active, cancel the auto action in the queue
-        # New auto action would need to be triggered again
-        if trigger.type != 'manual' and not action.isAutomated:
-            logger.info(f"Cancel execution, because action is set to manual.", extra={'resource_id':action.id})
-            queue_entry.endedAt = now()
-            queue_entry.save()
+
+def finish_late_queue_entry(queue_entry_id, error: Exception = None, started_at: datetime = None):
+    """
+    Record the result of a script that finished after its timeout, unless the entry was cancelled or started again
+    in the meantime.
+    :param queue_entry_id: ID of the queue entry.
+    :param error: The error of the script, None if it succeeded.
+    :param started_at: Start of the run of the script, None for any run.
+    """
+    started_entries = ActionQueue.objects.select_related('action__hardware', 'trigger') \
+        .filter(id=queue_entry_id, startedAt__isnull=False, endedAt__isnull=True)
+    if started_at is not None:
+        started_entries = started_entries.filter(startedAt=started_at)
+    queue_entry = started_entries.first()
+    if queue_entry is not None:
+        record_queue_entry_result(queue_entry, error)
+    # The other entries of the hardware waited for the script
+    schedule_action_queue_retry(now())
+
+
+def fail_stale_queue_entries():
+    """
+    Fail the started queue entries whose process is gone, so they are tried again. The timed out script of such an entry
+    stopped with its process, so finish_late_queue_entry never recorded its result.
+    An entry is only failed after the timeout of its script, entries of live processes are left to their process.
+    """
+    live_processes = ProcessHeartbeat.get_instance().get_live_identities()
+    # Entries started before the processes were recorded have no process, they are failed after their timeout
+    started_entries = ActionQueue.objects.filter(startedAt__isnull=False, endedAt__isnull=True) \
+        .exclude(startedBy__in=live_processes).select_related('action')
+
+    failed_at = now()
+    failed = 0
+    for queue_entry in started_entries:
+        if queue_entry.startedAt + timedelta(seconds=get_script_timeout_seconds(queue_entry.action)) > failed_at:
             continue
+        failed += ActionQueue.objects.filter(
+            id=queue_entry.id, startedAt=queue_entry.startedAt, startedBy=queue_entry.startedBy, endedAt__isnull=True
+        ).update(
+            startedAt=None, startedBy=None, failedAt=failed_at,
+            error='The script did not finish before its server process stopped.'
+        )
+    if failed:
+        logger.warning(f"Failed {failed} queue entries whose server process is gone.")
+        schedule_action_queue_retry(failed_at + timedelta(seconds=getattr(settings, 'ACTION_QUEUE_RETRY_SECONDS', 60)))
+
+
+def get_script_timeout_seconds(action) -> float:
+    """
+    The timeout of the script of the action, its own timeout_seconds or ACTION_SCRIPT_TIMEOUT_SECONDS.
+    """
+    try:
+        script_class = typed_action_script_factory.get_typed_action_script_class(str(action.actionClassId))
+    except KeyError:
+        script_class = None
+    return getattr(script_class, 'timeout_seconds', None) or ActionExecutor.get_instance().script_timeout_seconds
+
+
+def schedule_action_queue_retry(run_at: datetime):
+    """
+    Process the queue again at the given time, e.g. when busy hardware is free again.
+    The retry is stored with the ScheduledJobStore, so the leader also runs the retries of entries that were processed
+    in another process, e.g. manual actions of a web request.
+    An earlier retry that is already scheduled is kept, it schedules the later one again if still needed.
+    :param run_at: Time to process the queue at.
+    """
+    with _retry_lock:
+        scheduled_at = ScheduledJob.objects.filter(id='action_queue_retry').values_list('runAt', flat=True).first()
+        if scheduled_at is not None and now() < scheduled_at <= run_at:
+            return
+        ScheduledJobStore.get_instance().schedule_once(
+            'action_queue_retry',
+            'ActionQueue',
+            process_action_queue,
+            run_at + timedelta(seconds=1),
+            executor=SchedulerRuntime.ACTUATOR,
+        )
 
-        # Don't execute if another action for the same hardware is still running
-        if hardware is not None:
-            last_action = ActionQueue.objects.filter(
-                action__hardware=hardware,
-                endedAt__isnull=False,
-                startedAt__isnull=False,
-            ).order_by('-endedAt').first()
-            if last_action and last_action.endedAt > now():
-                logger.info(f"Skipping execution, hardware {hardware} is busy until {last_action.endedAt}", extra={'resource_id':action.id})
-                continue
-
-            # Don't execute if other actions with the same hardware are on Manual mode while this one is on auto.
-            manual_action = ActionQueue.objects.filter(
-                action__hardware=hardware,
-                trigger__type='manual',
-                endedAt__isnull=False,
-                startedAt__isnull=False,
-            ).exclude(
-                id=queue_entry.id
-            ).order_by('createdAt').last()
-
-            # No other active manual action for the same hardware when the action is in manual mode
-            # when this action is in auto mode
-            if manual_action and not manual_action.action.isAutomated and action.isAutomated:
-                logger.info(f"Skipping execution, hardware {hardware} has another action in MANUAL mode, which is blocking this auto trigger.", extra={'resource_id':action.id})
-                continue
-
-
-        # Execute the action
-        try:
-            queue_entry.startedAt = now()
-
-            script = typed_action_script_factory.get_typed_action_script_class(str(action.actionClassId))
-            script_class = script(action)
-            script_class.run(trigger.actionValue)
-
-            # Set endedAt with the given maximum duration of the action
-            queue_entry.endedAt = now() + timedelta(seconds=action.maximumDurationSeconds or 0)
-            queue_entry.save()
-            logger.info(f"Executed successfully", extra={'resource_id': action.id})
-        except Exception as e:
-            logger.error(f"Failed to execute: {e}", extra={'resource_id': action.id})
 
 def create_auto_triggered_actions_in_queue(action_id=None):
     try:
@@ -160,16 +282,13 @@ def create_auto_triggered_actions_in_queue(action_id=None):
 
 def get_active_state(controllable_action_id: str):
     """
-    Get the most recent queue entry for this action (whether ended or still running)
+    Get the trigger of the queue entry of this action that ended last (whether executed or cancelled)
     :param controllable_action_id:
     :return:
     """
-    latest_entry = ActionQueue.objects.filter(
-        action__id=controllable_action_id
-    ).order_by('-endedAt', '-createdAt').first()
-
-    if latest_entry:
-        return latest_entry.trigger
+    action_state = get_action_state(controllable_action_id)
+    if action_state and action_state.latestEntry:
+        return action_state.latestEntry.trigger
     return None
 
 def is_new_action(action_id, trigger_id):
@@ -179,8 +298,9 @@ def is_new_action(action_id, trigger_id):
     :return:
     """
 
-    if get_controllable_action_by_id(action_id).hardware is not None:
-        active_state = get_active_state_of_hardware(get_controllable_action_by_id(action_id).hardware.id)
+    hardware_id = get_controllable_action_by_id(action_id).hardware_id
+    if hardware_id is not None:
+        active_state = get_active_state_of_hardware(hardware_id)
     else:
         active_state = get_active_state_of_action(action_id)
     if active_state is None or active_state.trigger.id != trigger_id:
@@ -0,0 +1,51 @@
+from django.db import transaction
+
+from farminsight_dashboard_backend.models import ActionQueue, ActionState, HardwareState
+
+
+def get_action_state(controllable_action_id) -> ActionState | None:
+    """
+    :param controllable_action_id:
+    :return: The current state of the action, None if no queue entry of the action ended yet.
+    """
+    return ActionState.objects.select_related(
+        'activeEntry__trigger', 'activeEntry__action', 'latestEntry__trigger'
+    ).filter(pk=controllable_action_id).first()
+
+
+def get_hardware_state(hardware_id) -> HardwareState | None:
+    """
+    :param hardware_id:
+    :return: The current state of the hardware, None if no action of the hardware was executed yet.
+    """
+    return HardwareState.objects.select_related(
+        'activeEntry__trigger', 'lastManualEntry__trigger', 'lastManualEntry__action'
+    ).filter(pk=hardware_id).first()
+
+
+def save_ended_queue_entry(queue_entry: ActionQueue, executed: bool):
+    """
+    Save the ended queue entry and update the state of its action and hardware in the same transaction.
+    :param queue_entry: Queue entry with endedAt set.
+    :param executed: If the entry was executed, otherwise it was cancelled.
+    """
+    with transaction.atomic():
+        queue_entry.save()
+
+        action_state, _ = ActionState.objects.select_for_update().get_or_create(action_id=queue_entry.action_id)
+        if executed:
+            action_state.activeEntry = queue_entry
+        if action_state.latestEndedAt is None or queue_entry.endedAt >= action_state.latestEndedAt:
+            action_state.latestEntry = queue_entry
+            action_state.latestEndedAt = queue_entry.endedAt
+        action_state.save()
+
+        hardware_id = queue_entry.action.hardware_id
+        if executed and hardware_id is not None:
+            hardware_state, _ = HardwareState.objects.select_for_update().get_or_create(hardware_id=hardware_id)
+            hardware_state.activeEntry = queue_entry
+            if queue_entry.trigger.type == 'manual':
+                hardware_state.lastManualEntry = queue_entry
+            if hardware_state.busyUntil is None or queue_entry.endedAt > hardware_state.busyUntil:
+                hardware_state.busyUntil = queue_entry.endedAt
+            hardware_state.save()
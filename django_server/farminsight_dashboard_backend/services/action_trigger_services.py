@@ -12,7 +12,9 @@ def create_action_trigger(action_trigger_data:dict) -> ActionTriggerSerializer.d
     serializer = ActionTriggerSerializer(data=action_trigger_data, partial=True)
     serializer.is_valid(raise_exception=True)
 
-    return serializer.save()
+    trigger = serializer.save()
+    _replan_auto_triggers()
+    return trigger
 
 
 def get_action_trigger(action_trigger_id):
@@ -71,4 +73,11 @@ def update_action_trigger(actionTrigger_id, data) -> ActionTriggerSerializer:
 
     if serializer.is_valid(raise_exception=True):
         serializer.save()
-        return serializer
\ No newline at end of file
+        _replan_auto_triggers()
+        return serializer
+
+
+def _replan_auto_triggers():
+    # Imported here, the scheduler imports the services
+    from farminsight_dashboard_backend.services.auto_trigger_scheduler_services import AutoTriggerScheduler
+    AutoTriggerScheduler.get_instance().replan()
@@ -1,18 +1,40 @@
 import threading
-from datetime import timedelta
 
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.interval import IntervalTrigger
+from apscheduler.triggers.date import DateTrigger
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Q
 from django.utils import timezone
 
-from farminsight_dashboard_backend.services import process_action_queue, create_auto_triggered_actions_in_queue
+from farminsight_dashboard_backend.models import ActionTrigger, ControllableAction
+from farminsight_dashboard_backend.services import process_action_queue
+from farminsight_dashboard_backend.services.scheduled_job_services import ScheduledJobStore
+from farminsight_dashboard_backend.services.scheduler_runtime_services import SchedulerRuntime
+from farminsight_dashboard_backend.services.trigger.interval_trigger_handler import schedule_interval_trigger, \
+    interval_trigger_job_id
+from farminsight_dashboard_backend.services.trigger.time_of_day_trigger_handler import TimeOfDayTriggerHandler, \
+    parse_time_of_day_window, next_time_of_day_boundary
 from farminsight_dashboard_backend.utils import get_logger
 
 
 class AutoTriggerScheduler:
+    """
+    Plans the timeOfDay and interval triggers, implemented as a Singleton.
+    Instead of checking all triggers every minute, every timeOfDay trigger has one job at the next time it enters or
+    leaves its window. At such a boundary the timeOfDay triggers of all actions of the same hardware are checked, so
+    another trigger can take over when a window ends, and the job is scheduled for the following boundary.
+    Interval triggers have their own stored jobs, see IntervalTriggerHandler.
+    The plan is only computed again for triggers that changed. Changes in this process are planned right away,
+    changes of other processes within SCHEDULER_CHANGE_POLL_SECONDS, see ScheduledJobStore.watch, and all triggers are
+    compared every SCHEDULED_JOB_SYNC_SECONDS with one query.
+    """
     _instance = None
     _lock = threading.Lock()
 
+    OWNER = 'AutoTriggerScheduler'
+    VERSION_NAME = 'auto_triggers'
+    PLANNED_TYPES = ['timeOfDay', 'interval']
+
     @classmethod
     def get_instance(cls):
         with cls._lock:
@@ -25,17 +47,145 @@ class AutoTriggerScheduler:
 
     def __init__(self):
         if not getattr(self, "_initialized", False):
-            self._scheduler = BackgroundScheduler()
+            self._scheduler = SchedulerRuntime.get_instance()
             self.log = get_logger()
+            self._plan_lock = threading.Lock()
+            # Trigger ID -> the trigger fields the plan was computed from
+            self._planned = {}
             self._initialized = True
 
-    def start(self, interval_seconds: int = 60):
+    def start(self):
+        self._scheduler.add_job(
+            self.OWNER,
+            self.plan,
+            executor=SchedulerRuntime.ACTUATOR,
+            trigger=DateTrigger(run_date=timezone.now()),
+            kwargs={'process_queue': True},
+            id="auto_trigger_plan",
+            replace_existing=True,
+        )
+        self._scheduler.add_job(
+            self.OWNER,
+            self.plan,
+            executor=SchedulerRuntime.ACTUATOR,
+            trigger='interval',
+            seconds=getattr(settings, 'SCHEDULED_JOB_SYNC_SECONDS', 60),
+            id="auto_trigger_sync",
+            replace_existing=True,
+        )
+        ScheduledJobStore.get_instance().watch(self.VERSION_NAME, self.replan)
+        self.log.info("AutoTriggerScheduler started.")
+
+    def replan(self):
+        """
+        Plan the changed triggers right away if this process runs the scheduler, otherwise notify the leader.
+        """
+        if not self._scheduler.running:
+            ScheduledJobStore.notify_change(self.VERSION_NAME)
+            return
+        self._scheduler.add_job(
+            self.OWNER,
+            self.plan,
+            executor=SchedulerRuntime.ACTUATOR,
+            id="auto_trigger_plan",
+            replace_existing=True,
+        )
+
+    def plan(self, process_queue: bool = False):
+        """
+        Schedule the jobs of new and changed triggers, remove the jobs of removed triggers and check the timeOfDay
+        triggers of the affected actions.
+        :param process_queue: Process the action queue even if no trigger changed.
+        """
+        with self._plan_lock:
+            close_old_connections()
+            current = {
+                row[0]: row for row in ActionTrigger.objects.filter(isActive=True, type__in=self.PLANNED_TYPES)
+                .values_list('id', 'type', 'triggerLogic', 'actionValue', 'action_id', 'action__additionalInformation',
+                             'action__isAutomated')
+            }
+            changed = [trigger_id for trigger_id, row in current.items() if self._planned.get(trigger_id) != row]
+            removed = [trigger_id for trigger_id in self._planned if trigger_id not in current]
+            if not changed and not removed:
+                if process_queue:
+                    process_action_queue()
+                return
+
+            affected_actions = set()
+            for trigger_id in removed:
+                _, trigger_type, _, _, action_id, _, _ = self._planned.pop(trigger_id)
+                self._remove_jobs(trigger_id, trigger_type)
+                if trigger_type == 'timeOfDay':
+                    # Another trigger of the action can take over
+                    affected_actions.add(action_id)
+
+            triggers = ActionTrigger.objects.select_related('action').in_bulk(changed)
+            for trigger_id in changed:
+                trigger = triggers.get(trigger_id)
+                if trigger is None:
+                    continue
+                previous = self._planned.get(trigger_id)
+                if previous is not None and previous[1] != trigger.type:
+                    self._remove_jobs(trigger_id, previous[1])
+                try:
+                    if trigger.type == 'timeOfDay':
+                        self._schedule_boundary(trigger)
+                        affected_actions.add(trigger.action_id)
+                    else:
+                        schedule_interval_trigger(trigger)
+                except Exception as e:
+                    self.log.warning(f"Could not plan trigger {trigger.description}: {e}", extra={'resource_id': trigger.action_id})
+                self._planned[trigger_id] = current[trigger_id]
+
+            self.log.debug(f"Planned {len(changed)} changed and removed {len(removed)} auto triggers.")
+            self.check_time_of_day_triggers(affected_actions)
+
+    def _schedule_boundary(self, trigger: ActionTrigger):
+        from_time, to_time = parse_time_of_day_window(trigger.triggerLogic)
         self._scheduler.add_job(
-            create_auto_triggered_actions_in_queue,
-            trigger=IntervalTrigger(seconds=interval_seconds),
-            id="auto_trigger_processing",
+            self.OWNER,
+            self._on_boundary,
+            executor=SchedulerRuntime.ACTUATOR,
+            trigger=DateTrigger(run_date=next_time_of_day_boundary(from_time, to_time, timezone.now())),
+            args=[trigger.id],
+            id=self._boundary_job_id(trigger.id),
             replace_existing=True,
-            next_run_time=timezone.now() + timedelta(seconds=1)
+            # The window is checked when the job runs, so a late run is still correct
+            misfire_grace_time=None,
         )
-        self._scheduler.start()
-        self.log.info(f"AutoTriggerScheduler started with interval: {interval_seconds} seconds.")
+
+    def _remove_jobs(self, trigger_id, trigger_type: str):
+        if trigger_type == 'timeOfDay':
+            self._scheduler.remove_job(self._boundary_job_id(trigger_id))
+        else:
+            ScheduledJobStore.get_instance().remove(interval_trigger_job_id(trigger_id))
+
+    def _on_boundary(self, trigger_id):
+        close_old_connections()
+        trigger = ActionTrigger.objects.filter(id=trigger_id, isActive=True, type='timeOfDay').first()
+        if trigger is None:
+            # Removed in another process, the next sync forgets it
+            return
+        try:
+            self.check_time_of_day_triggers({trigger.action_id})
+        finally:
+            self._schedule_boundary(trigger)
+
+    def check_time_of_day_triggers(self, action_ids: set):
+        """
+        Enqueue the timeOfDay triggers of the actions and of the other actions of their hardware that are inside their
+        window, then process the queue. Also called by any process after an action was switched back to automatic mode,
+        the boundary jobs only run when a window starts or ends.
+        """
+        hardware_ids = ControllableAction.objects.filter(id__in=action_ids, hardware__isnull=False) \
+            .values_list('hardware_id', flat=True)
+        triggers = ActionTrigger.objects.filter(isActive=True, type='timeOfDay', action__isAutomated=True) \
+            .filter(Q(action_id__in=action_ids) | Q(action__hardware_id__in=hardware_ids)) \
+            .select_related('action')
+        for trigger in triggers:
+            TimeOfDayTriggerHandler(trigger).enqueue_if_needed()
+        process_action_queue()
+
+    @staticmethod
+    def _boundary_job_id(trigger_id) -> str:
+        return f"time_of_day_trigger_{trigger_id}"
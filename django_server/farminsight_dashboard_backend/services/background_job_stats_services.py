@@ -0,0 +1,28 @@
+from farminsight_dashboard_backend.services.data_retention_services import DataRetentionScheduler
+from farminsight_dashboard_backend.services.forecast_action_scheduler_services import ForecastActionScheduler
+from farminsight_dashboard_backend.services.leader_election_services import LeaderElection
+from farminsight_dashboard_backend.services.scheduler_runtime_services import SchedulerRuntime
+
+
+def collect_background_job_stats() -> dict:
+    """
+    The stats of the schedulers of this process, published by the leader with every renewal of its lease.
+    """
+    return {
+        **SchedulerRuntime.get_instance().get_stats(),
+        'forecastTimeline': ForecastActionScheduler.get_instance().get_stats(),
+        'imageRetention': DataRetentionScheduler.get_instance().get_stats(),
+    }
+
+
+def get_background_job_stats() -> dict:
+    """
+    The stats of the schedulers of the process that runs the background jobs. Processes that do not run them, e.g.
+    web processes or demoted leaders, return the stats the leader published last, at most LEADER_LEASE_SECONDS / 3 old.
+    """
+    leader_election = LeaderElection.get_instance()
+    if not (leader_election.is_leader and SchedulerRuntime.get_instance().running):
+        leader_stats = leader_election.get_leader_stats()
+        if leader_stats is not None:
+            return {**leader_stats, 'leaderElection': leader_election.get_stats()}
+    return {**collect_background_job_stats(), 'leaderElection': leader_election.get_stats()}
@@ -1,19 +1,30 @@
 import threading
 from datetime import timedelta
 
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.interval import IntervalTrigger
 from django.utils import timezone
 
 from farminsight_dashboard_backend.models import Camera
-from farminsight_dashboard_backend.services import get_camera_by_id, get_active_camera_count, fetch_camera_snapshot
+from farminsight_dashboard_backend.services.snapshot_orchestrator_services import SnapshotOrchestrator
+from farminsight_dashboard_backend.services.scheduled_job_services import ScheduledJobStore
+from farminsight_dashboard_backend.services.scheduler_runtime_services import SchedulerRuntime
 from farminsight_dashboard_backend.utils import get_logger
 
 
+def request_camera_snapshot(camera_id: str):
+    SnapshotOrchestrator.get_instance().request_snapshot(camera_id)
+
+
 class CameraScheduler:
+    """
+    Schedules the snapshots of the active cameras, implemented as a Singleton.
+    The snapshot jobs are stored with the ScheduledJobStore, so cameras added or changed in any process reach the
+    leader running the scheduler with its next sync.
+    """
     _instance = None
     _lock = threading.Lock()
 
+    OWNER = 'CameraScheduler'
+
     @classmethod
     def get_instance(cls):
         with cls._lock:
@@ -29,7 +40,7 @@ class CameraScheduler:
         Initialize the CameraScheduler
         """
         if not getattr(self, "_initialized", False):
-            self._scheduler = BackgroundScheduler()
+            self._store = ScheduledJobStore.get_instance()
             self.log = get_logger()
             self._initialized = True
 
@@ -39,31 +50,19 @@ class CameraScheduler:
         :return:
         """
         self._add_all_camera_jobs()
-        self._scheduler.start()
 
         self.log.debug("CameraScheduler started.")
 
     def add_camera_job(self, camera_id: str):
         """
-        Add a snapshot task for a specific camera.
+        Add a snapshot task for a specific camera, or remove it if the camera is not active.
         :param camera_id: ID of the camera
         """
-        try:
-            camera = get_camera_by_id(camera_id)
-            if camera.isActive:
-                interval = camera.intervalSeconds
-                self._scheduler.add_job(
-                    fetch_camera_snapshot,
-                    trigger=IntervalTrigger(seconds=interval),
-                    args=[camera.id, camera.snapshotUrl],
-                    id=f"camera_{camera.id}_snapshot",
-                    replace_existing=True,
-                    next_run_time=timezone.now() + timedelta(seconds=1),
-                    max_instances=get_active_camera_count()
-                )
-                self.log.debug(f"Camera {camera.id} snapshot task scheduled with interval {interval} seconds.")
-        except Camera.DoesNotExist:
-            self.log.warning(f"Camera with ID {camera_id} does not exist or is not active.")
+        camera = Camera.objects.filter(id=camera_id).first()
+        if camera is None or not camera.isActive:
+            self.remove_camera_job(camera_id)
+            return
+        self._schedule(camera)
 
     def remove_camera_job(self, camera_id: str):
         """
@@ -71,53 +70,43 @@ class CameraScheduler:
         :param camera_id:
         :return:
         """
-        try:
-            camera = Camera.objects.get(id=camera_id, isActive=True)
-            if camera.isActive:
-                self._scheduler.remove_job(job_id=f"camera_{camera.id}_snapshot")
-                self.log.debug(f"Camera {camera.id} snapshot task deleted.")
-        except Camera.DoesNotExist:
-            self.log.warning(f"Camera with ID {camera_id} does not exist or is not active.")
+        if self._store.remove(self._job_id(camera_id)):
+            self.log.debug(f"Camera {camera_id} snapshot task deleted.")
 
     def reschedule_camera_job(self, camera_id: str, new_interval: int):
         """
-        Reschedule an existing snapshot task with a new interval.
+        Reschedule the snapshot task after the interval or the active state of the camera changed.
+        The leader replaces its scheduled job with the next sync.
         :param camera_id: ID of the camera
         :param new_interval: New interval in seconds
         """
-        try:
-            job_id = f"camera_{camera_id}_snapshot"
-
-            # Check if the job exists
-            existing_job = self._scheduler.get_job(job_id=job_id)
-
-            if existing_job:
-                # Remove the existing job
-                self._scheduler.remove_job(job_id=job_id)
-                self.log.debug(f"Existing job for camera {camera_id} removed.")
-
-            # Add a new job with the updated interval
-            camera = get_camera_by_id(camera_id)
-            if camera.isActive:
-                self._scheduler.add_job(
-                    fetch_camera_snapshot,
-                    trigger=IntervalTrigger(seconds=new_interval),
-                    args=[camera.id, camera.snapshotUrl],
-                    id=job_id,
-                    replace_existing=True,
-                    next_run_time=timezone.now() + timedelta(seconds=1),
-                    max_instances=get_active_camera_count()
-                )
-                self.log.debug(f"Camera {camera.id} snapshot task rescheduled with new interval {new_interval} seconds.")
-            else:
-                self.log.warning(f"Camera {camera_id} is not active. Cannot reschedule task.")
-        except Camera.DoesNotExist:
-            self.log.warning(f"Camera with ID {camera_id} does not exist. Cannot reschedule task.")
+        self.add_camera_job(camera_id)
+        self.log.debug(f"Camera {camera_id} snapshot task rescheduled with new interval {new_interval} seconds.")
+
+    def _schedule(self, camera: Camera):
+        self._store.schedule_interval(
+            self._job_id(camera.id),
+            self.OWNER,
+            request_camera_snapshot,
+            camera.intervalSeconds,
+            first_run_at=timezone.now() + timedelta(seconds=1),
+            args=[str(camera.id)],
+            executor=SchedulerRuntime.IO,
+        )
+        self.log.debug(f"Camera {camera.id} snapshot task scheduled with interval {camera.intervalSeconds} seconds.")
 
     def _add_all_camera_jobs(self):
         """
-        Add snapshot tasks for all active cameras.
+        Add snapshot tasks for all active cameras and remove the stored tasks of cameras that are gone or inactive.
         """
-        cameras = Camera.objects.filter(isActive=True)
-        for camera in cameras:
-            self.add_camera_job(str(camera.id))
+        active_job_ids = set()
+        for camera in Camera.objects.filter(isActive=True):
+            self._schedule(camera)
+            active_job_ids.add(self._job_id(camera.id))
+
+        for job_id in set(self._store.get_job_ids(self.OWNER)) - active_job_ids:
+            self._store.remove(job_id)
+
+    @staticmethod
+    def _job_id(camera_id) -> str:
+        return f"camera_{camera_id}_snapshot"
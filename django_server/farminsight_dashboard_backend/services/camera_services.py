@@ -1,15 +1,17 @@
-import uuid
 import time
 import requests
 
-from django.core.files import File
+from django.conf import settings
+from django.utils.timezone import now
 
 from farminsight_dashboard_backend.exceptions import NotFoundException
 from farminsight_dashboard_backend.models import Camera, FPF, ControllableAction, ActionQueue, ActionTrigger
 from farminsight_dashboard_backend.serializers import CameraSerializer
-from farminsight_dashboard_backend.models import Image
-from farminsight_dashboard_backend.utils import get_logger
-from farminsight_dashboard_backend.services.action_queue_services import is_already_enqueued, process_action_queue
+from farminsight_dashboard_backend.utils import get_logger, LivestreamFrameBuffer
+from farminsight_dashboard_backend.services.action_queue_services import is_already_enqueued, process_queue_entry
+from farminsight_dashboard_backend.services.action_executor_services import ActionExecutor
+from farminsight_dashboard_backend.services.action_state_services import get_action_state
+from farminsight_dashboard_backend.services.image_services import save_camera_image
 
 
 logger = get_logger()
@@ -19,8 +21,13 @@ TAPO_PLUG_CLASS_ID = 'dc83813b-1541-4aac-8caa-ba448a6bbdda'
 
 # Smart wait configuration for camera plug activation
 CAMERA_PLUG_WAIT_SECONDS = 3  # Time to wait for plug to turn on
-CAMERA_PLUG_RETRY_ATTEMPTS = 3  # Number of retry attempts for snapshot
-CAMERA_PLUG_RETRY_DELAY = 2  # Delay between retries in seconds
+
+# The snapshots poll the camera until it answers instead of sleeping a fixed time after switching the plug on
+CAMERA_SNAPSHOT_POLL_SECONDS = 1  # Delay between two attempts
+CAMERA_SNAPSHOT_CONNECT_TIMEOUT = 2  # A camera that is still booting does not accept connections
+
+CAMERA_PLUG_TRIGGER_DESCRIPTION = 'Camera Logic: {state}'
+
 
 def find_camera_smart_plug(camera: Camera) -> ControllableAction:
     """
@@ -30,7 +37,7 @@ def find_camera_smart_plug(camera: Camera) -> ControllableAction:
     2. Has a name containing the camera's name
     """
     actions = ControllableAction.objects.filter(
-        FPF=camera.FPF,
+        FPF_id=camera.FPF_id,
         isActive=True,
         actionClassId__in=[SHELLY_PLUG_CLASS_ID, TAPO_PLUG_CLASS_ID]
     )
@@ -42,6 +49,56 @@ def find_camera_smart_plug(camera: Camera) -> ControllableAction:
     return None
 
 
+def get_camera_plug_trigger(plug: ControllableAction, state: str) -> ActionTrigger:
+    """
+    The trigger the camera logic switches the plug with, one per plug and state that is reused for every switch.
+    It is inactive, so the trigger handlers don't pick it up, it only carries the action value.
+    :param plug: The smart plug of the camera
+    :param state: 'On' or 'Off'
+    """
+    description = CAMERA_PLUG_TRIGGER_DESCRIPTION.format(state=state)
+    trigger = ActionTrigger.objects.filter(action=plug, type='auto', actionValue=state, description=description).first()
+    if trigger is None:
+        trigger = ActionTrigger.objects.create(
+            type='auto',
+            actionValue=state,
+            description=description,
+            action=plug,
+            isActive=False,
+        )
+    return trigger
+
+
+def switch_camera_plug(plug: ControllableAction, state: str) -> bool:
+    """
+    Switch the smart plug of a camera and wait until the action script ran.
+    Nothing is queued if the plug is already in the state from the last switch of the camera logic, or if the switch
+    is already queued. Only the queue entry of the plug is processed, not the whole action queue.
+    :param plug: The smart plug of the camera
+    :param state: 'On' or 'Off'
+    :return: True if the plug is in the state or was switched, False if the switch is still pending
+    """
+    trigger = get_camera_plug_trigger(plug, state)
+
+    action_state = get_action_state(plug.id)
+    active_entry = action_state.activeEntry if action_state else None
+    if active_entry and active_entry.trigger_id == trigger.id and active_entry.endedAt is not None \
+            and (not plug.maximumDurationSeconds or active_entry.endedAt > now()):
+        # Switched by the camera logic before and not reverted yet, e.g. for another camera on the same plug
+        return True
+
+    if is_already_enqueued(trigger.id):
+        return False
+
+    queue_entry = ActionQueue.objects.create(action=plug, trigger=trigger)
+    queue_entry = ActionQueue.objects.select_related('action__hardware', 'trigger').get(id=queue_entry.id)
+    key = ('hardware', plug.hardware_id) if plug.hardware_id else ('action', plug.id)
+    ActionExecutor.get_instance().run_per_hardware({key: [queue_entry]}, process_queue_entry)
+
+    queue_entry.refresh_from_db(fields=['endedAt'])
+    return queue_entry.endedAt is not None
+
+
 def trigger_camera_plug_and_wait(camera_id: str, state: str, wait_seconds: float = CAMERA_PLUG_WAIT_SECONDS) -> bool:
     """
     Trigger the camera's smart plug and wait for it to activate.
@@ -57,27 +114,8 @@ def trigger_camera_plug_and_wait(camera_id: str, state: str, wait_seconds: float
         
         if plug:
             logger.info(f"Triggering Smart Plug '{plug.name}' to {state} for Camera '{camera.name}'")
-            
-            # Create a transient trigger
-            trigger = ActionTrigger.objects.create(
-                name=f"Camera Logic: {state}",
-                type="auto",
-                actionValue=state,
-                action=plug,
-                isActive=True
-            )
-            
-            if not is_already_enqueued(trigger.id):
-                ActionQueue.objects.create(
-                    action=plug,
-                    trigger=trigger
-                )
-                # Process the action queue immediately
-                try:
-                    process_action_queue()
-                except Exception as e:
-                    logger.warning(f"Error processing action queue: {e}")
-            
+            switch_camera_plug(plug, state)
+
             # Wait for plug to activate
             if state.lower() == "on" and wait_seconds > 0:
                 logger.debug(f"Waiting {wait_seconds}s for plug to activate...")
@@ -101,6 +139,34 @@ def trigger_camera_plug(camera_id: str, state: str):
     trigger_camera_plug_and_wait(camera_id, state, wait_seconds=0)
 
 
+def release_camera_plug(camera_id: str, holder: str):
+    """
+    Switch the camera's smart plug off when the holder does not need the camera anymore, unless the WebSocket
+    livestream, the HLS livestream or a snapshot batch still use it. They may run in other server processes.
+
+    :param camera_id: UUID of the camera
+    :param holder: 'websocket' or 'hls', the livestream that stopped
+    :return: True if the plug was switched off
+    """
+    from farminsight_dashboard_backend.services.hls_streaming_services import HlsStreamingManager
+    from farminsight_dashboard_backend.services.snapshot_orchestrator_services import SnapshotOrchestrator
+
+    camera_id = str(camera_id)
+    if holder != 'websocket' and LivestreamFrameBuffer.get_instance().get(
+            camera_id, getattr(settings, 'LIVESTREAM_SNAPSHOT_MAX_AGE_SECONDS', 5)) is not None:
+        in_use_by = 'the WebSocket livestream'
+    elif holder != 'hls' and HlsStreamingManager.get_instance().is_viewed(camera_id):
+        in_use_by = 'the HLS livestream'
+    elif SnapshotOrchestrator.get_instance().is_capturing(camera_id):
+        in_use_by = 'a snapshot'
+    else:
+        trigger_camera_plug(camera_id, "Off")
+        return True
+
+    logger.debug(f"Leaving the plug of Camera {camera_id} on, it is still used by {in_use_by}.")
+    return False
+
+
 def _attempt_snapshot(snapshot_url: str, timeout: int = 10) -> requests.Response:
     """
     Attempt to fetch a snapshot from the given URL.
@@ -110,60 +176,90 @@ def _attempt_snapshot(snapshot_url: str, timeout: int = 10) -> requests.Response
     :return: Response object
     :raises: requests.RequestException on failure
     """
-    return requests.get(snapshot_url, stream=True, timeout=timeout)
+    return requests.get(snapshot_url, timeout=(CAMERA_SNAPSHOT_CONNECT_TIMEOUT, timeout))
 
 
-def fetch_camera_snapshot(camera_id, snapshot_url):
+def capture_camera_snapshot(camera_id, snapshot_url, deadline: float) -> str:
     """
-    Fetch a snapshot from the given snapshot URL of the camera and store it as a jpg file.
-    Implements smart wait mechanism to ensure camera plug is on before taking snapshot.
-    
+    Fetch a snapshot and store it as a jpg file. The camera is polled until it answers or the deadline passed,
+    so a camera that was just powered on is captured as soon as it is ready.
+
     :param camera_id: UUID of the camera
     :param snapshot_url: URL to fetch the snapshot from
+    :param deadline: time.monotonic() after which no further attempt is made
     :return: Filename of the saved image
     """
-    # Turn on plug before snapshot with smart wait
-    plug_triggered = trigger_camera_plug_and_wait(camera_id, "On", CAMERA_PLUG_WAIT_SECONDS)
-    
     last_error = None
-    
-    for attempt in range(CAMERA_PLUG_RETRY_ATTEMPTS):
+    attempt = 0
+
+    while True:
+        attempt += 1
         try:
             response = _attempt_snapshot(snapshot_url)
-            
+
             if response.status_code == 200:
-                filename = f"{str(uuid.uuid4())}.jpg"
-                Image.objects.create(
-                    camera_id=camera_id,
-                    image=File(response.raw, name=filename)
-                )
+                image = save_camera_image(camera_id, response.content)
                 logger.info(f"Snapshot captured successfully for Camera {camera_id}")
-                return filename
+                return image.image.name
             else:
                 last_error = ValueError(f"HTTP error {response.status_code}")
-                
+
         except requests.exceptions.ConnectionError as e:
             last_error = e
-            logger.warning(f"Snapshot attempt {attempt + 1}/{CAMERA_PLUG_RETRY_ATTEMPTS} failed (connection error). Camera may still be powering on.")
-            
+            logger.debug(f"Snapshot attempt {attempt} failed (connection error). Camera may still be powering on.")
+
         except requests.exceptions.Timeout as e:
             last_error = e
-            logger.warning(f"Snapshot attempt {attempt + 1}/{CAMERA_PLUG_RETRY_ATTEMPTS} timed out.")
-            
+            logger.debug(f"Snapshot attempt {attempt} timed out.")
+
         except Exception as e:
             last_error = e
-            logger.warning(f"Snapshot attempt {attempt + 1}/{CAMERA_PLUG_RETRY_ATTEMPTS} failed: {e}")
-        
-        # Wait before retrying (if not last attempt)
-        if attempt < CAMERA_PLUG_RETRY_ATTEMPTS - 1:
-            logger.debug(f"Waiting {CAMERA_PLUG_RETRY_DELAY}s before retry...")
-            time.sleep(CAMERA_PLUG_RETRY_DELAY)
-    
-    # All attempts failed
-    logger.error(f"Failed to fetch snapshot for Camera {camera_id} after {CAMERA_PLUG_RETRY_ATTEMPTS} attempts: {last_error}", 
+            logger.debug(f"Snapshot attempt {attempt} failed: {e}")
+
+        if time.monotonic() + CAMERA_SNAPSHOT_POLL_SECONDS >= deadline:
+            break
+        time.sleep(CAMERA_SNAPSHOT_POLL_SECONDS)
+
+    logger.error(f"Failed to fetch snapshot for Camera {camera_id} after {attempt} attempts: {last_error}",
                  extra={'resource_id': camera_id})
     raise last_error if last_error else ValueError("Unknown error fetching snapshot")
 
+
+def save_livestream_snapshot(camera_id) -> str | None:
+    """
+    Store the latest frame of the running livestream of the camera as snapshot, without any request to the camera.
+
+    :param camera_id: UUID of the camera
+    :return: Filename of the saved image, None if the camera is not streamed at the moment
+    """
+    jpeg = LivestreamFrameBuffer.get_instance().get(camera_id, getattr(settings, 'LIVESTREAM_SNAPSHOT_MAX_AGE_SECONDS', 5))
+    if jpeg is None:
+        return None
+
+    image = save_camera_image(camera_id, jpeg)
+    logger.info(f"Snapshot taken from the livestream for Camera {camera_id}")
+    return image.image.name
+
+
+def fetch_camera_snapshot(camera_id, snapshot_url):
+    """
+    Fetch a snapshot from the given snapshot URL of the camera and store it as a jpg file.
+    Takes the latest frame of a running livestream of the camera if there is one, otherwise switches the plug of
+    the camera on first and waits up to CAMERA_READY_TIMEOUT_SECONDS for the camera.
+    The scheduled snapshots go through the SnapshotOrchestrator instead, which shares the plug cycles.
+
+    :param camera_id: UUID of the camera
+    :param snapshot_url: URL to fetch the snapshot from
+    :return: Filename of the saved image
+    """
+    filename = save_livestream_snapshot(camera_id)
+    if filename is not None:
+        return filename
+
+    trigger_camera_plug_and_wait(camera_id, "On", wait_seconds=0)
+    deadline = time.monotonic() + getattr(settings, 'CAMERA_READY_TIMEOUT_SECONDS', 30)
+    return capture_camera_snapshot(camera_id, snapshot_url, deadline)
+
 def get_active_camera_by_id(camera_id:str) -> Camera:
     """
     Get active camera by id
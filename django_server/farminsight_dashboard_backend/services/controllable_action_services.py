@@ -1,3 +1,4 @@
+from farminsight_dashboard_backend.action_scripts import TypedActionScriptFactory
 from farminsight_dashboard_backend.exceptions import NotFoundException
 from farminsight_dashboard_backend.models import ControllableAction, FPF
 from farminsight_dashboard_backend.serializers import ControllableActionSerializer
@@ -63,6 +64,7 @@ def update_controllable_action(controllable_action_id:str, controllable_action_d
 
     if serializer.is_valid(raise_exception=True):
         serializer.save()
+        TypedActionScriptFactory.invalidate(controllable_action_id)
     return serializer
 
 
@@ -71,15 +73,27 @@ def delete_controllable_action(controllable_action: ControllableAction):
     Delete controllable_action
     :param controllable_action: controllable_action to delete
     """
+    TypedActionScriptFactory.invalidate(controllable_action.id)
     controllable_action.delete()
 
 
 def set_is_automated(controllable_action_id:str, is_automated:bool) -> ControllableAction:
+    """
+    Switch the controllable action between manual and automatic mode. Back in automatic mode, the timeOfDay triggers of
+    its hardware that are inside their window are enqueued right away instead of at their next window boundary.
+    """
+    # Import here to avoid circular import
+    from farminsight_dashboard_backend.services.auto_trigger_scheduler_services import AutoTriggerScheduler
+
     controllable_action = get_object_or_404(ControllableAction, id=controllable_action_id)
+    switched_to_auto = is_automated and not controllable_action.isAutomated
 
     controllable_action.isAutomated = is_automated
     controllable_action.save()
 
+    if switched_to_auto:
+        AutoTriggerScheduler.get_instance().check_time_of_day_triggers({controllable_action.id})
+
     return controllable_action
 
 
@@ -2,13 +2,15 @@ import threading
 
 from datetime import timedelta
 
-from apscheduler.schedulers.background import BackgroundScheduler
 from django.utils import timezone
 
 from django_server import settings
 
+from farminsight_dashboard_backend.services.scheduler_runtime_services import SchedulerRuntime
+from farminsight_dashboard_backend.services.leader_election_services import LeaderElection
 from farminsight_dashboard_backend.utils import get_logger
-from farminsight_dashboard_backend.models import LogMessage, ActionQueue
+from farminsight_dashboard_backend.models import LogMessage, ActionQueue, Camera
+from farminsight_dashboard_backend.services.image_services import apply_image_retention
 
 
 class DataRetentionScheduler:
@@ -34,23 +36,77 @@ class DataRetentionScheduler:
         """
         if not getattr(self, "_initialized", False):
             #
-            self._scheduler = BackgroundScheduler()
+            self._scheduler = SchedulerRuntime.get_instance()
             self.logger = get_logger()
+            self._image_retention_stats = {
+                'lastRunAt': None,
+                'lastDeletedImages': 0,
+                'lastReclaimedBytes': 0,
+                'totalDeletedImages': 0,
+                'totalReclaimedBytes': 0,
+            }
+            self._stats_lock = threading.Lock()
             self._initialized = True
 
 
     def start(self):
-        self._scheduler.add_job(cleanup_task, trigger='interval', hours=1, id="cleanup_task", args=[self.logger], next_run_time=timezone.now() + timedelta(seconds=1))
-        self._scheduler.start()
+        self._load_image_retention_totals()
+        self._scheduler.add_job('DataRetentionScheduler', cleanup_task, executor=SchedulerRuntime.CPU, trigger='interval', hours=1, id="cleanup_task", args=[self.logger], next_run_time=timezone.now() + timedelta(seconds=1))
+        self._scheduler.add_job('DataRetentionScheduler', self.image_retention_task, executor=SchedulerRuntime.CPU, trigger='interval', hours=1, id="image_retention_task", next_run_time=timezone.now() + timedelta(minutes=1))
         self.logger.debug("DataRetentionScheduler started")
 
 
     # how to run this?
     def stop(self):
-        self._scheduler.shutdown()
+        self._scheduler.remove_jobs('DataRetentionScheduler')
         self.logger.debug("DataRetentionScheduler stopped")
 
 
+    def image_retention_task(self):
+        """
+        Thin out the images of the cameras that have a retention policy.
+        """
+        chunk_size = getattr(settings, 'IMAGE_RETENTION_CHUNK_SIZE', 500)
+        deleted = 0
+        reclaimed_bytes = 0
+        for camera in Camera.objects.filter(keepAllImagesDays__isnull=False):
+            try:
+                camera_deleted, camera_reclaimed = apply_image_retention(camera, chunk_size)
+                deleted += camera_deleted
+                reclaimed_bytes += camera_reclaimed
+            except Exception as e:
+                self.logger.error(f"Error during image retention of camera {camera.id}: {e}")
+
+        with self._stats_lock:
+            self._image_retention_stats['lastRunAt'] = timezone.now().isoformat()
+            self._image_retention_stats['lastDeletedImages'] = deleted
+            self._image_retention_stats['lastReclaimedBytes'] = reclaimed_bytes
+            self._image_retention_stats['totalDeletedImages'] += deleted
+            self._image_retention_stats['totalReclaimedBytes'] += reclaimed_bytes
+        if deleted:
+            self.logger.info(f"Image retention deleted {deleted} images, reclaimed {reclaimed_bytes / 1024 / 1024:.1f} MB.")
+
+
+    def get_stats(self) -> dict:
+        with self._stats_lock:
+            return dict(self._image_retention_stats)
+
+
+    def _load_image_retention_totals(self):
+        """
+        Continue with the stats the previous leader published, so the totals survive restarts and leader changes.
+        """
+        try:
+            published = (LeaderElection.get_instance().get_leader_stats() or {}).get('imageRetention') or {}
+        except Exception as e:
+            self.logger.warning(f"Could not load the published image retention stats: {e}")
+            return
+        with self._stats_lock:
+            for key in self._image_retention_stats:
+                if published.get(key) is not None:
+                    self._image_retention_stats[key] = published[key]
+
+
 def cleanup_task(logger):
     logger.debug("Cleanup task for old logs triggered")
     try:
@@ -7,12 +7,12 @@ and writes them to InfluxDB for historical tracking and graph display.
 
 import threading
 from datetime import timedelta
-from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from django.utils import timezone
 
 from farminsight_dashboard_backend.models import FPF, EnergyConsumer, EnergySource
 from farminsight_dashboard_backend.services.influx_services import InfluxDBManager
+from farminsight_dashboard_backend.services.scheduler_runtime_services import SchedulerRuntime
 from farminsight_dashboard_backend.utils import get_logger
 
 logger = get_logger()
@@ -38,7 +38,7 @@ class EnergyDataCollector:
 
     def __init__(self):
         if not getattr(self, "_initialized", False):
-            self._scheduler = BackgroundScheduler()
+            self._scheduler = SchedulerRuntime.get_instance()
             self.log = get_logger()
             self._initialized = True
 
@@ -50,7 +50,9 @@ class EnergyDataCollector:
         :param interval_seconds: Collection interval in seconds (default: 300 = 5 min)
         """
         self._scheduler.add_job(
+            'EnergyDataCollector',
             self._collect_all_energy_data,
+            executor=SchedulerRuntime.IO,
             trigger=IntervalTrigger(seconds=interval_seconds),
             id="energy_data_collector",
             replace_existing=True,
@@ -61,7 +63,7 @@ class EnergyDataCollector:
 
     def stop(self):
         """Stop the energy data collector."""
-        self._scheduler.shutdown(wait=False)
+        self._scheduler.remove_jobs('EnergyDataCollector')
         self.log.info("EnergyDataCollector stopped.")
 
     def _collect_all_energy_data(self):
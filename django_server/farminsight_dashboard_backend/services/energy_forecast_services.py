@@ -78,27 +78,15 @@ def get_forecast_generation(fpf_id: str) -> Dict[str, List[Dict[str, Any]]]:
 
         for model in energy_models:
             try:
-                forecast_data = influx.fetch_latest_model_forecast(
+                # Only the "Battery State of Charge" forecast is used for the graph, not solar
+                forecasts = influx.fetch_model_forecast_series(
                     fpf_id=fpf_id,
                     model_id=str(model.id),
-                    hours=48  # Look back up to 48 hours for recent forecasts
+                    hours=48,  # Look back up to 48 hours for recent forecasts
+                    forecast_pattern='battery|soc'
                 )
 
-                if not forecast_data or 'data' not in forecast_data:
-                    continue
-
-                data = forecast_data.get('data', {})
-                forecasts = data.get('forecasts', [])
-
-                # Process each forecast in the model's data
-                # Only process "Battery State of Charge" forecast, not solar
                 for forecast in forecasts:
-                    forecast_name = forecast.get('name', '').lower()
-                    
-                    # Only process battery SoC data for the graph
-                    if 'battery' not in forecast_name and 'soc' not in forecast_name:
-                        continue
-                    
                     values = forecast.get('values', [])
 
                     for value_set in values:
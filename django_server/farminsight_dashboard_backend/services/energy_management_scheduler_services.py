@@ -1,6 +1,5 @@
 import threading
 from datetime import timedelta
-from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from django.utils import timezone
 from django.db import models
@@ -18,6 +17,7 @@ from farminsight_dashboard_backend.services.energy_source_services import (
     disconnect_grid
 )
 from farminsight_dashboard_backend.action_scripts.grid_connection_action_script import GridConnectionActionScript
+from farminsight_dashboard_backend.services.scheduler_runtime_services import SchedulerRuntime
 from farminsight_dashboard_backend.utils import get_logger
 
 logger = get_logger()
@@ -38,7 +38,7 @@ class EnergyManagementScheduler:
 
     def __init__(self):
         if not getattr(self, "_initialized", False):
-            self._scheduler = BackgroundScheduler()
+            self._scheduler = SchedulerRuntime.get_instance()
             self.log = get_logger()
             self._initialized = True
 
@@ -48,7 +48,9 @@ class EnergyManagementScheduler:
         Checks energy state every minute by default.
         """
         self._scheduler.add_job(
+            'EnergyManagementScheduler',
             self._check_energy_states,
+            executor=SchedulerRuntime.ACTUATOR,
             trigger=IntervalTrigger(seconds=interval_seconds),
             id="energy_management_check",
             replace_existing=True,
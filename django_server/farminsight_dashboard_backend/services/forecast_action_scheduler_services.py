@@ -1,19 +1,93 @@
+import hashlib
+import heapq
+import itertools
+import json
 import threading
-from datetime import timedelta, datetime
-from apscheduler.schedulers.background import BackgroundScheduler
+import time
+from datetime import timedelta, datetime, timezone as dt_timezone
+
 from apscheduler.triggers.date import DateTrigger
+from django.conf import settings
+from django.db import close_old_connections
 from django.utils import timezone
 from farminsight_dashboard_backend.models import ActionTrigger, ActionQueue
 from farminsight_dashboard_backend.services import process_action_queue
+from farminsight_dashboard_backend.services.scheduler_runtime_services import SchedulerRuntime
+from farminsight_dashboard_backend.services.scheduled_job_services import ScheduledJobStore
 from farminsight_dashboard_backend.utils import get_logger
 
 logger = get_logger()
 
 
+def _parse_timestamp(ts) -> datetime:
+    """
+    Accepts datetimes and ISO 8601 strings with "Z" or an offset, times without a timezone are UTC.
+    """
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=dt_timezone.utc)
+    return ts
+
+
+def infer_value_type_and_str(val):
+    if isinstance(val, bool):
+        return "boolean", str(val).lower()
+    if isinstance(val, int):
+        return "integer", str(val)
+    if isinstance(val, float):
+        return "float", str(val)
+    return "string", str(val)
+
+
+def forecast_dedupe_key(action_id, run_at: datetime, value_str: str) -> str:
+    """
+    Key of a forecast actuation, the same action with the same value at the same time is only scheduled once.
+    """
+    key = f"{action_id}|{run_at.astimezone(dt_timezone.utc).isoformat()}|{value_str}"
+    return hashlib.sha1(key.encode()).hexdigest()
+
+
+def compile_forecast_timeline(action, forecast_actions: list[dict], value_type: str = None) -> list[dict]:
+    """
+    Parse the forecast actions of one controllable action once into its timeline of upcoming actuations.
+    :param action: The ControllableAction.
+    :param forecast_actions: Entries like {"timestamp": "...", "value": 1.5}.
+    :param value_type: Value type of the triggers, inferred from the values by default.
+    :return: Upcoming entries sorted by time without duplicates, each with run_at, value_type, value and key.
+    """
+    now = timezone.now()
+    timeline = {}
+    for entry in forecast_actions:
+        try:
+            run_at = _parse_timestamp(entry.get("timestamp"))
+        except (TypeError, ValueError, AttributeError):
+            logger.warning(f"Could not parse timestamp '{entry.get('timestamp')}' for action '{action.name}'. Skipping.")
+            continue
+        if run_at <= now:
+            continue
+
+        inferred_type, value_str = infer_value_type_and_str(entry.get("value"))
+        key = forecast_dedupe_key(action.id, run_at, value_str)
+        timeline[key] = {"run_at": run_at, "value_type": value_type or inferred_type, "value": value_str, "key": key}
+    return sorted(timeline.values(), key=lambda e: e["run_at"])
+
+
 class ForecastActionScheduler:
+    """
+    Runs the forecast based actions of the models, implemented as a Singleton.
+    Every upcoming actuation is an active forecast ActionTrigger, so the timeline survives a restart. In memory the
+    actuations of all actions are kept in one min-heap by time. A single timer job on the SchedulerRuntime waits for
+    the earliest actuation, enqueues all due actions at once and is then armed for the next one.
+    Actuations overdue by more than SCHEDULED_JOB_MISFIRE_GRACE_SECONDS, e.g. after a downtime, are dropped.
+    """
     _instance = None
     _lock = threading.Lock()
 
+    OWNER = 'ForecastActionScheduler'
+    TIMER_JOB_ID = 'forecast_timeline'
+    VERSION_NAME = 'forecast_actions'
+
     @classmethod
     def get_instance(cls):
         with cls._lock:
@@ -21,128 +95,222 @@ class ForecastActionScheduler:
                 cls._instance = cls()
             return cls._instance
 
+    def __new__(cls, *args, **kwargs):
+        return super(ForecastActionScheduler, cls).__new__(cls)
+
     def __init__(self):
         if not getattr(self, "_initialized", False):
-            self._scheduler = BackgroundScheduler()
+            self._scheduler = SchedulerRuntime.get_instance()
+            self.misfire_grace_seconds = getattr(settings, 'SCHEDULED_JOB_MISFIRE_GRACE_SECONDS', 300)
+            self._heap_lock = threading.Lock()
+            # (run_at, sequence, trigger_id, action_id), entries whose trigger is not pending anymore are skipped
+            self._heap = []
+            self._pending = {}
+            self._sequence = itertools.count()
+            self._armed_at = None
             self._initialized = True
 
     def start(self):
-        """Start the scheduler and periodic cleanup task."""
+        """Load the stored timeline and start the periodic cleanup and sync tasks."""
         logger.info("Starting ForecastActionScheduler...")
+        self.load()
         self._scheduler.add_job(
+            self.OWNER,
             self.cleanup_old_forecast_triggers,
+            executor=SchedulerRuntime.CPU,
             trigger="interval",
             hours=6,  # cleanup every 6 hours
             id="cleanup_forecast_triggers",
             replace_existing=True,
         )
-        self._scheduler.start()
+        # Picks up the forecast actions scheduled by other processes
+        self._scheduler.add_job(
+            self.OWNER,
+            self.load,
+            executor=SchedulerRuntime.CPU,
+            trigger="interval",
+            seconds=getattr(settings, 'SCHEDULED_JOB_SYNC_SECONDS', 60),
+            id="forecast_timeline_sync",
+            replace_existing=True,
+        )
+        ScheduledJobStore.get_instance().watch(self.VERSION_NAME, self.load)
         logger.info("ForecastActionScheduler started successfully.")
 
-    def schedule_forecast_chain(self, action, forecast_actions: list[dict]):
+    def load(self):
         """
-        Schedule the next forecast action in the list.
-        If the list is empty, nothing is scheduled.
+        Add the active forecast triggers that are not in the timeline yet.
         """
-        logger.debug(f"Attempting to schedule forecast chain for action '{action.name}'.")
-        # Convert timestamps to datetime if needed
-        for entry in forecast_actions:
-            ts = entry.get("timestamp")
-            if isinstance(ts, str):
-                try:
-                    entry["timestamp"] = datetime.fromisoformat(ts.replace("Z", "+00:00"))
-                except Exception:
-                    logger.warning(f"Could not parse timestamp '{ts}' for action '{action.name}'. Using current time.")
-                    entry["timestamp"] = timezone.now()
+        close_old_connections()
+        with self._heap_lock:
+            known = set(self._pending)
+        entries = []
+        triggers = ActionTrigger.objects.filter(type="forecast", isActive=True).values_list('id', 'action_id', 'triggerLogic')
+        for trigger_id, action_id, trigger_logic in triggers:
+            if trigger_id in known:
+                continue
+            try:
+                entries.append((_parse_timestamp(json.loads(trigger_logic)["timestamp"]), trigger_id, action_id))
+            except (TypeError, ValueError, KeyError) as e:
+                logger.warning(f"Forecast trigger {trigger_id} has no valid timestamp: {e}")
+        if entries:
+            self._push(entries)
+            logger.debug(f"Loaded {len(entries)} forecast actions into the timeline.")
 
+    def schedule_forecast_timeline(self, action, forecast_actions: list[dict], replace: bool = True,
+                                   value_type: str = None, description: str = None, trigger_logic: dict = None,
+                                   source: str = None) -> int:
+        """
+        Schedule the upcoming forecast actions of one controllable action.
+        :param action: The ControllableAction.
+        :param forecast_actions: Entries like {"timestamp": "...", "value": 1.5}, past entries are ignored.
+        :param replace: Remove the upcoming forecast actions of the action from the same source that are not in
+            forecast_actions. Actions that are already due are kept.
+        :param value_type: Value type of the triggers, inferred from the values by default.
+        :param description: Description of the triggers.
+        :param trigger_logic: Additional information stored in the trigger logic of the triggers.
+        :param source: Source of the forecast actions, stored in the trigger logic, e.g. the model. Replacing only
+            removes the actions of this source and of triggers without a source.
+        :return: Number of newly scheduled actions.
+        """
+        started = time.perf_counter()
+        timeline = compile_forecast_timeline(action, forecast_actions, value_type)
+        trigger_logic = {**(trigger_logic or {}), **({"source": source} if source else {})}
+
+        existing = {}
+        replaceable = []
         now = timezone.now()
-        upcoming = []
-        for entry in forecast_actions:
-            ts = entry["timestamp"]
-            if ts.tzinfo is None:
-                ts = timezone.make_aware(ts, timezone=timezone.utc)
-            if ts > now:
-                upcoming.append(entry)
-
-        if not upcoming:
-            logger.debug(f"No upcoming forecast actions for '{action.name}'.")
-            return
+        triggers = ActionTrigger.objects.filter(action=action, type="forecast", isActive=True) \
+            .values_list('dedupeKey', 'id', 'triggerLogic')
+        for key, trigger_id, existing_logic in triggers:
+            existing[key] = trigger_id
+            try:
+                logic = json.loads(existing_logic)
+                run_at = _parse_timestamp(logic["timestamp"])
+            except (TypeError, ValueError, KeyError):
+                continue
+            if run_at > now and logic.get("source") in (None, trigger_logic.get("source")):
+                replaceable.append((key, trigger_id))
+        if replace:
+            keys = {entry["key"] for entry in timeline}
+            stale = [trigger_id for key, trigger_id in replaceable if key not in keys]
+            if stale:
+                ActionTrigger.objects.filter(id__in=stale).delete()
+                self._cancel(stale)
+                logger.debug(f"Removed {len(stale)} outdated forecast triggers for action '{action.name}'.")
 
-        # Sort by soonest timestamp
-        upcoming.sort(key=lambda e: e["timestamp"])
-        next_action = upcoming[0]
-        timestamp = next_action["timestamp"]
-        value = next_action["value"]
+        new_entries = [entry for entry in timeline if entry["key"] not in existing]
+        triggers = ActionTrigger.objects.bulk_create([
+            ActionTrigger(
+                type="forecast",
+                actionValueType=entry["value_type"],
+                actionValue=entry["value"],
+                triggerLogic=json.dumps({"timestamp": entry["run_at"].isoformat(), **trigger_logic}),
+                description=description or f"Forecast action for {action.name} at {entry['run_at']}",
+                isActive=True,
+                action=action,
+                dedupeKey=entry["key"],
+            )
+            for entry in new_entries
+        ])
+        self._push([(entry["run_at"], trigger.id, action.id) for entry, trigger in zip(new_entries, triggers)])
+        if triggers and not self._scheduler.running:
+            # Runs the actions in the leader
+            ScheduledJobStore.notify_change(self.VERSION_NAME)
 
-        # Remove existing forecast trigger for this action
-        deleted_count, _ = ActionTrigger.objects.filter(action=action, type="forecast").delete()
-        if deleted_count > 0:
-            logger.debug(f"Removed {deleted_count} existing forecast triggers for action '{action.name}'.")
+        if timeline:
+            logger.info(
+                f"Scheduled {len(triggers)} new forecast actions for '{action.name}' until {timeline[-1]['run_at']} "
+                f"in {(time.perf_counter() - started) * 1000:.1f}ms."
+            )
+        else:
+            logger.debug(f"No upcoming forecast actions for '{action.name}'.")
+        return len(triggers)
 
+    def _push(self, entries: list[tuple]):
+        with self._heap_lock:
+            for run_at, trigger_id, action_id in entries:
+                self._pending[trigger_id] = run_at
+                heapq.heappush(self._heap, (run_at, next(self._sequence), trigger_id, action_id))
+        self._arm()
 
-        # Create a one-shot forecast trigger
-        trigger = ActionTrigger.objects.create(
-            type="forecast",
-            actionValueType="float",
-            actionValue=str(value),
-            triggerLogic=f'{{"timestamp": "{timestamp.isoformat()}"}}',
-            description=f"Forecast action for {action.name} at {timestamp}",
-            isActive=True,
-            action=action
-        )
-        logger.debug(f"Created new forecast trigger for action '{action.name}'.")
+    def _cancel(self, trigger_ids: list):
+        with self._heap_lock:
+            for trigger_id in trigger_ids:
+                self._pending.pop(trigger_id, None)
 
+    def _arm(self):
+        """
+        Schedule the timer job at the earliest pending actuation.
+        """
+        with self._heap_lock:
+            while self._heap and self._pending.get(self._heap[0][2]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            next_run = self._heap[0][0] if self._heap else None
+            if next_run is None or next_run == self._armed_at:
+                return
+            self._armed_at = next_run
+        # Late actuations are dropped by _enqueue, so the timer itself always runs
         self._scheduler.add_job(
-            func=self._execute_forecast_action,
-            trigger=DateTrigger(run_date=timestamp),
-            args=[trigger.id, forecast_actions],
-            id=f"forecast_trigger_{action.id}",
+            self.OWNER,
+            self._run_due_actions,
+            executor=SchedulerRuntime.ACTUATOR,
+            trigger=DateTrigger(run_date=next_run),
+            id=self.TIMER_JOB_ID,
             replace_existing=True,
+            misfire_grace_time=None,
         )
 
-        logger.info(f"Scheduled forecast action '{action.name}' at {timestamp} (value={value}).")
+    def _run_due_actions(self):
+        """
+        Enqueue all due actions and arm the timer for the next one.
+        """
+        close_old_connections()
+        now = timezone.now()
+        due = []
+        with self._heap_lock:
+            self._armed_at = None
+            while self._heap and self._heap[0][0] <= now:
+                run_at, _, trigger_id, action_id = heapq.heappop(self._heap)
+                if self._pending.get(trigger_id) != run_at:
+                    continue
+                del self._pending[trigger_id]
+                due.append((run_at, trigger_id))
 
-    def _execute_forecast_action(self, trigger_id, forecast_actions):
-        """Executes a forecast action and schedules the next one."""
-        action_name = "unknown"
         try:
-            trigger = ActionTrigger.objects.get(id=trigger_id)
-            action = trigger.action
-            action_name = action.name
+            if due:
+                self._enqueue(due, now)
+        finally:
+            self._arm()
 
-            logger.info(f"Executing forecast action for '{action_name}'.")
+    def _enqueue(self, due: list[tuple], now: datetime):
+        triggers = ActionTrigger.objects.filter(isActive=True).select_related('action') \
+            .in_bulk([trigger_id for _, trigger_id in due])
+        grace = timedelta(seconds=self.misfire_grace_seconds)
+        enqueued = 0
+        for run_at, trigger_id in due:
+            trigger = triggers.get(trigger_id)
+            # Deleted or deactivated in the meantime
+            if trigger is None:
+                continue
+            if now - run_at > grace:
+                logger.warning(f"Dropped forecast action for '{trigger.action.name}', it was due at {run_at.isoformat()}.")
+                continue
+            ActionQueue.objects.create(action=trigger.action, trigger=trigger)
+            logger.info(f"Executing forecast action for '{trigger.action.name}' (value={trigger.actionValue}).")
+            enqueued += 1
 
-            # Add to queue and execute
-            ActionQueue.objects.create(action=action, trigger=trigger)
+        ActionTrigger.objects.filter(id__in=list(triggers)).update(isActive=False)
+        if enqueued:
             process_action_queue()
-            logger.debug(f"Action '{action_name}' added to queue and processed.")
-
-            trigger.isActive = False
-            trigger.save(update_fields=["isActive"])
-
-            # Schedule the next one (chain)
-            now_time = timezone.now()
-            remaining = []
-
-            for f in forecast_actions:
-                ts = f["timestamp"]
-
-                if ts.tzinfo is None:
-                    ts = timezone.make_aware(ts, timezone=timezone.utc)
-
-                if ts > now_time:
-                    remaining.append(f)
-
-            if remaining:
-                logger.debug(f"Found {len(remaining)} remaining forecast actions for '{action_name}'. Scheduling next one.")
-                self.schedule_forecast_chain(action, remaining)
-            else:
-                logger.debug(f"No more forecast actions to schedule for '{action_name}'.")
 
-        except ActionTrigger.DoesNotExist:
-            logger.error(f"Forecast action trigger not found. It might have been deleted.")
-        except Exception as e:
-            logger.error(f"Error executing forecast action for '{action_name}': {e}")
+    def get_stats(self) -> dict:
+        with self._heap_lock:
+            next_run = min(self._pending.values()) if self._pending else None
+            return {
+                "pending": len(self._pending),
+                "heapSize": len(self._heap),
+                "nextRunTime": next_run.isoformat() if next_run else None,
+            }
 
     def cleanup_old_forecast_triggers(self):
         """Remove old or inactive forecast triggers (older than 2 days)."""
@@ -1,6 +1,6 @@
 import threading
-from apscheduler.schedulers.background import BackgroundScheduler
 from farminsight_dashboard_backend.utils import get_logger
+from farminsight_dashboard_backend.services.scheduler_runtime_services import SchedulerRuntime
 from farminsight_dashboard_backend.services.fpf_health_services import check_all_fpf_health
 
 
@@ -20,15 +20,14 @@ class FPFHealthScheduler:
 
     def __init__(self):
         if not getattr(self, "_initialized", False):
-            self.scheduler = BackgroundScheduler()
+            self.scheduler = SchedulerRuntime.get_instance()
             self.logger = get_logger()
             self._initialized = True
 
     def start(self):
         self.logger.info("Starting FPF Health Scheduler.")
         # Run every 5 minutes
-        self.scheduler.add_job(self.run_check, 'interval', seconds=300)
-        self.scheduler.start()
+        self.scheduler.add_job('FPFHealthScheduler', self.run_check, executor=SchedulerRuntime.IO, trigger='interval', seconds=300, id="fpf_health_check", replace_existing=True)
 
     def run_check(self):
         try:
@@ -39,4 +38,4 @@ class FPFHealthScheduler:
 
     def stop(self):
         self.logger.info("Stopping FPF Health Scheduler.")
-        self.scheduler.shutdown()
\ No newline at end of file
+        self.scheduler.remove_jobs('FPFHealthScheduler')
\ No newline at end of file
@@ -3,20 +3,23 @@ import base64
 from typing import Optional
 import cv2
 from channels.layers import get_channel_layer
-from farminsight_dashboard_backend.utils import get_logger
+from farminsight_dashboard_backend.utils import get_logger, LivestreamFrameBuffer
 
 logger = get_logger()
 
 async def websocket_stream(livestream_url: str,
                            groupname: str,
                            max_fps: int = 30,
-                           stop_event: Optional[asyncio.Event] = None) -> None:
+                           stop_event: Optional[asyncio.Event] = None,
+                           camera_id: Optional[str] = None) -> None:
     """
     Read frames from livestream_url in a thread pool, encode them as JPEG + base64
     and send them to the given channels group_name via channel_layer.group_send.
+    With a camera_id the latest JPEG is also kept in the LivestreamFrameBuffer for the snapshots of the camera.
     """
     loop = asyncio.get_event_loop()
     channel_layer = get_channel_layer()
+    frame_buffer = LivestreamFrameBuffer.get_instance() if camera_id else None
     frame_interval = 1.0 / 30
 
     # open VideoCapture in the Executor
@@ -60,10 +63,12 @@ async def websocket_stream(livestream_url: str,
             if not encode_result or not encode_result[0]:
                 last_time = now
                 continue
-            jpeg = encode_result[1]
+            jpeg = encode_result[1].tobytes()
+            if frame_buffer is not None:
+                await frame_buffer.put(camera_id, jpeg)
 
             # Bytes -> base64
-            b64 = base64.b64encode(jpeg.tobytes()).decode('ascii')
+            b64 = base64.b64encode(jpeg).decode('ascii')
 
             # Send to channel layer
             if channel_layer is not None:
@@ -78,6 +83,8 @@ async def websocket_stream(livestream_url: str,
         logger.error(f"Error in websocket_stream: {e}")
     finally:
         logger.info(f"Releasing VideoCapture for stream {livestream_url}")
+        if frame_buffer is not None:
+            await loop.run_in_executor(None, frame_buffer.remove, camera_id)
         await loop.run_in_executor(None, cap.release)
 
 
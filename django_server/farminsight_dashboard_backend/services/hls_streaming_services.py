@@ -0,0 +1,322 @@
+import atexit
+import fcntl
+import os
+import re
+import shutil
+import subprocess
+import threading
+import time
+import uuid
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.core import signing
+from django.db import connections
+
+from farminsight_dashboard_backend.models import Camera
+from farminsight_dashboard_backend.services.camera_services import trigger_camera_plug, release_camera_plug
+from farminsight_dashboard_backend.utils import get_logger
+
+# Files of a stream that may be requested: the playlist, the init segment and the media segments
+_STREAM_FILE_PATTERN = re.compile(r'^(index\.m3u8|[0-9a-f]{8}_(init\.mp4|\d+\.m4s))$')
+
+
+class _HlsEncoder:
+    def __init__(self, camera_id: str, process: subprocess.Popen, lock_file):
+        self.camera_id = camera_id
+        self.process = process
+        self.lock_file = lock_file
+        self.started_at = time.monotonic()
+
+
+class HlsStreamingManager:
+    """
+    Livestreams as HLS with fMP4 segments, an alternative to the JPEG frames over WebSocket, implemented as a Singleton.
+    One ffmpeg process per camera remuxes or transcodes the livestream into a ring of HLS_PLAYLIST_SEGMENTS segments
+    of HLS_SEGMENT_SECONDS in HLS_DIR, any number of viewers are served the same files.
+    Like the WebsocketStreamingManager, the encoder and the smart plug of the camera are started with the first viewer
+    and stopped when no viewer requested the playlist for HLS_VIEWER_TIMEOUT_SECONDS. They are started on a background
+    thread, the playlist requests never wait for the plug or the encoder.
+    Segments are requested with a segment token signed for the camera, valid for HLS_SEGMENT_TOKEN_SECONDS, so the
+    playlist never contains the credentials of the viewer.
+    The encoder of a camera runs in one process only, guarded by a file lock, the other server processes serve its files.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    SEGMENT_TOKEN_SALT = 'hls-segment'
+
+    @classmethod
+    def get_instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __new__(cls, *args, **kwargs):
+        return super(HlsStreamingManager, cls).__new__(cls)
+
+    def __init__(self):
+        if not getattr(self, "_initialized", False):
+            self.log = get_logger()
+            self.hls_dir = getattr(settings, 'HLS_DIR', '/tmp/farminsight-hls')
+            self.segment_seconds = getattr(settings, 'HLS_SEGMENT_SECONDS', 2)
+            self.playlist_segments = getattr(settings, 'HLS_PLAYLIST_SEGMENTS', 6)
+            self.viewer_timeout_seconds = getattr(settings, 'HLS_VIEWER_TIMEOUT_SECONDS', 30)
+            self.start_timeout_seconds = getattr(settings, 'HLS_START_TIMEOUT_SECONDS', 15)
+            self.segment_token_seconds = getattr(settings, 'HLS_SEGMENT_TOKEN_SECONDS', 60)
+            self._encoders = {}
+            # IDs of the cameras whose plug and encoder are being started on a background thread
+            self._starting = set()
+            self._encoders_lock = threading.Lock()
+            self._reaper = None
+            # ffmpeg would keep running without the server
+            atexit.register(self._terminate_encoders)
+            self._initialized = True
+
+    def get_playlist(self, camera: Camera) -> str | None:
+        """
+        The current playlist of the camera, starts the encoder in the background if the camera is not streamed yet.
+        Every call counts as a viewer of the stream.
+        :param camera: The camera
+        :return: The content of the playlist, None while the stream is still starting.
+        :raises TimeoutError: If the encoder did not write a playlist within HLS_START_TIMEOUT_SECONDS.
+        :raises ConnectionError: If the encoder exited, e.g. because the livestream URL could not be opened.
+        """
+        camera_id = str(camera.id)
+        os.makedirs(self.hls_dir, exist_ok=True)
+        self._touch_heartbeat(camera_id)
+        self._ensure_encoder(camera)
+
+        try:
+            with open(os.path.join(self._directory(camera_id), 'index.m3u8')) as f:
+                return f.read()
+        except FileNotFoundError:
+            pass
+
+        with self._encoders_lock:
+            encoder = self._encoders.get(camera_id)
+        # Still switching the plug on, or the encoder runs in another process
+        if encoder is None:
+            return None
+        if encoder.process.poll() is not None:
+            raise ConnectionError(f"The livestream of camera {camera_id} could not be opened.")
+        if time.monotonic() - encoder.started_at >= self.start_timeout_seconds:
+            raise TimeoutError(f"The livestream of camera {camera_id} did not start within {self.start_timeout_seconds} seconds.")
+        return None
+
+    def create_segment_token(self, camera_id) -> str:
+        """
+        :param camera_id: ID of the camera
+        :return: Token for the segments of the camera, valid for HLS_SEGMENT_TOKEN_SECONDS.
+        """
+        return signing.TimestampSigner(salt=self.SEGMENT_TOKEN_SALT).sign(str(camera_id))
+
+    def is_valid_segment_token(self, camera_id, token: str) -> bool:
+        try:
+            signed_camera_id = signing.TimestampSigner(salt=self.SEGMENT_TOKEN_SALT).unsign(
+                token, max_age=self.segment_token_seconds
+            )
+        except signing.BadSignature:
+            return False
+        return signed_camera_id == str(camera_id)
+
+    def is_viewed(self, camera_id) -> bool:
+        """
+        :param camera_id: ID of the camera
+        :return: True if the playlist of the camera was requested within HLS_VIEWER_TIMEOUT_SECONDS by any process.
+        """
+        try:
+            return time.time() - os.path.getmtime(self._heartbeat_path(str(camera_id))) < self.viewer_timeout_seconds
+        except OSError:
+            return False
+
+    def get_file_path(self, camera_id, name: str) -> str | None:
+        """
+        :param camera_id: ID of the camera
+        :param name: File name from the playlist
+        :return: Path of the init or media segment, None if the name is invalid or the segment left the ring.
+        """
+        if not _STREAM_FILE_PATTERN.match(name) or name == 'index.m3u8':
+            return None
+        path = os.path.join(self._directory(str(camera_id)), name)
+        return path if os.path.isfile(path) else None
+
+    def stop(self, camera_id, switch_plug_off: bool = True):
+        """
+        Stop the encoder of the camera and switch its smart plug off, unless the camera is still used otherwise.
+        :param camera_id: ID of the camera
+        :param switch_plug_off: False to leave the plug on, e.g. when the encoder is restarted
+        """
+        camera_id = str(camera_id)
+        with self._encoders_lock:
+            encoder = self._encoders.pop(camera_id, None)
+        if encoder is None:
+            return
+
+        if encoder.process.poll() is None:
+            encoder.process.terminate()
+            try:
+                encoder.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                encoder.process.kill()
+                encoder.process.wait()
+        shutil.rmtree(self._directory(camera_id), ignore_errors=True)
+        # Releases the file lock
+        encoder.lock_file.close()
+        self.log.info(f"HLS livestream of camera {camera_id} stopped.")
+
+        if not switch_plug_off:
+            return
+        # Viewers of other processes touch it again with their next request
+        self._remove_heartbeat(camera_id)
+        try:
+            release_camera_plug(camera_id, 'hls')
+        except Exception as e:
+            self.log.error(f"Failed to turn off camera plug: {e}")
+
+    def stop_all(self):
+        with self._encoders_lock:
+            camera_ids = list(self._encoders)
+        for camera_id in camera_ids:
+            self.stop(camera_id)
+
+    def _terminate_encoders(self):
+        with self._encoders_lock:
+            for encoder in self._encoders.values():
+                if encoder.process.poll() is None:
+                    encoder.process.terminate()
+
+    def get_stats(self) -> dict:
+        with self._encoders_lock:
+            return {
+                camera_id: {'running': encoder.process.poll() is None, 'uptimeSeconds': int(time.monotonic() - encoder.started_at)}
+                for camera_id, encoder in self._encoders.items()
+            }
+
+    def _ensure_encoder(self, camera: Camera):
+        camera_id = str(camera.id)
+        with self._encoders_lock:
+            encoder = self._encoders.get(camera_id)
+            if (encoder is not None and encoder.process.poll() is None) or camera_id in self._starting:
+                return
+            self._starting.add(camera_id)
+        threading.Thread(
+            target=self._start_encoder, args=(camera, encoder), name=f'hls-start-{camera_id}', daemon=True
+        ).start()
+
+    def _start_encoder(self, camera: Camera, exited_encoder: _HlsEncoder | None):
+        camera_id = str(camera.id)
+        try:
+            if exited_encoder is not None:
+                self.log.warning(f"HLS encoder of camera {camera_id} exited with code {exited_encoder.process.returncode}, restarting.")
+                self.stop(camera_id, switch_plug_off=False)
+            self._start_encoder_process(camera)
+        except Exception as e:
+            self.log.error(f"Failed to start the HLS livestream of camera {camera_id}: {e}")
+        finally:
+            with self._encoders_lock:
+                self._starting.discard(camera_id)
+            connections.close_all()
+
+    def _start_encoder_process(self, camera: Camera):
+        camera_id = str(camera.id)
+        lock_file = open(os.path.join(self.hls_dir, f"{camera_id}.lock"), 'w')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            # Another server process runs the encoder of this camera
+            lock_file.close()
+            return
+
+        try:
+            trigger_camera_plug(camera_id, "On")
+        except Exception as e:
+            self.log.error(f"Failed to turn on camera plug: {e}")
+
+        with self._encoders_lock:
+            directory = self._directory(camera_id)
+            shutil.rmtree(directory, ignore_errors=True)
+            os.makedirs(directory)
+            self._touch_heartbeat(camera_id)
+            try:
+                process = subprocess.Popen(
+                    self._ffmpeg_command(camera.livestreamUrl, directory),
+                    stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                )
+            except OSError:
+                lock_file.close()
+                raise
+            self._encoders[camera_id] = _HlsEncoder(camera_id, process, lock_file)
+            self.log.info(f"HLS livestream of camera {camera_id} started.")
+            self._start_reaper()
+
+    def _ffmpeg_command(self, livestream_url: str, directory: str) -> list[str]:
+        # Segment names are unique per run, so a cached segment of an earlier run is never served for a new one
+        run = uuid.uuid4().hex[:8]
+        scheme = urlparse(livestream_url).scheme.lower()
+        command = [getattr(settings, 'FFMPEG_BINARY', 'ffmpeg'), '-nostdin', '-loglevel', 'error']
+        if scheme in ('rtsp', 'rtsps'):
+            command += ['-rtsp_transport', 'tcp']
+        command += ['-i', livestream_url, '-an']
+
+        codec = getattr(settings, 'HLS_VIDEO_CODEC', 'auto')
+        if codec == 'copy' or (codec == 'auto' and scheme in ('rtsp', 'rtsps')):
+            # RTSP cameras deliver H.264, which fits into the segments as it is
+            command += ['-c:v', 'copy']
+        else:
+            command += [
+                '-c:v', 'libx264', '-preset', 'veryfast', '-tune', 'zerolatency', '-pix_fmt', 'yuv420p',
+                '-force_key_frames', f"expr:gte(t,n_forced*{self.segment_seconds})",
+            ]
+
+        command += [
+            '-f', 'hls',
+            '-hls_time', str(self.segment_seconds),
+            '-hls_list_size', str(self.playlist_segments),
+            '-hls_segment_type', 'fmp4',
+            '-hls_fmp4_init_filename', f"{run}_init.mp4",
+            '-hls_segment_filename', os.path.join(directory, f"{run}_%d.m4s"),
+            '-hls_flags', 'delete_segments+independent_segments+omit_endlist+temp_file',
+            os.path.join(directory, 'index.m3u8'),
+        ]
+        return command
+
+    def _start_reaper(self):
+        if self._reaper is None or not self._reaper.is_alive():
+            self._reaper = threading.Thread(target=self._reap, name='hls-reaper', daemon=True)
+            self._reaper.start()
+
+    def _reap(self):
+        while True:
+            time.sleep(max(self.viewer_timeout_seconds / 4, 1))
+            with self._encoders_lock:
+                camera_ids = list(self._encoders)
+            if not camera_ids:
+                return
+            for camera_id in camera_ids:
+                try:
+                    idle_seconds = time.time() - os.path.getmtime(self._heartbeat_path(camera_id))
+                except OSError:
+                    idle_seconds = self.viewer_timeout_seconds
+                if idle_seconds >= self.viewer_timeout_seconds:
+                    self.log.debug(f"No viewer of the HLS livestream of camera {camera_id} for {int(idle_seconds)} seconds.")
+                    self.stop(camera_id)
+            connections.close_all()
+
+    def _directory(self, camera_id: str) -> str:
+        return os.path.join(self.hls_dir, camera_id)
+
+    def _heartbeat_path(self, camera_id: str) -> str:
+        # Touched by every playlist request of any server process, outside the directory that is cleared on start
+        return os.path.join(self.hls_dir, f"{camera_id}.viewed")
+
+    def _touch_heartbeat(self, camera_id: str):
+        with open(self._heartbeat_path(camera_id), 'a'):
+            os.utime(self._heartbeat_path(camera_id))
+
+    def _remove_heartbeat(self, camera_id: str):
+        try:
+            os.remove(self._heartbeat_path(camera_id))
+        except OSError:
+            pass
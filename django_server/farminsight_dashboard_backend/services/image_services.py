@@ -1,5 +1,21 @@
-from farminsight_dashboard_backend.models import Image
+import hashlib
+import io
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from PIL import Image as PILImage
+
+from farminsight_dashboard_backend.models import Image, Camera
+from farminsight_dashboard_backend.models.image import image_upload_path
 from farminsight_dashboard_backend.serializers import ImageURLSerializer
+from farminsight_dashboard_backend.utils import get_logger
+
+logger = get_logger()
 
 
 def get_images_by_camera(camera_id, from_date, to_date=None) -> ImageURLSerializer:
@@ -15,3 +31,177 @@ def get_images_by_camera(camera_id, from_date, to_date=None) -> ImageURLSerializ
     if to_date:
         images = images.filter(measuredAt__lte=to_date)
     return ImageURLSerializer(images.order_by('-measuredAt'), many=True)
+
+
+def compute_perceptual_hash(content: bytes) -> str | None:
+    """
+    Difference hash of the image: the brightness gradients of a 9x8 grayscale thumbnail as 64 bit hex string.
+    :return: The hash, None if the content is no readable image.
+    """
+    try:
+        with PILImage.open(io.BytesIO(content)) as image:
+            pixels = list(image.convert('L').resize((9, 8), PILImage.Resampling.BILINEAR).getdata())
+    except Exception:
+        return None
+    bits = 0
+    for row in range(8):
+        for column in range(8):
+            bits = (bits << 1) | (pixels[row * 9 + column] < pixels[row * 9 + column + 1])
+    return f"{bits:016x}"
+
+
+def perceptual_hash_distance(hash_a: str, hash_b: str) -> int:
+    return bin(int(hash_a, 16) ^ int(hash_b, 16)).count('1')
+
+
+def store_image_content(image: Image, content: bytes) -> str:
+    """
+    Store the content for the image unless a file with the same content of the camera exists already.
+    Sets contentHash and the name of the file, does not save the image.
+    :param image: Image with camera and measuredAt set
+    :param content: The JPEG
+    :return: The name of the file in the storage
+    """
+    image.contentHash = hashlib.sha256(content).hexdigest()
+    existing = Image.objects.filter(camera_id=image.camera_id, contentHash=image.contentHash) \
+        .exclude(pk=image.pk).values_list('image', flat=True).first()
+    if existing and default_storage.exists(existing):
+        image.image.name = existing
+        return existing
+
+    name = image_upload_path(image, None)
+    if not default_storage.exists(name):
+        name = default_storage.save(name, ContentFile(content))
+    image.image.name = name
+    return name
+
+
+def save_camera_image(camera_id, content: bytes, measured_at=None) -> Image:
+    """
+    Save a snapshot of the camera. Byte-identical snapshots of the camera share one file. With
+    IMAGE_PERCEPTUAL_DEDUP, a snapshot that looks like the previous one of the camera (at most
+    IMAGE_PERCEPTUAL_DEDUP_DISTANCE bits of the perceptual hash differ) shares the file of the previous one,
+    e.g. the frames at night. Every snapshot gets its own Image, so the timeline of the camera stays complete.
+    :param camera_id: ID of the camera
+    :param content: The JPEG
+    :param measured_at: Time of the snapshot, now by default
+    :return: The saved image
+    """
+    image = Image(camera_id=camera_id, measuredAt=measured_at or timezone.now())
+
+    if getattr(settings, 'IMAGE_PERCEPTUAL_DEDUP', False):
+        image.perceptualHash = compute_perceptual_hash(content)
+        previous = Image.objects.filter(camera_id=camera_id, measuredAt__lte=image.measuredAt) \
+            .order_by('-measuredAt').only('image', 'contentHash', 'perceptualHash').first()
+        if image.perceptualHash and previous is not None and previous.perceptualHash and previous.contentHash \
+                and perceptual_hash_distance(image.perceptualHash, previous.perceptualHash) <= getattr(settings, 'IMAGE_PERCEPTUAL_DEDUP_DISTANCE', 2) \
+                and default_storage.exists(previous.image.name):
+            # The hashes of the shared file, so a slow change is compared to what is stored and not frame by frame
+            image.image.name = previous.image.name
+            image.contentHash = previous.contentHash
+            image.perceptualHash = previous.perceptualHash
+            image.save()
+            logger.debug(f"Snapshot of camera {camera_id} is a near duplicate of the previous one, sharing its file.")
+            return image
+
+    store_image_content(image, content)
+    image.save()
+    return image
+
+
+def delete_images(image_ids: list) -> tuple[int, int]:
+    """
+    Delete the images and their files. A file is deleted once no image refers to it anymore, as images with the
+    same content share their file.
+    :param image_ids: IDs of the images to delete
+    :return: Number of deleted images and the bytes reclaimed on the storage
+    """
+    with transaction.atomic():
+        names = set(Image.objects.filter(id__in=image_ids).values_list('image', flat=True))
+        deleted, _ = Image.objects.filter(id__in=image_ids).delete()
+        still_used = set(Image.objects.filter(image__in=names).values_list('image', flat=True))
+
+    # The rows are deleted first, a failing file deletion leaves an orphaned file but never an image without file
+    reclaimed_bytes = 0
+    for name in names - still_used:
+        try:
+            size = default_storage.size(name)
+            default_storage.delete(name)
+            reclaimed_bytes += size
+        except OSError as e:
+            logger.warning(f"Could not delete image file {name}: {e}")
+    return deleted, reclaimed_bytes
+
+
+def apply_image_retention(camera: Camera, chunk_size: int = 500) -> tuple[int, int]:
+    """
+    Thin out the images of the camera according to its retention policy: all images of the last keepAllImagesDays,
+    the first image of every hour up to keepHourlyImagesDays, the first image of every day before that, nothing older
+    than keepDailyImagesDays. A tier that is not set lasts forever, cameras without keepAllImagesDays keep all images.
+    The images are read and deleted in chunks of chunk_size.
+    :param camera: The camera
+    :param chunk_size: Number of images per query and per deletion
+    :return: Number of deleted images and the bytes reclaimed on the storage
+    """
+    if camera.keepAllImagesDays is None:
+        return 0, 0
+
+    now = timezone.now()
+    keep_all_days = camera.keepAllImagesDays
+    keep_hourly_days = max(camera.keepHourlyImagesDays, keep_all_days) if camera.keepHourlyImagesDays is not None else None
+    keep_all_before = now - timedelta(days=keep_all_days)
+    images = Image.objects.filter(camera_id=camera.id)
+
+    deleted = 0
+    reclaimed_bytes = 0
+
+    if camera.keepDailyImagesDays is not None:
+        expired_before = now - timedelta(days=max(camera.keepDailyImagesDays, keep_hourly_days or keep_all_days))
+        while True:
+            expired = list(images.filter(measuredAt__lt=expired_before).values_list('id', flat=True)[:chunk_size])
+            if not expired:
+                break
+            chunk_deleted, chunk_reclaimed = delete_images(expired)
+            deleted += chunk_deleted
+            reclaimed_bytes += chunk_reclaimed
+
+    def bucket_of_day(measured_at):
+        return timezone.localtime(measured_at).date()
+
+    def bucket_of_hour(measured_at):
+        local = timezone.localtime(measured_at)
+        return local.date(), local.hour
+
+    tiers = [(keep_all_before, bucket_of_hour)]
+    if keep_hourly_days is not None:
+        tiers.insert(0, (now - timedelta(days=keep_hourly_days), bucket_of_day))
+    for before, bucket_of in tiers:
+        last_bucket = None
+        last_key = None
+        to_delete = []
+        while True:
+            chunk = images.filter(measuredAt__lt=before)
+            if last_key is not None:
+                chunk = chunk.filter(Q(measuredAt__gt=last_key[0]) | Q(measuredAt=last_key[0], id__gt=last_key[1]))
+            chunk = list(chunk.order_by('measuredAt', 'id').values_list('measuredAt', 'id')[:chunk_size])
+            if not chunk:
+                break
+            for measured_at, image_id in chunk:
+                bucket = bucket_of(measured_at)
+                if bucket == last_bucket:
+                    to_delete.append(image_id)
+                last_bucket = bucket
+            last_key = chunk[-1]
+
+            if len(to_delete) >= chunk_size:
+                chunk_deleted, chunk_reclaimed = delete_images(to_delete)
+                deleted += chunk_deleted
+                reclaimed_bytes += chunk_reclaimed
+                to_delete = []
+
+        if to_delete:
+            chunk_deleted, chunk_reclaimed = delete_images(to_delete)
+            deleted += chunk_deleted
+            reclaimed_bytes += chunk_reclaimed
+
+    return deleted, reclaimed_bytes
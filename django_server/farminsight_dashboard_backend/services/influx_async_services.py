@@ -0,0 +1,146 @@
+import asyncio
+import threading
+import weakref
+
+from influxdb_client.client.influxdb_client_async import InfluxDBClientAsync
+
+from farminsight_dashboard_backend.exceptions import InfluxDBNoConnectionException, InfluxDBQueryException
+from farminsight_dashboard_backend.services.influx_connection_services import is_transport_error
+from farminsight_dashboard_backend.services.influx_services import InfluxDBManager, _sensor_measurements_query, \
+    _parse_sensor_measurements, _latest_sensor_measurements_query, _parse_latest_sensor_measurements, \
+    _last_weather_forecast_query, _parse_weather_forecasts, _energy_query, _parse_energy_balance, \
+    _latest_battery_level_query, _parse_latest_battery_level
+from farminsight_dashboard_backend.services.measurement_cache_services import MeasurementChunkCache
+
+
+class AsyncInfluxDBManager:
+    """
+    Async counterpart of the InfluxDBManager for consumers and async views, implemented as a Singleton.
+    Queries are awaitable and can run concurrently with asyncio.gather without occupying sync_to_async threads.
+    One InfluxDBClientAsync (with its own aiohttp connection pool) is kept per event loop, as aiohttp sessions are
+    bound to the loop they were created on. The circuit breaker is shared with the InfluxDBManager.
+    Only reading is supported, writes go through the InfluxDBManager.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __new__(cls, *args, **kwargs):
+        return super(AsyncInfluxDBManager, cls).__new__(cls)
+
+    def __init__(self):
+        if not getattr(self, "_initialized", False):
+            self.connection = InfluxDBManager.get_instance().connection
+            self._clients = weakref.WeakKeyDictionary()
+            self._initialized = True
+
+    def _get_client(self) -> InfluxDBClientAsync:
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            client = InfluxDBClientAsync(
+                url=self.connection.influxdb_settings['url'],
+                token=self.connection.influxdb_settings['token'],
+                org=self.connection.influxdb_settings['org'],
+                timeout=self.connection.timeout_ms,
+                connection_pool_maxsize=self.connection.pool_size,
+            )
+            self._clients[loop] = client
+        return client
+
+    async def _acquire(self) -> InfluxDBClientAsync:
+        ready = self.connection.try_acquire()
+        client = self._get_client()
+        if not ready:
+            try:
+                healthy = await client.ping()
+                error = None if healthy else 'InfluxDB is not reachable.'
+            except Exception as e:
+                healthy = False
+                error = str(e)
+            if not self.connection.record_health_check(healthy, error, notify=False):
+                raise InfluxDBNoConnectionException("No valid InfluxDB connection available.")
+        return client
+
+    async def query(self, query: str):
+        """
+        Executes a flux query.
+        :param query: The flux query.
+        :return: The resulting flux tables.
+        """
+        client = await self._acquire()
+        try:
+            result = await client.query_api().query(query=query, org=self.connection.influxdb_settings['org'])
+        except Exception as e:
+            if is_transport_error(e):
+                self.connection.record_transport_error(e)
+                raise InfluxDBNoConnectionException(f"Unable to connect to InfluxDB: {e}")
+            raise InfluxDBQueryException(str(e))
+        self.connection.record_success(notify=False)
+        return result
+
+    async def fetch_sensor_measurements(self, fpf_id: str, sensor_ids: list, from_date: str, to_date: str) -> dict:
+        """
+        Returns measurements within the given date range for multiple sensors, see InfluxDBManager.fetch_sensor_measurements.
+        :param fpf_id: The ID of the FPF (used as the bucket name in InfluxDB).
+        :param sensor_ids: List of sensor IDs to query data for.
+        :param from_date: Start date in ISO 8601 format.
+        :param to_date: End date in ISO 8601 format.
+        :return: Dictionary with sensor IDs as keys, each containing a list of measurements.
+        """
+        async def query(ids, start, stop):
+            result = await self.query(_sensor_measurements_query(fpf_id, ids, start, stop))
+            return _parse_sensor_measurements(result, ids)
+
+        return await MeasurementChunkCache.get_instance().afetch(fpf_id, sensor_ids, from_date, to_date, query)
+
+    async def fetch_latest_sensor_measurements(self, fpf_id: str, sensor_ids: list) -> dict:
+        """
+        :param fpf_id: The ID of the FPF (used as the bucket name in InfluxDB).
+        :param sensor_ids: List of sensor IDs to query data for.
+        :return: Dictionary with sensor IDs as keys, each containing the latest measurement.
+        """
+        result = await self.query(_latest_sensor_measurements_query(fpf_id, sensor_ids))
+        return _parse_latest_sensor_measurements(result)
+
+    async def fetch_last_weather_forcast(self, orga_id: str, location_id: str) -> list:
+        """
+        :param orga_id: The ID of the organization (used as the bucket name in InfluxDB).
+        :param location_id: The ID of the location.
+        :return: List of the latest weather forecasts of the location.
+        """
+        result = await self.query(_last_weather_forecast_query(orga_id, location_id))
+        return _parse_weather_forecasts(result)
+
+    async def fetch_energy_balance(self, fpf_id: str, from_date: str, to_date: str) -> dict:
+        """
+        :param fpf_id: The ID of the FPF (bucket name).
+        :param from_date: Start date in ISO 8601 format.
+        :param to_date: End date in ISO 8601 format.
+        :return: Dictionary with consumption and production data.
+        """
+        consumption_result, production_result = await asyncio.gather(
+            self.query(_energy_query(fpf_id, "EnergyConsumption", from_date, to_date)),
+            self.query(_energy_query(fpf_id, "EnergyProduction", from_date, to_date)),
+        )
+        return _parse_energy_balance(fpf_id, from_date, to_date, consumption_result, production_result)
+
+    async def fetch_latest_battery_level(self, fpf_id: str):
+        """
+        :param fpf_id: The ID of the FPF (bucket name).
+        :return: Dictionary with battery level data or None.
+        """
+        result = await self.query(_latest_battery_level_query(fpf_id))
+        return _parse_latest_battery_level(result)
+
+    async def close(self):
+        """Close the client of the running event loop."""
+        client = self._clients.pop(asyncio.get_running_loop(), None)
+        if client is not None:
+            await client.close()
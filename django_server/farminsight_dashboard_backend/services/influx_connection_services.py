@@ -0,0 +1,232 @@
+import threading
+import time
+from typing import Callable, Optional
+
+import aiohttp
+import requests
+import urllib3
+from django.conf import settings
+from influxdb_client import InfluxDBClient
+from influxdb_client.client.write_api import SYNCHRONOUS
+from influxdb_client.rest import ApiException
+
+from farminsight_dashboard_backend.exceptions import InfluxDBNoConnectionException, InfluxDBQueryException, InfluxDBWriteException
+from farminsight_dashboard_backend.utils import get_logger
+
+# HTTP status codes that mean the server (or a proxy in front of it) is unavailable rather than the request being wrong
+TRANSPORT_ERROR_STATUS_CODES = {429, 502, 503, 504}
+
+
+def is_transport_error(e: Exception) -> bool:
+    """
+    Distinguish errors of the connection to InfluxDB from errors of a single query or write.
+    :param e: The raised exception.
+    :return: True if InfluxDB was not reachable or not available.
+    """
+    if isinstance(e, ApiException):
+        return e.status is None or e.status in TRANSPORT_ERROR_STATUS_CODES
+    return isinstance(e, (
+        urllib3.exceptions.HTTPError, requests.exceptions.ConnectionError, aiohttp.ClientConnectionError,
+        ConnectionError, TimeoutError
+    ))
+
+
+class InfluxConnection:
+    """
+    Owns the InfluxDB client with its HTTP connection pool and the reusable query and write APIs.
+    Transport errors are counted by a circuit breaker: after INFLUXDB_CIRCUIT_FAILURE_THRESHOLD consecutive failures
+    the circuit opens and requests fail fast. Once INFLUXDB_CIRCUIT_RESET_SECONDS have passed, a single caller
+    health-checks the server with a ping and closes the circuit again on success.
+    Query and write errors reported by a reachable server are passed on without touching the connection.
+    The circuit is shared with the AsyncInfluxDBManager, which reports its results via the record_* methods.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+
+    def __init__(self, influxdb_settings: dict, on_first_connect: Optional[Callable[[], None]] = None):
+        """
+        :param influxdb_settings: Dictionary with url, token and org.
+        :param on_first_connect: Called once, the first time InfluxDB was reached.
+        """
+        self.influxdb_settings = influxdb_settings
+        self.on_first_connect = on_first_connect
+        self.log = get_logger()
+
+        self.failure_threshold = getattr(settings, 'INFLUXDB_CIRCUIT_FAILURE_THRESHOLD', 3)
+        self.reset_timeout = getattr(settings, 'INFLUXDB_CIRCUIT_RESET_SECONDS', 10)
+        self.pool_size = getattr(settings, 'INFLUXDB_CONNECTION_POOL_SIZE', 20)
+        self.timeout_ms = getattr(settings, 'INFLUXDB_TIMEOUT_MS', 10000)
+
+        self.client = None
+        self.query_api = None
+        self.write_api = None
+
+        self._lock = threading.Lock()
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0
+        self.times_opened = 0
+        self.last_error = None
+        self._connected_once = False
+
+    @property
+    def is_configured(self) -> bool:
+        return bool(self.influxdb_settings)
+
+    def _create_client(self):
+        if self.client is None:
+            self.client = InfluxDBClient(
+                url=self.influxdb_settings['url'],
+                token=self.influxdb_settings['token'],
+                org=self.influxdb_settings['org'],
+                timeout=self.timeout_ms,
+                connection_pool_maxsize=self.pool_size,
+            )
+            self.query_api = self.client.query_api()
+            self.write_api = self.client.write_api(write_options=SYNCHRONOUS)
+
+    def connect(self) -> bool:
+        """
+        Create the client if needed and check that InfluxDB is reachable.
+        :return: True if InfluxDB answered the health check.
+        """
+        if not self.is_configured:
+            return False
+        with self._lock:
+            self._create_client()
+        return self._health_check()
+
+    def _health_check(self) -> bool:
+        try:
+            healthy = self.client.ping()
+            error = None if healthy else 'InfluxDB is not reachable.'
+        except Exception as e:
+            healthy = False
+            error = str(e)
+        return self.record_health_check(healthy, error)
+
+    def record_health_check(self, healthy: bool, error: Optional[str] = None, notify: bool = True) -> bool:
+        """
+        Close or (re)open the circuit depending on the result of a health check.
+        :param healthy: Whether InfluxDB answered the ping.
+        :param error: Reason of a failed health check.
+        :param notify: Whether on_first_connect may be called by this caller, see record_success.
+        :return: healthy
+        """
+        if healthy:
+            self.record_success(notify)
+        else:
+            with self._lock:
+                self.last_error = error
+                self._open()
+        return healthy
+
+    def _open(self):
+        if self.state != self.OPEN:
+            self.times_opened += 1
+            self.log.warning(f"InfluxDB circuit opened: {self.last_error}")
+        self.state = self.OPEN
+        self.opened_at = time.monotonic()
+
+    def record_success(self, notify: bool = True):
+        """
+        :param notify: Whether on_first_connect may be called by this caller.
+        Async callers pass False, as the callback accesses the database synchronously.
+        """
+        with self._lock:
+            if self.state != self.CLOSED:
+                self.log.info("InfluxDB is reachable again, circuit closed.")
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            first_connect = notify and not self._connected_once
+            if first_connect:
+                self._connected_once = True
+        if first_connect and self.on_first_connect is not None:
+            self.on_first_connect()
+
+    def record_transport_error(self, e: Exception):
+        with self._lock:
+            self.last_error = str(e)
+            self.consecutive_failures += 1
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self._open()
+
+    def try_acquire(self) -> bool:
+        """
+        Check whether a request may be sent to InfluxDB without blocking.
+        :return: True if the circuit is closed, False if the caller has to health-check InfluxDB first.
+        :raises InfluxDBNoConnectionException: if InfluxDB is not configured or the circuit is open.
+        """
+        if not self.is_configured:
+            raise InfluxDBNoConnectionException("InfluxDB is not configured.")
+
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.HALF_OPEN or time.monotonic() - self.opened_at < self.reset_timeout:
+                raise InfluxDBNoConnectionException("No valid InfluxDB connection available.")
+            self.state = self.HALF_OPEN
+            return False
+
+    def acquire(self):
+        """
+        Make sure a request may be sent to InfluxDB, health-checking the server if the circuit is due for a retry.
+        :raises InfluxDBNoConnectionException: if InfluxDB is not configured or the circuit is open.
+        """
+        ready = self.try_acquire()
+        with self._lock:
+            self._create_client()
+        if not ready and not self._health_check():
+            raise InfluxDBNoConnectionException("No valid InfluxDB connection available.")
+
+    def query(self, query: str):
+        """
+        Executes a flux query.
+        :param query: The flux query.
+        :return: The resulting flux tables.
+        """
+        self.acquire()
+        try:
+            result = self.query_api.query(org=self.influxdb_settings['org'], query=query)
+        except Exception as e:
+            if is_transport_error(e):
+                self.record_transport_error(e)
+                raise InfluxDBNoConnectionException(f"Unable to connect to InfluxDB: {e}")
+            raise InfluxDBQueryException(str(e))
+        self.record_success()
+        return result
+
+    def write(self, bucket: str, record):
+        """
+        Writes one or multiple points into the given bucket.
+        :param bucket: Name of the bucket.
+        :param record: Point or list of points.
+        """
+        self.acquire()
+        try:
+            self.write_api.write(bucket=bucket, record=record)
+        except Exception as e:
+            if is_transport_error(e):
+                self.record_transport_error(e)
+                raise InfluxDBNoConnectionException(f"Unable to connect to InfluxDB: {e}")
+            raise InfluxDBWriteException(str(e))
+        self.record_success()
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "state": self.state,
+                "consecutiveFailures": self.consecutive_failures,
+                "timesOpened": self.times_opened,
+                "lastError": self.last_error,
+            }
+
+    def close(self):
+        with self._lock:
+            if self.client is not None:
+                self.write_api.close()
+                self.client.close()
+                self.client = None
+                self.query_api = None
+                self.write_api = None
@@ -1,30 +1,396 @@
 import json
-import requests
 import logging
 import threading
-import time
 from uuid import UUID
-from datetime import datetime
+from datetime import datetime, timedelta, timezone as dt_timezone
+from zoneinfo import ZoneInfo
 from django.conf import settings
 from django.utils import timezone
-from influxdb_client.client.write_api import SYNCHRONOUS
-from influxdb_client import InfluxDBClient, Point, WritePrecision
+from influxdb_client import Point, WritePrecision
 
 from farminsight_dashboard_backend.exceptions import InfluxDBQueryException, InfluxDBNoConnectionException, InfluxDBWriteException
 from farminsight_dashboard_backend.models import FPF, Organization
-from farminsight_dashboard_backend.utils import _validate_forecasts_structure
+from farminsight_dashboard_backend.services.influx_connection_services import InfluxConnection
+from farminsight_dashboard_backend.services.measurement_cache_services import MeasurementChunkCache
+from farminsight_dashboard_backend.utils import _validate_forecasts_structure, SingleFlight
+
+
+def _sensor_filter(sensor_ids: list) -> str:
+    # Sorted, so identical requests result in identical queries
+    return " or ".join([f'r["sensorId"] == "{sensor_id}"' for sensor_id in sorted(map(str, sensor_ids))])
+
+
+def _sensor_measurements_query(fpf_id: str, sensor_ids: list, from_date: str, to_date: str) -> str:
+    #Updated Query: Null Values are now "stored" via the "isMissing" Field
+    return (
+        f'from(bucket: "{fpf_id}") '
+        f'|> range(start: {from_date}, stop: {to_date}) '
+        f'|> filter(fn: (r) => r["_measurement"] == "SensorData" and ({_sensor_filter(sensor_ids)})) '
+        f'|> filter(fn: (r) => r["_field"] == "value" or r["_field"] == "isMissing") '
+        f'|> pivot(rowKey:["_time"], columnKey: ["_field"], valueColumn: "_value") '
+        f'|> keep(columns: ["_time", "sensorId", "value", "isMissing"]) '
+        f'|> sort(columns: ["_time"])'
+    )
+
+
+def _parse_sensor_measurements(result, sensor_ids: list) -> dict:
+    measurements = {str(sensor_id): [] for sensor_id in sensor_ids}
+    #Magic to convert isMissing to value=NUll
+    for table in result:
+        for record in table.records:
+            sensor_id = str(record.values.get("sensorId"))
+
+            is_missing = record.values.get("isMissing", False)
+            value = None if is_missing else record.values.get("value")
+
+            measurements[sensor_id].append({
+                "measuredAt": record.get_time().isoformat(),
+                "value": value
+            })
+    return measurements
+
+
+def _latest_sensor_measurements_query(fpf_id: str, sensor_ids: list) -> str:
+    return (
+        f'from(bucket: "{fpf_id}") '
+        f'|> range(start: -1y) '  # Arbitrary long range to include all data
+        f'|> filter(fn: (r) => r["_measurement"] == "SensorData" and ({_sensor_filter(sensor_ids)})) '
+        f'|> sort(columns: ["_time"], desc: true) '
+        f'|> unique(column: "sensorId") '
+    )
+
+
+def _parse_latest_sensor_measurements(result) -> dict:
+    # Process and organize results by sensor ID
+    latest_measurements = {}
+    for table in result:
+        for record in table.records:
+            sensor_id = record.values["sensorId"]
+            latest_measurements[sensor_id] = {
+                "measuredAt": record.get_time().isoformat(),
+                "value": record.get_value()
+            }
+    return latest_measurements
+
+
+WEATHER_FORECAST_MEASUREMENT = "DailyWeatherForecast"
+
+# Stored field -> type, forecasts are stored as one point per forecast day with the location and the day as tags
+WEATHER_FORECAST_FIELDS = {
+    "rain_sum": float,
+    "sunshine_duration": float,
+    "weather_code": int,
+    "wind_speed_max": float,
+    "temperature_min": float,
+    "temperature_max": float,
+    "sunrise": str,
+    "sunset": str,
+    "precipitation_sum": float,
+    "precipitation_probability_max": int,
+}
+
+
+def _weather_forecast_point(location_id, forecast_date: str, forecast: dict, fetch_time: datetime) -> Point:
+    """
+    :param location_id: The ID of the location.
+    :param forecast_date: The forecast day as YYYY-MM-DD.
+    :param forecast: Dictionary with the WEATHER_FORECAST_FIELDS, missing values are stored as 0.
+    :param fetch_time: Time the forecast was fetched, used as the timestamp.
+    """
+    point = (
+        Point(WEATHER_FORECAST_MEASUREMENT)
+        .tag("locationId", str(location_id))
+        .tag("forecastDate", forecast_date)
+        .time(fetch_time, WritePrecision.S)
+    )
+    for field, field_type in WEATHER_FORECAST_FIELDS.items():
+        value = forecast.get(field)
+        point.field(field, field_type(value) if value is not None else field_type(0))
+    return point
+
+
+def _weather_forecasts_query(orga_id: str, location_id: str, start: str, stop: str = None, from_forecast_date: str = None, limit: int = None) -> str:
+    """
+    Flux query for the forecasts fetched within the range, one row per forecast day with the values of its latest
+    fetch, sorted by the forecast day.
+    """
+    date_filter = f'|> filter(fn: (r) => r["forecastDate"] >= "{from_forecast_date}") ' if from_forecast_date else ''
+    return (
+        f'from(bucket: "{orga_id}") '
+        f'|> range(start: {start}{f", stop: {stop}" if stop else ""}) '
+        f'|> filter(fn: (r) => r["_measurement"] == "{WEATHER_FORECAST_MEASUREMENT}" and r["locationId"] == "{str(location_id)}") '
+        f'{date_filter}'
+        f'|> last() '  # Re-fetched days: only the latest fetch of every day
+        f'|> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value") '
+        f'|> group() '
+        f'|> sort(columns: ["forecastDate"]) '
+        f'{f"|> limit(n: {limit}) " if limit else ""}'
+    )
+
+
+def _last_weather_forecast_query(orga_id: str, location_id: str) -> str:
+    # The next 3 days of the forecasts fetched within the last 24 hours, the days are requested in Europe/Berlin
+    today = datetime.now(ZoneInfo("Europe/Berlin")).date().isoformat()
+    return _weather_forecasts_query(orga_id, location_id, '-24h', from_forecast_date=today, limit=3)
+
+
+def _parse_weather_forecasts(result) -> list:
+    forecasts = []
+    for table in result:
+        for record in table.records:
+            values = record.values
+            forecasts.append(dict(
+                fetchDate=values['_time'],
+                forecastDate=datetime.fromisoformat(values['forecastDate']),
+                rainMM=str(values.get("rain_sum", 0)),
+                sunshineDurationSeconds=str(values.get("sunshine_duration", 0)),
+                weatherCode=str(values.get("weather_code", "")),
+                windSpeedMax=str(values.get("wind_speed_max", 0)),
+                temperatureMinC=str(values.get("temperature_min", 0)),
+                temperatureMaxC=str(values.get("temperature_max", 0)),
+                sunrise=datetime.fromisoformat(values['sunrise']),
+                sunset=datetime.fromisoformat(values['sunset']),
+                precipitationMM=str(values.get("precipitation_sum", 0)),
+                precipitationProbability=str(values.get("precipitation_probability_max", 0)),
+                locationId=values.get('locationId', "")
+            ))
+
+    forecasts.sort(key=lambda x: x['forecastDate'], reverse=True)
+    return forecasts
+
+
+def _energy_query(fpf_id: str, measurement: str, from_date: str, to_date: str) -> str:
+    return (
+        f'from(bucket: "{fpf_id}") '
+        f'|> range(start: {from_date}, stop: {to_date}) '
+        f'|> filter(fn: (r) => r["_measurement"] == "{measurement}") '
+        f'|> group() '
+        f'|> aggregateWindow(every: 1h, fn: mean, createEmpty: false)'
+    )
+
+
+def _parse_energy_balance(fpf_id: str, from_date: str, to_date: str, consumption_result, production_result) -> dict:
+    consumption_data = []
+    production_data = []
+
+    for table in consumption_result:
+        for record in table.records:
+            consumption_data.append({
+                "timestamp": record.get_time().isoformat(),
+                "watts": record.get_value()
+            })
+
+    for table in production_result:
+        for record in table.records:
+            production_data.append({
+                "timestamp": record.get_time().isoformat(),
+                "watts": record.get_value()
+            })
+
+    # Calculate totals
+    total_consumption_wh = sum(d['watts'] for d in consumption_data) if consumption_data else 0
+    total_production_wh = sum(d['watts'] for d in production_data) if production_data else 0
+
+    return {
+        "fpf_id": fpf_id,
+        "from_date": from_date,
+        "to_date": to_date,
+        "consumption": {
+            "data": consumption_data,
+            "total_wh": total_consumption_wh
+        },
+        "production": {
+            "data": production_data,
+            "total_wh": total_production_wh
+        },
+        "net_wh": total_production_wh - total_consumption_wh
+    }
+
+
+def _latest_battery_level_query(fpf_id: str) -> str:
+    return (
+        f'from(bucket: "{fpf_id}") '
+        f'|> range(start: -24h) '
+        f'|> filter(fn: (r) => r["_measurement"] == "BatteryLevel") '
+        f'|> sort(columns: ["_time"], desc: true) '
+        f'|> limit(n: 1)'
+    )
+
+
+def _parse_latest_battery_level(result):
+    for table in result:
+        for record in table.records:
+            return {
+                "timestamp": record.get_time().isoformat(),
+                "level_wh": record.values.get("level_wh"),
+                "percentage": record.values.get("percentage")
+            }
+    return None
+
+
+
+MODEL_FORECAST_RUN_MEASUREMENT = "ModelForecastRun"
+MODEL_FORECAST_VALUE_MEASUREMENT = "ModelForecastValue"
+MODEL_FORECAST_ACTION_MEASUREMENT = "ModelForecastAction"
+
+
+def _forecast_timestamp(timestamp) -> datetime:
+    # Timestamps of the model payload without a timezone are taken as UTC, like the influx client does
+    if not isinstance(timestamp, datetime):
+        timestamp = datetime.fromisoformat(str(timestamp))
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=dt_timezone.utc)
+    return timestamp
+
+
+def _format_forecast_timestamp(timestamp: datetime) -> str:
+    # Same format as the forecasts were stored in before they were split into points
+    return timestamp.astimezone(dt_timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def _model_forecast_points(model_id: str, model_name: str, data: dict, run_time: datetime) -> list:
+    """
+    Splits a model response into one point per forecast value (tagged by model, forecast and series name) and one
+    point per action (tagged by model, scenario and action name), plus a run point with the covered time window.
+    A newer run overwrites the values of an older run at the same timestamps. Every point carries the runId of its run,
+    so points of older runs that the newer run did not overwrite are left out when reading, see _latest_run_filter.
+    Missing values are written as well, so they overwrite the value of an older run.
+    Action values keep their type (number, bool or string), they are stored JSON encoded.
+    """
+    run_id = int(run_time.timestamp())
+    points = []
+    timestamps = []
+    for forecast in data["forecasts"]:
+        for series in forecast["values"]:
+            for value in series["value"]:
+                timestamp = _forecast_timestamp(value["timestamp"])
+                timestamps.append(timestamp)
+                points.append(
+                    Point(MODEL_FORECAST_VALUE_MEASUREMENT)
+                    .tag("modelId", str(model_id))
+                    .tag("forecast", forecast["name"])
+                    .tag("series", series["name"])
+                    .field("value", float(value["value"] if value["value"] is not None else 0.0))
+                    .field("isMissing", value["value"] is None)
+                    .field("runId", run_id)
+                    .time(timestamp, WritePrecision.S)
+                )
+
+    for action_group in data["actions"]:
+        for action in action_group["value"]:
+            timestamp = _forecast_timestamp(action["timestamp"])
+            timestamps.append(timestamp)
+            points.append(
+                Point(MODEL_FORECAST_ACTION_MEASUREMENT)
+                .tag("modelId", str(model_id))
+                .tag("scenario", str(action_group["name"]))
+                .tag("action", str(action["action"] or ""))
+                .field("actionValue", json.dumps(action["value"], default=str))
+                .field("runId", run_id)
+                .time(timestamp, WritePrecision.S)
+            )
+
+    run = (
+        Point(MODEL_FORECAST_RUN_MEASUREMENT)
+        .tag("modelId", str(model_id))
+        .tag("modelName", str(model_name))
+        .field("values", len(points))
+        .field("runId", run_id)
+        .time(run_time, WritePrecision.S)
+    )
+    if timestamps:
+        run.field("horizonStart", min(timestamps).isoformat()).field("horizonEnd", max(timestamps).isoformat())
+    points.append(run)
+    return points
+
+
+def _latest_model_forecast_run_query(fpf_id: str, model_id: str, hours: int) -> str:
+    return (
+        f'from(bucket: "{fpf_id}") '
+        f'|> range(start: -{hours}h) '
+        f'|> filter(fn: (r) => r["_measurement"] == "{MODEL_FORECAST_RUN_MEASUREMENT}" and r["modelId"] == "{model_id}") '
+        f'|> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value") '
+        # The runs are in one table per modelName, the latest run is picked across all of them
+        f'|> group() '
+        f'|> sort(columns: ["_time"], desc: true) '
+        f'|> limit(n: 1) '
+    )
+
+
+def _latest_run_filter(run_id) -> str:
+    # Runs written before the points carried their runId are read without the filter
+    return f'|> filter(fn: (r) => r["runId"] == {int(run_id)}) ' if run_id is not None else ''
+
+
+def _model_forecast_values_query(fpf_id: str, model_id: str, start: str, stop: str, run_id: int = None, forecast_pattern: str = None, series: str = None) -> str:
+    filters = ''
+    if forecast_pattern:
+        filters += f'|> filter(fn: (r) => r["forecast"] =~ /(?i){forecast_pattern}/) '
+    if series:
+        filters += f'|> filter(fn: (r) => r["series"] == "{series}") '
+    return (
+        f'from(bucket: "{fpf_id}") '
+        f'|> range(start: {start}, stop: {stop}) '
+        f'|> filter(fn: (r) => r["_measurement"] == "{MODEL_FORECAST_VALUE_MEASUREMENT}" and r["modelId"] == "{model_id}") '
+        f'{filters}'
+        f'|> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value") '
+        f'{_latest_run_filter(run_id)}'
+    )
+
+
+def _model_forecast_actions_query(fpf_id: str, model_id: str, start: str, stop: str, run_id: int = None) -> str:
+    return (
+        f'from(bucket: "{fpf_id}") '
+        f'|> range(start: {start}, stop: {stop}) '
+        f'|> filter(fn: (r) => r["_measurement"] == "{MODEL_FORECAST_ACTION_MEASUREMENT}" and r["modelId"] == "{model_id}") '
+        f'|> pivot(rowKey: ["_time"], columnKey: ["_field"], valueColumn: "_value") '
+        f'{_latest_run_filter(run_id)}'
+    )
+
+
+def _parse_model_forecast_values(result) -> list:
+    """
+    :return: List of {"name": forecast name, "values": [{"name": series name, "value": [{timestamp, value}]}]}
+    """
+    forecasts = {}
+    for table in result:
+        for record in table.records:
+            series = forecasts.setdefault(record.values["forecast"], {}).setdefault(record.values["series"], [])
+            value = None if record.values.get("isMissing") else record.values.get("value")
+            series.append({"timestamp": _format_forecast_timestamp(record.get_time()), "value": value})
+    return [
+        {"name": forecast_name, "values": [{"name": name, "value": values} for name, values in series.items()]}
+        for forecast_name, series in forecasts.items()
+    ]
+
+
+def _parse_model_forecast_actions(result) -> list:
+    actions = {}
+    for table in result:
+        for record in table.records:
+            if "actionValue" in record.values:
+                value = json.loads(record.values["actionValue"])
+            else:
+                value = record.values.get("value")
+            actions.setdefault(record.values["scenario"], []).append({
+                "timestamp": _format_forecast_timestamp(record.get_time()),
+                "value": value,
+                "action": record.values.get("action") or "",
+            })
+    for entries in actions.values():
+        # The actions of a scenario come in one table per action name
+        entries.sort(key=lambda entry: entry["timestamp"])
+    return [{"name": name, "value": values} for name, values in actions.items()]
 
 
 class InfluxDBManager:
     """
     InfluxDBManager to manage all interactions with the influx database, implemented as a Singleton.
-    RETRY_TIMEOUT in seconds.
+    The connection itself (HTTP pool, circuit breaker, query and write APIs) is handled by InfluxConnection.
     """
     _instance = None
     _lock = threading.Lock()
 
-    RETRY_TIMEOUT = 10
-
     @classmethod
     def get_instance(cls):
         with cls._lock:
@@ -41,51 +407,58 @@ class InfluxDBManager:
         """
         if not getattr(self, "_initialized", False):
             self.influxdb_settings = getattr(settings, 'INFLUXDB_CLIENT_SETTINGS', {})
-            self.client = None
             self.log = logging.getLogger("farminsight_dashboard_backend")
-            self._last_connection_attempt = 0
+            # Buckets are synchronized once when InfluxDB is reached for the first time, not on every reconnect
+            self.connection = InfluxConnection(self.influxdb_settings, on_first_connect=self.sync_buckets)
+            self._singleflight = SingleFlight()
             self._initialized = True
 
+    @property
+    def client(self):
+        return self.connection.client
+
     def _retry_connection(method):
-        """Decorator to ensure a valid connection before executing a method."""
+        """Decorator to ensure InfluxDB is available (or due for a retry) before executing a method."""
         def wrapper(self, *args, **kwargs):
-            if not self.client:
-                now = time.time()
-                if now - self._last_connection_attempt > self.RETRY_TIMEOUT:
-                    self._last_connection_attempt = now
-                    self.initialize_connection()
-                else:
-                    self.log.warning("Skipping connection retry due to recent failed attempt.")
-            if not self.client:
-                raise InfluxDBNoConnectionException("No valid InfluxDB connection available.")
+            self.connection.acquire()
             return method(self, *args, **kwargs)
 
         return wrapper
 
     def initialize_connection(self):
         """
-        Attempt to connect to InfluxDB and synchronize FPF buckets.
+        Attempt to connect to InfluxDB, the buckets are synchronized on the first successful connection.
         """
         if not self.influxdb_settings:
             self.log.warning("InfluxDB settings not found. Skipping InfluxDB setup.")
             return
 
-        try:
-            self.client = InfluxDBClient(
-                url=self.influxdb_settings['url'],
-                token=self.influxdb_settings['token'],
-                org=self.influxdb_settings['org']
-            )
+        if self.connection.connect():
+            self.log.info("Successfully connected to InfluxDB.")
+        else:
+            self.log.warning(f"InfluxDB connection failed: {self.connection.last_error} Proceeding without InfluxDB.")
 
-            if not self.client.ping():
-                raise ConnectionError("InfluxDB is not reachable.")
-            self.sync_buckets()
-            self.log.info("Successfully connected to InfluxDB and synchronized buckets.")
+    def _query(self, query: str):
+        """
+        Executes a flux query. Identical queries that run concurrently (e.g. many visitors opening the same dashboard)
+        share a single execution and its result.
+        :param query: The flux query.
+        :return: The resulting flux tables, these must not be modified by the caller.
+        """
+        key = (self.influxdb_settings.get('org'), ' '.join(query.split()))
+        return self._singleflight.do(key, self.connection.query, query)
 
+    def get_query_stats(self) -> dict:
+        """
+        :return: Statistics on how many queries were coalesced with an identical in-flight query.
+        """
+        return self._singleflight.get_stats()
 
-        except (requests.exceptions.RequestException, ConnectionError) as e:
-            self.log.warning(f"InfluxDB connection failed: {e} Proceeding without InfluxDB.")
-            self.client = None
+    def get_connection_stats(self) -> dict:
+        """
+        :return: State of the circuit breaker of the InfluxDB connection.
+        """
+        return self.connection.get_stats()
 
     def sync_fpf_buckets(self):
         """
@@ -138,8 +511,23 @@ class InfluxDBManager:
         self.sync_organization_buckets()
         self.sync_fpf_buckets()
 
-    @_retry_connection
     def fetch_sensor_measurements(self, fpf_id: str, sensor_ids: list, from_date: str, to_date: str) -> dict:
+        """
+        Returns measurements within the given date range for multiple sensors.
+        Closed time windows are served from the MeasurementChunkCache, only the open head is queried live.
+        :param fpf_id: The ID of the FPF (used as the bucket name in InfluxDB).
+        :param sensor_ids: List of sensor IDs to query data for.
+        :param from_date: Start date in ISO 8601 format.
+        :param to_date: End date in ISO 8601 format.
+        :return: Dictionary with sensor IDs as keys, each containing a list of measurements.
+        """
+        return MeasurementChunkCache.get_instance().fetch(
+            fpf_id, sensor_ids, from_date, to_date,
+            lambda ids, start, stop: self._query_sensor_measurements(fpf_id, ids, start, stop)
+        )
+
+    @_retry_connection
+    def _query_sensor_measurements(self, fpf_id: str, sensor_ids: list, from_date: str, to_date: str) -> dict:
         """
         Queries InfluxDB for measurements within the given date range for multiple sensors.
         :param fpf_id: The ID of the FPF (used as the bucket name in InfluxDB).
@@ -149,44 +537,12 @@ class InfluxDBManager:
         :return: Dictionary with sensor IDs as keys, each containing a list of measurements.
         """
         try:
-            query_api = self.client.query_api()
-
-            # Build the filter part of the query for multiple sensors
-            sensor_filter = " or ".join([f'r["sensorId"] == "{sensor_id}"' for sensor_id in sensor_ids])
-
-            #Updated Query: Null Values are now "stored" via the "isMissing" Field
-            query = (
-                f'from(bucket: "{fpf_id}") '
-                f'|> range(start: {from_date}, stop: {to_date}) '
-                f'|> filter(fn: (r) => r["_measurement"] == "SensorData" and ({sensor_filter})) '
-                f'|> filter(fn: (r) => r["_field"] == "value" or r["_field"] == "isMissing") '
-                f'|> pivot(rowKey:["_time"], columnKey: ["_field"], valueColumn: "_value") '
-                f'|> keep(columns: ["_time", "sensorId", "value", "isMissing"]) '
-                f'|> sort(columns: ["_time"])'
-            )
-
-            result = query_api.query(org=self.influxdb_settings["org"], query=query)
+            result = self._query(_sensor_measurements_query(fpf_id, sensor_ids, from_date, to_date))
+            return _parse_sensor_measurements(result, sensor_ids)
 
-            measurements = {str(sensor_id): [] for sensor_id in sensor_ids}
-            #Magic to convert isMissing to value=NUll
-            for table in result:
-                for record in table.records:
-                    sensor_id = str(record.values.get("sensorId"))
-
-                    is_missing = record.values.get("isMissing", False)
-                    value = None if is_missing else record.values.get("value")
-
-                    measurements[sensor_id].append({
-                        "measuredAt": record.get_time().isoformat(),
-                        "value": value
-                    })
-
-            return measurements
-
-        except requests.exceptions.ConnectionError:
-            raise InfluxDBNoConnectionException("Unable to connect to InfluxDB.")
+        except (InfluxDBNoConnectionException, InfluxDBQueryException):
+            raise
         except Exception as e:
-            self.client = None
             raise InfluxDBQueryException(str(e))
 
 
@@ -199,40 +555,14 @@ class InfluxDBManager:
         :return: Dictionary with sensor IDs as keys, each containing the latest measurement.
         """
         try:
-            query_api = self.client.query_api()
-
-            # Build the filter part of the query for multiple sensors
-            sensor_filter = " or ".join([f'r["sensorId"] == "{sensor_id}"' for sensor_id in sensor_ids])
-
-            query = (
-                f'from(bucket: "{fpf_id}") '
-                f'|> range(start: -1y) '  # Arbitrary long range to include all data
-                f'|> filter(fn: (r) => r["_measurement"] == "SensorData" and ({sensor_filter})) '
-                f'|> sort(columns: ["_time"], desc: true) '
-                f'|> unique(column: "sensorId") '
-            )
-            result = query_api.query(org=self.influxdb_settings['org'], query=query)
-
-            # Process and organize results by sensor ID
-            latest_measurements = {}
-            for table in result:
-                for record in table.records:
-                    sensor_id = record.values["sensorId"]
-                    latest_measurements[sensor_id] = {
-                        "measuredAt": record.get_time().isoformat(),
-                        "value": record.get_value()
-                    }
-
-        except requests.exceptions.ConnectionError as e:
-            self.client = None
-            self.log.error(f"Failed to connect to InfluxDB: {e}")
-            raise InfluxDBNoConnectionException("Unable to connect to InfluxDB.")
+            result = self._query(_latest_sensor_measurements_query(fpf_id, sensor_ids))
+            return _parse_latest_sensor_measurements(result)
 
+        except (InfluxDBNoConnectionException, InfluxDBQueryException):
+            raise
         except Exception as e:
             raise InfluxDBQueryException(str(e))
 
-        return latest_measurements
-
 
     @_retry_connection
     def write_sensor_measurements(self, fpf_id: str, sensor_id: str, measurements):
@@ -241,8 +571,6 @@ class InfluxDBManager:
         :param fpf_id: The ID of the FPF (used as the bucket name in InfluxDB).
         """
         try:
-            write_api = self.client.write_api(write_options=SYNCHRONOUS)
-
             points = []
             for measurement in measurements:
                 # This makes sure that None values are written as 0.0 in InfluxDB
@@ -266,12 +594,18 @@ class InfluxDBManager:
                     )
                 points.append(point)
 
-            write_api.write(bucket=fpf_id, record=points)
+            self.connection.write(fpf_id, points)
 
+        except (InfluxDBNoConnectionException, InfluxDBWriteException):
+            raise
         except Exception as e:
-            self.client = None
             raise InfluxDBQueryException(str(e))
 
+        # Late measurements change already closed time windows
+        MeasurementChunkCache.get_instance().invalidate(
+            fpf_id, sensor_id, [measurement['measuredAt'] for measurement in measurements]
+        )
+
     @_retry_connection
     def fetch_last_weather_forcast(self, orga_id: str, location_id: str):
         """
@@ -281,72 +615,14 @@ class InfluxDBManager:
         """
 
         try:
-            query_api = self.client.query_api()
-
-            # Construct the query
-            query = (
-                f'from(bucket: "{orga_id}") '
-                f'|> range(start: -24h) '  # Arbitrary long range to include all data
-                f'|> filter(fn: (r) => r["_measurement"] == "WeatherForecast" and r["locationId"] == "{str(location_id)}") '
-                f'|> sort(columns: ["_time"], desc: false) '
-                f'|> limit(n: 3) '
-            )
-
-            # Execute the query
-            result = query_api.query(org=self.influxdb_settings['org'], query=query)
-
-            forecasts = []
-
-            # Loop through the results (tables and records)
-            for table in result:
-                for record in table.records:
-                    values = record.values
-
-                    #One Field to rule them all
-                    data = json.loads(values.get('_value'))
-
-                    forecast_date = datetime.strptime(data["ForecastDate"], "%Y-%m-%d")
-
-                    sunrise_date = datetime.strptime(data["sunrise"], "%Y-%m-%dT%H:%M")
-                    sunset_date = datetime.strptime(data["sunset"], "%Y-%m-%dT%H:%M")
-
-
-                    fetch_date = values.get('_time')
-                    if not isinstance(fetch_date, datetime):
-                        try:
-                            fetch_date = datetime.fromisoformat(fetch_date)
-                        except Exception as e:
-                            fetch_date = datetime.now()
-
-                    wf = dict(
-                        fetchDate=fetch_date,
-                        forecastDate=forecast_date,
-                        rainMM=str(data.get("rain_sum", 0)),
-                        sunshineDurationSeconds=str(data.get("sunshine_duration", 0)),
-                        weatherCode=str(data.get("weather_code", "")),
-                        windSpeedMax=str(data.get("wind_speed_max", 0)),
-                        temperatureMinC=str(data.get("temperature_min", 0)),
-                        temperatureMaxC=str(data.get("temperature_max", 0)),
-                        sunrise=sunrise_date,
-                        sunset=sunset_date,
-                        precipitationMM=str(data.get("precipitation_sum", 0)),
-                        precipitationProbability=str(data.get("precipitation_probability_max", 0)),
-                        locationId=values.get('locationId', "")
-                    )
-                    forecasts.append(wf)
-
-            forecasts.sort(key=lambda x: x['forecastDate'], reverse=True)
-
-        except requests.exceptions.ConnectionError as e:
-            self.client = None
-            self.log.error(f"Failed to connect to InfluxDB: {e}")
-            raise InfluxDBNoConnectionException("Unable to connect to InfluxDB.")
+            result = self._query(_last_weather_forecast_query(orga_id, location_id))
+            return _parse_weather_forecasts(result)
 
+        except (InfluxDBNoConnectionException, InfluxDBQueryException):
+            raise
         except Exception as e:
             raise InfluxDBQueryException(str(e))
 
-        return forecasts
-
     def fetch_latest_weather_forecast(self, organization_id: str, location_id: str) -> dict:
         """
         Fetch the latest weather forecast for today for a given location.
@@ -398,72 +674,22 @@ class InfluxDBManager:
 
     @_retry_connection
     def fetch_all_weather_forecasts(self, orga_id: str, location_id: str, from_date: str, to_date: str):
+        """
+        :param orga_id: The ID of the Organization (used as the bucket name in InfluxDB).
+        :param location_id: The ID of the location.
+        :param from_date: Start of the fetch dates in ISO 8601 format.
+        :param to_date: End of the fetch dates in ISO 8601 format.
+        :return: List of forecasts fetched in the range, with the latest fetch of every forecast day.
+        """
         try:
-            query_api = self.client.query_api()
-
-            # Construct the query
-            query = (
-                f'from(bucket: "{orga_id}") '
-                f'|> range(start: {from_date}, stop: {to_date}) '
-                f'|> filter(fn: (r) => r["_measurement"] == "WeatherForecast" and r["locationId"] == "{str(location_id)}") '
-                f'|> sort(columns: ["_time"], desc: false) '
-            )
-
-            # Execute the query
-            result = query_api.query(org=self.influxdb_settings['org'], query=query)
-
-            forecasts = []
-
-            # Loop through the results (tables and records)
-            for table in result:
-                for record in table.records:
-                    values = record.values
-
-                    # One Field to rule them all
-                    data = json.loads(values.get('_value'))
-
-                    forecast_date = datetime.strptime(data["ForecastDate"], "%Y-%m-%d")
-
-                    sunrise_date = datetime.strptime(data["sunrise"], "%Y-%m-%dT%H:%M")
-                    sunset_date = datetime.strptime(data["sunset"], "%Y-%m-%dT%H:%M")
-
-                    fetch_date = values.get('_time')
-                    if not isinstance(fetch_date, datetime):
-                        try:
-                            fetch_date = datetime.fromisoformat(fetch_date)
-                        except Exception as e:
-                            fetch_date = datetime.now()
-
-                    wf = dict(
-                        fetchDate=fetch_date,
-                        forecastDate=forecast_date,
-                        rainMM=str(data.get("rain_sum", 0)),
-                        sunshineDurationSeconds=str(data.get("sunshine_duration", 0)),
-                        weatherCode=str(data.get("weather_code", "")),
-                        windSpeedMax=str(data.get("wind_speed_max", 0)),
-                        temperatureMinC=str(data.get("temperature_min", 0)),
-                        temperatureMaxC=str(data.get("temperature_max", 0)),
-                        sunrise=sunrise_date,
-                        sunset=sunset_date,
-                        precipitationMM=str(data.get("precipitation_sum", 0)),
-                        precipitationProbability=str(data.get("precipitation_probability_max", 0)),
-                        locationId=values.get('locationId', "")
-                    )
-                    forecasts.append(wf)
-
-            forecasts.sort(key=lambda x: x['forecastDate'], reverse=True)
-
-        except requests.exceptions.ConnectionError as e:
-            self.client = None
-            self.log.error(f"Failed to connect to InfluxDB: {e}")
-            raise InfluxDBNoConnectionException("Unable to connect to InfluxDB.")
+            result = self._query(_weather_forecasts_query(orga_id, location_id, from_date, to_date))
+            return _parse_weather_forecasts(result)
 
+        except (InfluxDBNoConnectionException, InfluxDBQueryException):
+            raise
         except Exception as e:
             raise InfluxDBQueryException(str(e))
 
-        return forecasts
-
-    @_retry_connection
     def write_weather_forecast(self, orga_id: str, location_id: str, weather_forecasts):
         """
         Writes Weather Forecast for a given Location (Orga) to InfluxDB.
@@ -471,39 +697,39 @@ class InfluxDBManager:
         :param location_id: The ID of the location (UUID).
         :param weather_forecasts: List of weather forecast dictionaries.
         """
-        try:
-            self.log.info(f"Saving {len(weather_forecasts)} weather forecasts in InfluxDB")
-            write_api = self.client.write_api(write_options=SYNCHRONOUS)
+        self.write_weather_forecasts(orga_id, {location_id: weather_forecasts})
 
+    @_retry_connection
+    def write_weather_forecasts(self, orga_id: str, weather_forecasts_by_location: dict):
+        """
+        Writes the Weather Forecasts of multiple Locations of one Organization to InfluxDB in a single batch.
+        :param orga_id: The ID of the Organization (used as the bucket name in InfluxDB).
+        :param weather_forecasts_by_location: Dictionary location ID -> list of weather forecast dictionaries.
+        """
+        try:
             points = []
-            for forecast in weather_forecasts:
-                forecast_dict = {
-                    "ForecastDate": str(forecast['time']),
-                    "rain_sum": float(forecast['rain_sum'] or 0.0),
-                    "sunshine_duration": float(forecast['sunshine_duration'] or 0.0),
-                    "weather_code": int(forecast['weather_code'] or 0),
-                    "wind_speed_max": float(forecast['wind_speed_10m_max']),
-                    "temperature_min": float(forecast['temperature_2m_min']),
-                    "temperature_max": float(forecast['temperature_2m_max']),
-                    "sunrise": str(forecast['sunrise']),
-                    "sunset": str(forecast['sunset']),
-                    "precipitation_sum": float(forecast['precipitation_sum'] or 0),
-                    "precipitation_probability_max": int(forecast['precipitation_probability_max'] or 0)
-                }
-
-                forecast_json = json.dumps(forecast_dict)
-
-                point = (
-                    Point("WeatherForecast")
-                    .tag("locationId", str(location_id))
-                    .field("forecast", forecast_json)
-                    .time(timezone.now().isoformat(), WritePrecision.NS)
-                )
-                #For some reason the write_api.write() method does not accept a list of points
-                write_api.write(bucket=str(orga_id), record=point)
-
+            fetch_time = timezone.now()
+            for location_id, weather_forecasts in weather_forecasts_by_location.items():
+                for forecast in weather_forecasts:
+                    points.append(_weather_forecast_point(location_id, str(forecast['time']), {
+                        "rain_sum": forecast['rain_sum'],
+                        "sunshine_duration": forecast['sunshine_duration'],
+                        "weather_code": forecast['weather_code'],
+                        "wind_speed_max": forecast['wind_speed_10m_max'],
+                        "temperature_min": forecast['temperature_2m_min'],
+                        "temperature_max": forecast['temperature_2m_max'],
+                        "sunrise": forecast['sunrise'],
+                        "sunset": forecast['sunset'],
+                        "precipitation_sum": forecast['precipitation_sum'],
+                        "precipitation_probability_max": forecast['precipitation_probability_max'],
+                    }, fetch_time))
+
+            self.log.info(f"Saving {len(points)} weather forecasts of {len(weather_forecasts_by_location)} locations in InfluxDB")
+            self.connection.write(str(orga_id), points)
+
+        except (InfluxDBNoConnectionException, InfluxDBWriteException):
+            raise
         except Exception as e:
-            self.client = None
             raise InfluxDBWriteException(str(e))
 
 
@@ -511,7 +737,7 @@ class InfluxDBManager:
     def write_model_forecast(self, fpf_id: str, model_id: str, model_name: str, forecasts: dict):
         """
         Writes model forecasts (including actions) for a given FPF into InfluxDB.
-        Each forecast is stored as a JSON blob for flexibility.
+        Every forecast value and action is stored as its own point, see _model_forecast_points.
         :param fpf_id: FPF UUID (bucket name)
         :param model_id: ID of the model that generated the forecasts
         :param model_name: Display name of the model
@@ -530,72 +756,99 @@ class InfluxDBManager:
             return  # do NOT write invalid data
 
         try:
-            write_api = self.client.write_api(write_options=SYNCHRONOUS)
-
-            # Use the same "ModelForecast" measurement for all models
-            timestamp = timezone.now().isoformat()
-            forecast_json = json.dumps(forecasts)
-
-            point = (
-                Point("ModelForecast")
-                .tag("modelId", str(model_id))
-                .tag("modelName", str(model_name))
-                .field("forecastData", forecast_json)
-                .time(timestamp, WritePrecision.NS)
-            )
-
-            write_api.write(bucket=str(fpf_id), record=point)
-            self.log.info(f"Wrote model forecast for model '{model_name}' into bucket {fpf_id}.")
+            points = _model_forecast_points(model_id, model_name, forecasts, timezone.now())
+            self.connection.write(str(fpf_id), points)
+            self.log.info(f"Wrote model forecast for model '{model_name}' ({len(points)} points) into bucket {fpf_id}.")
 
+        except (InfluxDBNoConnectionException, InfluxDBWriteException):
+            raise
         except Exception as e:
-            self.client = None
             raise InfluxDBWriteException(f"Failed to write model forecast to InfluxDB: {e}")
 
+    def _fetch_latest_model_forecast_run(self, fpf_id: str, model_id: str, hours: int):
+        """
+        :return: Tuple (run record values, start, stop) of the latest run within the hours, or None.
+        """
+        result = self._query(_latest_model_forecast_run_query(fpf_id, model_id, hours))
+        for table in result:
+            for record in table.records:
+                run = record.values
+                if not run.get("horizonStart"):
+                    return run, None, None
+                # stop is exclusive
+                stop = datetime.fromisoformat(run["horizonEnd"]) + timedelta(seconds=1)
+                return run, run["horizonStart"], stop.isoformat()
+        return None
 
     @_retry_connection
-    def fetch_latest_model_forecast(self, fpf_id: str, model_id: str, hours: int = 24) -> list[dict]:
+    def fetch_latest_model_forecast(self, fpf_id: str, model_id: str, hours: int = 24) -> dict:
         """
         Fetches the most recent model forecast for the given FPF and model.
         :param fpf_id: The ID of the FPF (bucket name)
         :param model_id: The ID of the model (tag in Influx)
-        :param hours: Time range to look back (default: 24h)
-        :return: List of parsed forecast dict (each item has 'timestamp', 'modelName', 'forecasts', 'actions')
+        :param hours: Time range to look back for the latest run (default: 24h)
+        :return: Dict with 'timestamp', 'modelId', 'modelName' and 'data' ('forecasts' and 'actions'), or None
         """
         from farminsight_dashboard_backend.services import get_model_by_id
+        fpf_id = str(UUID(str(fpf_id)))
+        model_id = str(model_id)
         try:
-            query_api = self.client.query_api()
-
-            query = (
-                f'from(bucket: "{str(UUID(fpf_id))}") '
-                f'|> range(start: -{hours}h) '
-                f'|> filter(fn: (r) => r["_measurement"] == "ModelForecast" and r["modelId"] == "{str(model_id)}") '
-                f'|> sort(columns: ["_time"], desc: true) '
-                f'|> limit(n: 1)'
-            )
-
-            result = query_api.query(org=self.influxdb_settings['org'], query=query)
-
-            for table in result:
-                for record in table.records:
-                    try:
-                        forecast_data = json.loads(record.get_value())
-                    except Exception:
-                        forecast_data = {}
+            latest_run = self._fetch_latest_model_forecast_run(fpf_id, model_id, hours)
+            if latest_run is None:
+                return None
 
-                    return {
-                        "timestamp": record.get_time().isoformat(),
-                        "modelId": record.values.get("modelId"),
-                        "modelName": get_model_by_id(model_id).name,
-                        "data": forecast_data
-                    }
+            run, start, stop = latest_run
+            data = {"forecasts": [], "actions": []}
+            if start is not None:
+                data["forecasts"] = _parse_model_forecast_values(
+                    self._query(_model_forecast_values_query(fpf_id, model_id, start, stop, run.get("runId")))
+                )
+                data["actions"] = _parse_model_forecast_actions(
+                    self._query(_model_forecast_actions_query(fpf_id, model_id, start, stop, run.get("runId")))
+                )
 
-            # No records found
-            return None
+            return {
+                "timestamp": run["_time"].isoformat(),
+                "modelId": model_id,
+                "modelName": get_model_by_id(model_id).name,
+                "data": data
+            }
 
+        except (InfluxDBNoConnectionException, InfluxDBQueryException):
+            raise
         except Exception as e:
-            self.client = None
             raise InfluxDBQueryException(f"Failed to fetch model forecast: {e}")
 
+    @_retry_connection
+    def fetch_model_forecast_series(self, fpf_id: str, model_id: str, hours: int = 24, forecast_pattern: str = None, series: str = None, from_date: str = None, to_date: str = None) -> list:
+        """
+        Fetches only the selected forecast series of the most recent model forecast.
+        :param fpf_id: The ID of the FPF (bucket name)
+        :param model_id: The ID of the model (tag in Influx)
+        :param hours: Time range to look back for the latest run (default: 24h)
+        :param forecast_pattern: Case-insensitive regular expression the forecast name has to match.
+        :param series: Name of the series (scenario) to return.
+        :param from_date: Only values from this time on (ISO 8601), defaults to the start of the forecast.
+        :param to_date: Only values before this time (ISO 8601), defaults to the end of the forecast.
+        :return: List of {"name": forecast name, "values": [{"name": series name, "value": [{timestamp, value}]}]}
+        """
+        fpf_id = str(UUID(str(fpf_id)))
+        model_id = str(model_id)
+        try:
+            latest_run = self._fetch_latest_model_forecast_run(fpf_id, model_id, hours)
+            if latest_run is None or latest_run[1] is None:
+                return []
+
+            run, start, stop = latest_run
+            result = self._query(_model_forecast_values_query(
+                fpf_id, model_id, from_date or start, to_date or stop, run.get("runId"), forecast_pattern, series
+            ))
+            return _parse_model_forecast_values(result)
+
+        except (InfluxDBNoConnectionException, InfluxDBQueryException):
+            raise
+        except Exception as e:
+            raise InfluxDBQueryException(f"Failed to fetch model forecast: {e}")
 
     @_retry_connection
     def write_energy_consumption(self, fpf_id: str, consumer_id: str, watts: float, timestamp: str = None):
@@ -607,8 +860,6 @@ class InfluxDBManager:
         :param timestamp: Optional timestamp (ISO format). Defaults to now.
         """
         try:
-            write_api = self.client.write_api(write_options=SYNCHRONOUS)
-
             if timestamp is None:
                 timestamp = timezone.now().isoformat()
 
@@ -618,10 +869,11 @@ class InfluxDBManager:
                 .field("watts", float(watts))
                 .time(timestamp, WritePrecision.NS)
             )
-            write_api.write(bucket=str(fpf_id), record=point)
+            self.connection.write(str(fpf_id), point)
 
+        except (InfluxDBNoConnectionException, InfluxDBWriteException):
+            raise
         except Exception as e:
-            self.client = None
             raise InfluxDBWriteException(f"Failed to write energy consumption: {e}")
 
     @_retry_connection
@@ -634,8 +886,6 @@ class InfluxDBManager:
         :param timestamp: Optional timestamp (ISO format). Defaults to now.
         """
         try:
-            write_api = self.client.write_api(write_options=SYNCHRONOUS)
-
             if timestamp is None:
                 timestamp = timezone.now().isoformat()
 
@@ -645,10 +895,11 @@ class InfluxDBManager:
                 .field("watts", float(watts))
                 .time(timestamp, WritePrecision.NS)
             )
-            write_api.write(bucket=str(fpf_id), record=point)
+            self.connection.write(str(fpf_id), point)
 
+        except (InfluxDBNoConnectionException, InfluxDBWriteException):
+            raise
         except Exception as e:
-            self.client = None
             raise InfluxDBWriteException(f"Failed to write energy production: {e}")
 
     @_retry_connection
@@ -661,8 +912,6 @@ class InfluxDBManager:
         :param timestamp: Optional timestamp (ISO format). Defaults to now.
         """
         try:
-            write_api = self.client.write_api(write_options=SYNCHRONOUS)
-
             if timestamp is None:
                 timestamp = timezone.now().isoformat()
 
@@ -672,10 +921,11 @@ class InfluxDBManager:
                 .field("percentage", float(percentage))
                 .time(timestamp, WritePrecision.NS)
             )
-            write_api.write(bucket=str(fpf_id), record=point)
+            self.connection.write(str(fpf_id), point)
 
+        except (InfluxDBNoConnectionException, InfluxDBWriteException):
+            raise
         except Exception as e:
-            self.client = None
             raise InfluxDBWriteException(f"Failed to write battery level: {e}")
 
     @_retry_connection
@@ -688,67 +938,13 @@ class InfluxDBManager:
         :return: Dictionary with consumption and production data.
         """
         try:
-            query_api = self.client.query_api()
-
-            # Fetch consumption
-            consumption_query = (
-                f'from(bucket: "{fpf_id}") '
-                f'|> range(start: {from_date}, stop: {to_date}) '
-                f'|> filter(fn: (r) => r["_measurement"] == "EnergyConsumption") '
-                f'|> group() '
-                f'|> aggregateWindow(every: 1h, fn: mean, createEmpty: false)'
-            )
-
-            # Fetch production
-            production_query = (
-                f'from(bucket: "{fpf_id}") '
-                f'|> range(start: {from_date}, stop: {to_date}) '
-                f'|> filter(fn: (r) => r["_measurement"] == "EnergyProduction") '
-                f'|> group() '
-                f'|> aggregateWindow(every: 1h, fn: mean, createEmpty: false)'
-            )
-
-            consumption_result = query_api.query(org=self.influxdb_settings['org'], query=consumption_query)
-            production_result = query_api.query(org=self.influxdb_settings['org'], query=production_query)
-
-            consumption_data = []
-            production_data = []
-
-            for table in consumption_result:
-                for record in table.records:
-                    consumption_data.append({
-                        "timestamp": record.get_time().isoformat(),
-                        "watts": record.get_value()
-                    })
-
-            for table in production_result:
-                for record in table.records:
-                    production_data.append({
-                        "timestamp": record.get_time().isoformat(),
-                        "watts": record.get_value()
-                    })
-
-            # Calculate totals
-            total_consumption_wh = sum(d['watts'] for d in consumption_data) if consumption_data else 0
-            total_production_wh = sum(d['watts'] for d in production_data) if production_data else 0
-
-            return {
-                "fpf_id": fpf_id,
-                "from_date": from_date,
-                "to_date": to_date,
-                "consumption": {
-                    "data": consumption_data,
-                    "total_wh": total_consumption_wh
-                },
-                "production": {
-                    "data": production_data,
-                    "total_wh": total_production_wh
-                },
-                "net_wh": total_production_wh - total_consumption_wh
-            }
+            consumption_result = self._query(_energy_query(fpf_id, "EnergyConsumption", from_date, to_date))
+            production_result = self._query(_energy_query(fpf_id, "EnergyProduction", from_date, to_date))
+            return _parse_energy_balance(fpf_id, from_date, to_date, consumption_result, production_result)
 
+        except (InfluxDBNoConnectionException, InfluxDBQueryException):
+            raise
         except Exception as e:
-            self.client = None
             raise InfluxDBQueryException(f"Failed to fetch energy balance: {e}")
 
     @_retry_connection
@@ -759,34 +955,15 @@ class InfluxDBManager:
         :return: Dictionary with battery level data or None.
         """
         try:
-            query_api = self.client.query_api()
-
-            query = (
-                f'from(bucket: "{fpf_id}") '
-                f'|> range(start: -24h) '
-                f'|> filter(fn: (r) => r["_measurement"] == "BatteryLevel") '
-                f'|> sort(columns: ["_time"], desc: true) '
-                f'|> limit(n: 1)'
-            )
-
-            result = query_api.query(org=self.influxdb_settings['org'], query=query)
-
-            for table in result:
-                for record in table.records:
-                    return {
-                        "timestamp": record.get_time().isoformat(),
-                        "level_wh": record.values.get("level_wh"),
-                        "percentage": record.values.get("percentage")
-                    }
-
-            return None
+            result = self.connection.query(_latest_battery_level_query(fpf_id))
+            return _parse_latest_battery_level(result)
 
+        except (InfluxDBNoConnectionException, InfluxDBQueryException):
+            raise
         except Exception as e:
-            self.client = None
             raise InfluxDBQueryException(f"Failed to fetch battery level: {e}")
 
 
     def close(self):
         """Close the InfluxDB client if it's open."""
-        if self.client:
-            self.client.close()
+        self.connection.close()
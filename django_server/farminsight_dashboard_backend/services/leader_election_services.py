@@ -0,0 +1,208 @@
+import atexit
+import json
+import threading
+import time
+from datetime import timedelta
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection, transaction
+from django.utils import timezone
+
+from farminsight_dashboard_backend.models import SchedulerLease
+from farminsight_dashboard_backend.services.process_heartbeat_services import ProcessHeartbeat
+from farminsight_dashboard_backend.utils import get_logger
+
+
+class LeaderElection:
+    """
+    Elects the one server process that runs the background jobs, implemented as a Singleton.
+    The leader holds a lease row in the database and renews it every LEADER_LEASE_SECONDS / 3. If the leader dies,
+    its lease expires after LEADER_LEASE_SECONDS and the next process that tries to acquire it takes over, so the
+    clocks of multiple nodes have to be in sync. A leader that could not renew its lease steps down once less than one
+    renew interval and a safety margin of the lease is left, a watchdog thread also steps down when the renewal hangs.
+    The renewal queries have a statement timeout of one renew interval on PostgreSQL.
+    Stepping down pauses the scheduler, jobs that already run finish, so a job may still overlap with the first jobs of
+    the next leader. Stored jobs check the leadership again before they start, see ScheduledJobStore.
+    With every renewal the leader also publishes the stats of its background jobs in the lease.
+    Without LEADER_ELECTION_ENABLED every process is the leader.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    LEASE_NAME = 'schedulers'
+
+    @classmethod
+    def get_instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __new__(cls, *args, **kwargs):
+        return super(LeaderElection, cls).__new__(cls)
+
+    def __init__(self):
+        if not getattr(self, "_initialized", False):
+            self.log = get_logger()
+            self.enabled = getattr(settings, 'LEADER_ELECTION_ENABLED', True)
+            self.lease_seconds = getattr(settings, 'LEADER_LEASE_SECONDS', 30)
+            self.identity = ProcessHeartbeat.get_instance().identity
+            self.is_leader = not self.enabled
+            self.renew_seconds = self.lease_seconds / 3
+            self.safety_seconds = self.lease_seconds / 6
+            self._lease_until = 0
+            self._state_lock = threading.Lock()
+            self._on_elected = None
+            self._on_demoted = None
+            self._collect_stats = None
+            self._stop = threading.Event()
+            self._thread = None
+            self._initialized = True
+
+    def start(self, on_elected: Callable[[], None], on_demoted: Optional[Callable[[], None]] = None,
+              collect_stats: Optional[Callable[[], dict]] = None):
+        """
+        Take part in the election until the process exits.
+        :param on_elected: Called whenever this process becomes the leader.
+        :param on_demoted: Called whenever this process lost the leadership.
+        :param collect_stats: Returns the stats the leader publishes with every renewal of its lease.
+        """
+        if not self.enabled:
+            on_elected()
+            return
+
+        self._on_elected = on_elected
+        self._on_demoted = on_demoted
+        self._collect_stats = collect_stats
+        self._elect()
+        if not self.is_leader:
+            self.log.info(f"Process {self.identity} is not the leader, background jobs run in another process.")
+
+        self._thread = threading.Thread(target=self._run, name='leader-election', daemon=True)
+        self._thread.start()
+        threading.Thread(target=self._watch, name='leader-election-watchdog', daemon=True).start()
+        atexit.register(self.release)
+
+    def _run(self):
+        while not self._stop.wait(self.renew_seconds):
+            close_old_connections()
+            self._elect()
+            if self.is_leader:
+                self._publish_stats()
+
+    def _watch(self):
+        # The election thread may hang in a query, the lease must not expire while this process still runs the jobs
+        while not self._stop.wait(min(1.0, self.safety_seconds)):
+            if self.is_leader and time.monotonic() >= self._lease_until - self.safety_seconds:
+                self._demote("its scheduler lease is about to expire without a renewal")
+
+    def _publish_stats(self):
+        if self._collect_stats is None:
+            return
+        try:
+            stats = json.loads(json.dumps(self._collect_stats(), default=str))
+            SchedulerLease.objects.filter(name=self.LEASE_NAME, holder=self.identity).update(
+                stats=stats, statsUpdatedAt=timezone.now()
+            )
+        except Exception as e:
+            self.log.warning(f"Could not publish the stats of the background jobs: {e}")
+
+    def _elect(self):
+        started = time.monotonic()
+        try:
+            acquired = self._try_acquire()
+        except Exception as e:
+            self.log.warning(f"Could not renew the scheduler lease: {e}")
+            acquired = None
+
+        if acquired:
+            with self._state_lock:
+                self._lease_until = started + self.lease_seconds
+                elected = not self.is_leader
+                self.is_leader = True
+            if elected:
+                self.log.info(f"Process {self.identity} is now the leader and runs the background jobs.")
+                self._notify(self._on_elected)
+        elif acquired is False:
+            self._demote("another process holds the scheduler lease")
+        elif time.monotonic() >= self._lease_until - self.renew_seconds - self.safety_seconds:
+            # Another renewal might not finish before the lease expires
+            self._demote("it could not renew its scheduler lease")
+
+    def _demote(self, reason: str):
+        with self._state_lock:
+            if not self.is_leader:
+                return
+            self.is_leader = False
+            self._lease_until = 0
+        self.log.warning(f"Process {self.identity} stepped down because {reason}, background jobs are paused.")
+        self._notify(self._on_demoted)
+
+    def _notify(self, callback):
+        if callback is None:
+            return
+        try:
+            callback()
+        except Exception as e:
+            self.log.error(f"Error while changing the leadership: {e}")
+
+    def _try_acquire(self) -> bool:
+        with transaction.atomic():
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL statement_timeout = %s", [int(self.renew_seconds * 1000)])
+            return self._acquire()
+
+    def _acquire(self) -> bool:
+        now = timezone.now()
+        expires_at = now + timedelta(seconds=self.lease_seconds)
+
+        renewed = SchedulerLease.objects.filter(name=self.LEASE_NAME, holder=self.identity).update(expiresAt=expires_at)
+        if renewed:
+            return True
+
+        taken_over = SchedulerLease.objects.filter(name=self.LEASE_NAME, expiresAt__lt=now).update(
+            holder=self.identity, acquiredAt=now, expiresAt=expires_at
+        )
+        if taken_over:
+            return True
+
+        try:
+            with transaction.atomic():
+                SchedulerLease.objects.create(name=self.LEASE_NAME, holder=self.identity, acquiredAt=now, expiresAt=expires_at)
+            return True
+        except IntegrityError:
+            return False
+
+    def release(self):
+        """
+        Give up the leadership, so another process can take over without waiting for the lease to expire.
+        """
+        self._stop.set()
+        if self.enabled and self.is_leader:
+            self.is_leader = False
+            try:
+                SchedulerLease.objects.filter(name=self.LEASE_NAME, holder=self.identity).update(expiresAt=timezone.now())
+            except Exception as e:
+                self.log.warning(f"Could not release the scheduler lease: {e}")
+
+    def get_leader_stats(self) -> dict | None:
+        """
+        :return: The stats of the background jobs the leader published last, with the time they were published,
+            None if there are none.
+        """
+        lease = SchedulerLease.objects.filter(name=self.LEASE_NAME).first() if self.enabled else None
+        if lease is None or lease.statsUpdatedAt is None:
+            return None
+        return {**lease.stats, 'statsUpdatedAt': lease.statsUpdatedAt.isoformat()}
+
+    def get_stats(self) -> dict:
+        lease = SchedulerLease.objects.filter(name=self.LEASE_NAME).first() if self.enabled else None
+        return {
+            "enabled": self.enabled,
+            "identity": self.identity,
+            "isLeader": self.is_leader,
+            "leader": lease.holder if lease else None,
+            "leaseExpiresAt": lease.expiresAt.isoformat() if lease else None,
+        }
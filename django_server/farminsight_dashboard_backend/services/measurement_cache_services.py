@@ -0,0 +1,491 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Awaitable, Callable, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from farminsight_dashboard_backend.utils import get_logger, get_process_roles, ROLE_WEB, ROLE_INGEST
+
+CHUNK_SIZES = {
+    'hour': timedelta(hours=1),
+    'day': timedelta(days=1),
+}
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# Results of queries that took longer are not cached, so invalidations only have to be remembered that long
+_MAX_QUERY_SECONDS = 60
+
+# Interval in which a disk store picks up the chunks written and evicted by other processes
+_DISK_SYNC_SECONDS = 60
+
+
+def _parse_iso(value) -> Optional[datetime]:
+    """
+    Parse an ISO 8601 date (string or datetime) into an aware UTC datetime.
+    Returns None for anything else (e.g. relative flux durations like -1y).
+    """
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        try:
+            dt = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=dt_timezone.utc)
+    return dt.astimezone(dt_timezone.utc)
+
+
+def _to_flux_time(dt: datetime) -> str:
+    return dt.astimezone(dt_timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+class _MemoryChunkStore:
+    """
+    LRU store for measurement chunks kept in process memory, bounded by a byte budget.
+    Chunks are kept serialized, so every caller gets its own copy.
+    """
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._invalidated = OrderedDict()
+
+    def get(self, key: str):
+        data = self._entries.get(key)
+        if data is None:
+            return None
+        self._entries.move_to_end(key)
+        return json.loads(data)
+
+    def put(self, key: str, records: list, since: float):
+        """
+        :param since: Time the query of the records started, they are dropped if the chunk was invalidated since.
+        """
+        invalidated_at = self._invalidated.get(key)
+        if invalidated_at is not None and invalidated_at >= since:
+            return
+        data = json.dumps(records)
+        if len(data) > self.max_bytes:
+            return
+        self.delete(key)
+        self._entries[key] = data
+        self.total_bytes += len(data)
+        while self.total_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.total_bytes -= len(evicted)
+
+    def delete(self, key: str):
+        data = self._entries.pop(key, None)
+        if data is not None:
+            self.total_bytes -= len(data)
+
+    def invalidate(self, key: str):
+        self.delete(key)
+        now = time.time()
+        self._invalidated.pop(key, None)
+        self._invalidated[key] = now
+        while next(iter(self._invalidated.values())) < now - _MAX_QUERY_SECONDS:
+            self._invalidated.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.total_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class _DiskChunkStore:
+    """
+    LRU store for measurement chunks as json files in a local directory, bounded by a byte budget.
+    The directory can be shared by several processes on the same node, a deleted file is treated as a miss.
+    Every process resyncs its index with the directory every _DISK_SYNC_SECONDS, so the budget holds for the whole
+    directory, with at most one sync interval of writes by the other processes on top.
+    Invalidations are recorded as .invalid marker files, so other processes drop their stale writes as well.
+    """
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self._entries = OrderedDict()
+        self._synced_at = 0
+        os.makedirs(directory, exist_ok=True)
+        self._sync()
+
+    def _sync(self):
+        """
+        Rebuild the LRU index from the directory, least recently used files first, and enforce the budget.
+        """
+        files = []
+        now = time.time()
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+                if name.endswith('.json'):
+                    files.append((stat.st_mtime, name, stat.st_size))
+                elif name.endswith('.invalid') and stat.st_mtime < now - _MAX_QUERY_SECONDS:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._entries.clear()
+        self.total_bytes = 0
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self.total_bytes += size
+        self._synced_at = time.monotonic()
+        self._evict()
+
+    def _file_name(self, key: str) -> str:
+        return f"{hashlib.sha1(key.encode()).hexdigest()}.json"
+
+    def get(self, key: str):
+        name = self._file_name(key)
+        path = os.path.join(self.directory, name)
+        # The file may have been written by another process since the last sync
+        try:
+            with open(path, 'r') as f:
+                data = f.read()
+            records = json.loads(data)
+        except (OSError, ValueError):
+            size = self._entries.pop(name, None)
+            if size is not None:
+                self.total_bytes -= size
+            return None
+        if name not in self._entries:
+            self._entries[name] = len(data)
+            self.total_bytes += len(data)
+        self._entries.move_to_end(name)
+        try:
+            # Keeps the LRU order for the next sync of all processes
+            os.utime(path)
+        except OSError:
+            pass
+        return records
+
+    def put(self, key: str, records: list, since: float):
+        """
+        :param since: Time the query of the records started, they are dropped if the chunk was invalidated since.
+        """
+        data = json.dumps(records)
+        size = len(data)
+        if size > self.max_bytes:
+            return
+        self.delete(key)
+        name = self._file_name(key)
+        path = os.path.join(self.directory, name)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        # Checked after the write, an invalidation in between either deletes the file or is seen here
+        if self._invalidated_since(key, since):
+            self.delete(key)
+            return
+        self._entries[name] = size
+        self.total_bytes += size
+        if time.monotonic() >= self._synced_at + _DISK_SYNC_SECONDS:
+            self._sync()
+        else:
+            self._evict()
+
+    def delete(self, key: str):
+        name = self._file_name(key)
+        size = self._entries.pop(name, None)
+        if size is not None:
+            self.total_bytes -= size
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            pass
+
+    def _marker_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{hashlib.sha1(key.encode()).hexdigest()}.invalid")
+
+    def _invalidated_since(self, key: str, since: float) -> bool:
+        try:
+            return os.stat(self._marker_path(key)).st_mtime >= since
+        except FileNotFoundError:
+            return False
+
+    def invalidate(self, key: str):
+        # The marker is written before the chunk is deleted, see put. Its mtime is set explicitly because file
+        # timestamps come from a coarser clock than time.time()
+        path = self._marker_path(key)
+        with open(path, 'w'):
+            pass
+        now = time.time()
+        os.utime(path, (now, now))
+        self.delete(key)
+
+    def clear(self):
+        for name in list(self._entries):
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+        self._entries.clear()
+        self.total_bytes = 0
+
+    def _evict(self):
+        while self.total_bytes > self.max_bytes and self._entries:
+            name, size = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class _FetchPlan:
+    """
+    Cached chunks and the chunks that still have to be queried for a single fetch.
+    """
+    def __init__(self, fpf_id: str, sensor_ids: list, start: datetime, cached_stop: datetime):
+        self.fpf_id = fpf_id
+        self.sensor_ids = sensor_ids
+        self.start = start
+        self.cached_stop = cached_stop
+        self.head_start = None
+        self.chunk_starts = []
+        self.chunks = {sensor_id: {} for sensor_id in sensor_ids}
+        self.runs = []
+
+
+class MeasurementChunkCache:
+    """
+    Result cache for sensor measurement range queries, implemented as a Singleton.
+    Range queries are split into chunks aligned to full hours or days (UTC). Chunks that are fully in the past
+    (older than the settle time) never change anymore and are cached per sensor, only the open head of the range is
+    queried live. Writes of late measurements invalidate the affected chunks, also against fetches that are still
+    running. The invalidation reaches other processes only through the disk backend, the default unless one process
+    serves both the API and the ingest.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __new__(cls, *args, **kwargs):
+        return super(MeasurementChunkCache, cls).__new__(cls)
+
+    def __init__(self):
+        if not getattr(self, "_initialized", False):
+            self.log = get_logger()
+            self.enabled = getattr(settings, 'MEASUREMENT_CACHE_ENABLED', True)
+            self.chunk_size = CHUNK_SIZES.get(getattr(settings, 'MEASUREMENT_CACHE_CHUNK', 'day'), CHUNK_SIZES['day'])
+            self.settle_time = timedelta(seconds=getattr(settings, 'MEASUREMENT_CACHE_SETTLE_SECONDS', 300))
+            max_bytes = getattr(settings, 'MEASUREMENT_CACHE_MAX_BYTES', 64 * 1024 * 1024)
+
+            backend = getattr(settings, 'MEASUREMENT_CACHE_BACKEND', 'auto')
+            if backend == 'auto':
+                # Writes only invalidate the chunks of the ingesting process, the memory of other processes would
+                # keep serving stale chunks
+                single_process = {ROLE_WEB, ROLE_INGEST} <= get_process_roles() and \
+                    getattr(settings, 'SERVER_WORKERS', 1) <= 1
+                backend = 'memory' if single_process else 'disk'
+            if backend == 'disk':
+                self._store = _DiskChunkStore(settings.MEASUREMENT_CACHE_DIR, max_bytes)
+            else:
+                self._store = _MemoryChunkStore(max_bytes)
+
+            self._store_lock = threading.Lock()
+            self.hits = 0
+            self.misses = 0
+            self._initialized = True
+
+    def _chunk_start(self, dt: datetime) -> datetime:
+        return _EPOCH + ((dt - _EPOCH) // self.chunk_size) * self.chunk_size
+
+    def _key(self, fpf_id: str, sensor_id: str, chunk_start: datetime) -> str:
+        return f"{fpf_id}:{sensor_id}:{int(self.chunk_size.total_seconds())}:{int(chunk_start.timestamp())}"
+
+    def fetch(self, fpf_id: str, sensor_ids: list, from_date, to_date,
+              query: Callable[[list, str, str], dict]) -> dict:
+        """
+        Returns the measurements for the given sensors and date range, stitched together from cached chunks
+        and live queries.
+        :param fpf_id: The ID of the FPF (bucket name).
+        :param sensor_ids: List of sensor IDs.
+        :param from_date: Start date in ISO 8601 format.
+        :param to_date: End date in ISO 8601 format.
+        :param query: Function (sensor_ids, from_date, to_date) -> {sensor_id: [measurements]} querying InfluxDB.
+        :return: Dictionary with sensor IDs as keys, each containing a list of measurements.
+        """
+        plan = self._plan(fpf_id, sensor_ids, from_date, to_date)
+        if plan is None:
+            return query([str(sensor_id) for sensor_id in sensor_ids], from_date, to_date)
+
+        # Fetch consecutive missing chunks with a single query each
+        for run_start, run_stop in plan.runs:
+            since = time.time()
+            result = query(plan.sensor_ids, _to_flux_time(run_start), _to_flux_time(run_stop))
+            self._store_run(plan, run_start, run_stop, result, since)
+
+        # The open head chunk is always queried live
+        head = query(plan.sensor_ids, plan.head_start, to_date) if plan.head_start else None
+        return self._assemble(plan, head)
+
+    async def afetch(self, fpf_id: str, sensor_ids: list, from_date, to_date,
+                     query: Callable[[list, str, str], Awaitable[dict]]) -> dict:
+        """
+        Same as fetch, for coroutine query functions. The missing chunks and the head are queried concurrently.
+        """
+        plan = self._plan(fpf_id, sensor_ids, from_date, to_date)
+        if plan is None:
+            return await query([str(sensor_id) for sensor_id in sensor_ids], from_date, to_date)
+
+        queries = [
+            query(plan.sensor_ids, _to_flux_time(run_start), _to_flux_time(run_stop))
+            for run_start, run_stop in plan.runs
+        ]
+        if plan.head_start:
+            queries.append(query(plan.sensor_ids, plan.head_start, to_date))
+        since = time.time()
+        results = await asyncio.gather(*queries)
+
+        for (run_start, run_stop), result in zip(plan.runs, results):
+            self._store_run(plan, run_start, run_stop, result, since)
+        return self._assemble(plan, results[-1] if plan.head_start else None)
+
+    def _plan(self, fpf_id: str, sensor_ids: list, from_date, to_date) -> Optional[_FetchPlan]:
+        """
+        Looks up the cached chunks of the requested range.
+        :return: The plan, or None if nothing of the range can be cached.
+        """
+        start = _parse_iso(from_date)
+        stop = _parse_iso(to_date)
+        closed_until = self._chunk_start(timezone.now() - self.settle_time)
+
+        if not self.enabled or start is None or stop is None or start >= closed_until or start >= stop:
+            return None
+
+        plan = _FetchPlan(str(fpf_id), [str(sensor_id) for sensor_id in sensor_ids], start, min(stop, closed_until))
+        if stop > closed_until:
+            plan.head_start = _to_flux_time(max(start, closed_until))
+
+        chunk_start = self._chunk_start(start)
+        while chunk_start < plan.cached_stop:
+            plan.chunk_starts.append(chunk_start)
+            chunk_start += self.chunk_size
+
+        missing = []
+        with self._store_lock:
+            for chunk_start in plan.chunk_starts:
+                complete = True
+                for sensor_id in plan.sensor_ids:
+                    records = self._store.get(self._key(plan.fpf_id, sensor_id, chunk_start))
+                    if records is None:
+                        complete = False
+                        break
+                    plan.chunks[sensor_id][chunk_start] = records
+                if complete:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+                    missing.append(chunk_start)
+        plan.runs = self._runs(missing)
+        return plan
+
+    def _store_run(self, plan: _FetchPlan, run_start: datetime, run_stop: datetime, result: dict, since: float):
+        """
+        Split the result of a query over consecutive missing chunks into chunks and cache them.
+        Chunks invalidated after the query started (since) are only used for this fetch and not cached.
+        """
+        fetched = {sensor_id: {} for sensor_id in plan.sensor_ids}
+        chunk_start = run_start
+        while chunk_start < run_stop:
+            for sensor_id in plan.sensor_ids:
+                fetched[sensor_id][chunk_start] = []
+            chunk_start += self.chunk_size
+        for sensor_id in plan.sensor_ids:
+            for measurement in result.get(sensor_id, []):
+                chunk = fetched[sensor_id].get(self._chunk_start(_parse_iso(measurement['measuredAt'])))
+                if chunk is not None:
+                    chunk.append(measurement)
+
+        cacheable = time.time() - since <= _MAX_QUERY_SECONDS
+        with self._store_lock:
+            for sensor_id, sensor_chunks in fetched.items():
+                for chunk_start, records in sensor_chunks.items():
+                    if cacheable:
+                        self._store.put(self._key(plan.fpf_id, sensor_id, chunk_start), records, since)
+                    plan.chunks[sensor_id][chunk_start] = records
+
+    def _assemble(self, plan: _FetchPlan, head: Optional[dict]) -> dict:
+        measurements = {sensor_id: [] for sensor_id in plan.sensor_ids}
+        first_chunk, last_chunk = plan.chunk_starts[0], plan.chunk_starts[-1]
+        for sensor_id in plan.sensor_ids:
+            for chunk_start in plan.chunk_starts:
+                records = plan.chunks[sensor_id][chunk_start]
+                if chunk_start == first_chunk or chunk_start == last_chunk:
+                    # Only the outer chunks can reach beyond the requested range
+                    records = [
+                        m for m in records
+                        if plan.start <= _parse_iso(m['measuredAt']) < plan.cached_stop
+                    ]
+                measurements[sensor_id].extend(records)
+
+            if head is not None:
+                measurements[sensor_id].extend(head.get(sensor_id, []))
+
+        return measurements
+
+    def _runs(self, chunk_starts: list) -> list:
+        runs = []
+        for chunk_start in chunk_starts:
+            if runs and runs[-1][1] == chunk_start:
+                runs[-1][1] = chunk_start + self.chunk_size
+            else:
+                runs.append([chunk_start, chunk_start + self.chunk_size])
+        return runs
+
+    def invalidate(self, fpf_id: str, sensor_id: str, timestamps: list):
+        """
+        Drop all cached chunks of the sensor that contain one of the given measurement timestamps.
+        :param fpf_id: The ID of the FPF (bucket name).
+        :param sensor_id: The ID of the sensor.
+        :param timestamps: Timestamps of the written measurements.
+        """
+        # Chunks that are still open are not cached by any running fetch either
+        closed_until = self._chunk_start(timezone.now() - self.settle_time)
+        chunk_starts = set()
+        for ts in timestamps:
+            dt = _parse_iso(ts)
+            if dt is not None and dt < closed_until:
+                chunk_starts.add(self._chunk_start(dt))
+
+        with self._store_lock:
+            for chunk_start in chunk_starts:
+                self._store.invalidate(self._key(str(fpf_id), str(sensor_id), chunk_start))
+
+    def clear(self):
+        with self._store_lock:
+            self._store.clear()
+
+    def get_stats(self) -> dict:
+        with self._store_lock:
+            return {
+                "chunks": len(self._store),
+                "bytes": self._store.total_bytes,
+                "maxBytes": self._store.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -1,19 +1,25 @@
 import threading
+from collections import defaultdict
+
 import requests
 from datetime import timedelta
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.triggers.interval import IntervalTrigger
 from django.utils import timezone
 
-from farminsight_dashboard_backend.models import ResourceManagementModel, ControllableAction, ActionMapping
+from farminsight_dashboard_backend.models import ResourceManagementModel, ActionMapping
 from farminsight_dashboard_backend.services.forecast_action_scheduler_services import ForecastActionScheduler
 from farminsight_dashboard_backend.services.influx_services import InfluxDBManager
-from farminsight_dashboard_backend.services.model_action_injection_services import inject_model_actions_into_queue
 from farminsight_dashboard_backend.services.resource_management_model_services import ResourceManagementModelService
+from farminsight_dashboard_backend.services.scheduler_runtime_services import SchedulerRuntime
+from farminsight_dashboard_backend.services.scheduled_job_services import ScheduledJobStore
 from farminsight_dashboard_backend.utils import get_logger
 
 logger = get_logger()
 
+
+def fetch_and_store_model_forecast(model_id: str):
+    ModelScheduler.get_instance()._fetch_and_store_forecast(model_id)
+
+
 class ModelScheduler:
     _instance = None
     _lock = threading.Lock()
@@ -33,7 +39,7 @@ class ModelScheduler:
         Initialize the ResourceForecastScheduler
         """
         if not getattr(self, "_initialized", False):
-            self._scheduler = BackgroundScheduler()
+            self._store = ScheduledJobStore.get_instance()
             self.log = get_logger()
             self._initialized = True
 
@@ -42,7 +48,6 @@ class ModelScheduler:
         Start the scheduler
         """
         self._add_all_model_jobs()
-        self._scheduler.start()
         self.log.info("ResourceForecastScheduler started.")
 
     def add_model_job(self, model_id: str):
@@ -53,19 +58,21 @@ class ModelScheduler:
             model = ResourceManagementModel.objects.get(id=model_id)
             if not model.isActive:
                 self.log.debug(f"Model {model.name} is inactive. Skipping scheduling.")
+                self.remove_model_job(str(model.id))
                 return
 
             interval = model.intervalSeconds or 86400  # default once per day
             job_id = f"resource_model_{model.id}_forecast"
 
-            self._scheduler.add_job(
-                self._fetch_and_store_forecast,
-                trigger=IntervalTrigger(seconds=interval),
-                args=[model.id],
-                id=job_id,
-                replace_existing=True,
-                next_run_time=timezone.now() + timedelta(seconds=5),
-                max_instances=1
+            # Stored in the database, so a restart does not fetch the forecasts of all models again right away
+            self._store.schedule_interval(
+                job_id,
+                'ModelScheduler',
+                fetch_and_store_model_forecast,
+                interval,
+                first_run_at=timezone.now() + timedelta(seconds=5),
+                args=[str(model.id)],
+                executor=SchedulerRuntime.IO,
             )
 
             self.log.info(f"Scheduled forecast fetch for model '{model.name}' every {interval} seconds.")
@@ -77,16 +84,15 @@ class ModelScheduler:
         Remove the forecast task for a specific model
         """
         job_id = f"resource_model_{model_id}_forecast"
-        existing_job = self._scheduler.get_job(job_id)
-        if existing_job:
-            self._scheduler.remove_job(job_id)
+        if self._store.remove(job_id):
             self.log.debug(f"Removed forecast job for model {model_id}.")
 
     def reschedule_model_job(self, model_id: str, new_interval: int):
         """
-        Reschedule forecast task for a specific model with new interval
+        Reschedule forecast task for a specific model with new interval.
+        The stored job is updated in place, so it keeps its last run and the leader replaces its scheduled job
+        with the next sync.
         """
-        self.remove_model_job(model_id)
         self.add_model_job(model_id)
 
     def _add_all_model_jobs(self):
@@ -94,9 +100,15 @@ class ModelScheduler:
         Add jobs for all active models
         """
         models = ResourceManagementModel.objects.filter(isActive=True)
+        job_ids = set()
         for model in models:
+            job_ids.add(f"resource_model_{model.id}_forecast")
             self.add_model_job(str(model.id))
 
+        # Jobs of models that were deactivated or deleted
+        for job_id in set(self._store.get_job_ids('ModelScheduler')) - job_ids:
+            self._store.remove(job_id)
+
     def _fetch_and_store_forecast(self, model_id: str):
         """
         Fetch forecast data from model API, store it in InfluxDB,
@@ -149,33 +161,33 @@ class ModelScheduler:
 
             # 2️⃣ Schedule forecast-based actions
             # Each entry looks like {"timestamp": "...", "value": 1.5, "action": "watering"}
-            scheduler = ForecastActionScheduler.get_instance()
+            entries_by_name = defaultdict(list)
             for action_entry in scenario_actions:
-                action_name = action_entry.get("action")
-                if not action_name:
-                    continue
+                if action_entry.get("action"):
+                    entries_by_name[action_entry["action"]].append(action_entry)
 
-                try:
-                    mapped_action = ActionMapping.objects.get(
-                        action_name=action_name,
-                        resource_management_model_id=model_id
-                    )
-                    print(mapped_action)
-                    print("try to get:",mapped_action.controllable_action_id)
-                    controllable_action = ControllableAction.objects.get(
-                        id=mapped_action.controllable_action_id,
-                        isActive=True
-                    )
-
-                except ActionMapping.DoesNotExist:
+            # Resolve all mapped actions at once
+            mappings = {
+                mapping.action_name: mapping.controllable_action
+                for mapping in ActionMapping.objects
+                .filter(resource_management_model_id=model_id, action_name__in=list(entries_by_name))
+                .select_related("controllable_action")
+            }
+
+            scheduler = ForecastActionScheduler.get_instance()
+            for action_name, entries in entries_by_name.items():
+                controllable_action = mappings.get(action_name)
+                if controllable_action is None:
                     logger.warning(f"Unknown or unmapped action '{action_name}' for model {model.name}")
                     continue
-                except ControllableAction.DoesNotExist:
+                if not controllable_action.isActive:
                     logger.warning(f"Unknown or inactive controllable action '{action_name}' for model {model.name}")
                     continue
 
-                # The scheduler will manage the chain (next actions)
-                scheduler.schedule_forecast_chain(controllable_action, scenario_actions)
+                # The timeline of the model for the action is replaced by the entries of the current forecast
+                scheduler.schedule_forecast_timeline(
+                    controllable_action, entries, value_type="float", source=f"model:{model.id}"
+                )
 
             logger.info(f"Scheduled forecast actions for model {model.name} ({active_scenario}).")
 
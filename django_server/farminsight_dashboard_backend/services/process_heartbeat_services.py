@@ -0,0 +1,78 @@
+import atexit
+import os
+import socket
+import threading
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from farminsight_dashboard_backend.models import ServerProcess
+from farminsight_dashboard_backend.utils import get_logger
+
+
+class ProcessHeartbeat:
+    """
+    Keeps the ServerProcess row of this process alive, implemented as a Singleton.
+    The row is updated every LEADER_LEASE_SECONDS / 3 and deleted when the process exits. A process whose row was not
+    updated for LEADER_LEASE_SECONDS is gone, e.g. it was killed, so the work it started can be recovered.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __new__(cls, *args, **kwargs):
+        return super(ProcessHeartbeat, cls).__new__(cls)
+
+    def __init__(self):
+        if not getattr(self, "_initialized", False):
+            self.log = get_logger()
+            self.timeout_seconds = getattr(settings, 'LEADER_LEASE_SECONDS', 30)
+            self.identity = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+            self._stop = threading.Event()
+            self._thread = None
+            self._initialized = True
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._beat()
+        self._thread = threading.Thread(target=self._run, name='process-heartbeat', daemon=True)
+        self._thread.start()
+        atexit.register(self.stop)
+
+    def stop(self):
+        self._stop.set()
+        try:
+            ServerProcess.objects.filter(identity=self.identity).delete()
+        except Exception as e:
+            self.log.warning(f"Could not remove the heartbeat of process {self.identity}: {e}")
+
+    def get_live_identities(self) -> set[str]:
+        """
+        :return: Identities of the processes whose heartbeat is not older than LEADER_LEASE_SECONDS.
+        """
+        seen_after = timezone.now() - timedelta(seconds=self.timeout_seconds)
+        return set(ServerProcess.objects.filter(lastSeenAt__gte=seen_after).values_list('identity', flat=True))
+
+    def _run(self):
+        while not self._stop.wait(self.timeout_seconds / 3):
+            close_old_connections()
+            self._beat()
+
+    def _beat(self):
+        now = timezone.now()
+        try:
+            ServerProcess.objects.update_or_create(
+                identity=self.identity, defaults={'lastSeenAt': now}, create_defaults={'startedAt': now, 'lastSeenAt': now}
+            )
+        except Exception as e:
+            self.log.warning(f"Could not update the heartbeat of process {self.identity}: {e}")
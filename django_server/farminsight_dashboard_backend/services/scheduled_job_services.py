@@ -0,0 +1,306 @@
+import threading
+from datetime import datetime, timedelta
+from typing import Callable
+
+from apscheduler.triggers.date import DateTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from farminsight_dashboard_backend.models import ScheduledJob, SchedulerVersion
+from farminsight_dashboard_backend.services.leader_election_services import LeaderElection
+from farminsight_dashboard_backend.services.scheduler_runtime_services import SchedulerRuntime
+from farminsight_dashboard_backend.utils import get_logger
+
+
+class ScheduledJobStore:
+    """
+    Keeps scheduler jobs that have to survive a restart in the database and restores them into the SchedulerRuntime,
+    implemented as a Singleton. A job is stored with the dotted path of its function and its arguments as JSON,
+    so only module level functions with JSON serializable arguments can be stored.
+    On restore, one-off jobs that are overdue by more than SCHEDULED_JOB_MISFIRE_GRACE_SECONDS are dropped instead of
+    running late, all other overdue jobs run once, SCHEDULED_JOB_STAGGER_SECONDS apart. Restoring is idempotent and
+    repeated every SCHEDULED_JOB_SYNC_SECONDS, so the leader also picks up jobs stored by other processes.
+    Processes that did not start the store, e.g. web processes, only store the jobs and count up the version of the
+    jobs, see notify_change. The leader polls the versions every SCHEDULER_CHANGE_POLL_SECONDS and restores the jobs
+    right away when they changed.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    OWNER = 'ScheduledJobStore'
+    VERSION_NAME = 'scheduled_jobs'
+
+    @classmethod
+    def get_instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __new__(cls, *args, **kwargs):
+        return super(ScheduledJobStore, cls).__new__(cls)
+
+    def __init__(self):
+        if not getattr(self, "_initialized", False):
+            self.log = get_logger()
+            self._scheduler = SchedulerRuntime.get_instance()
+            self.misfire_grace_seconds = getattr(settings, 'SCHEDULED_JOB_MISFIRE_GRACE_SECONDS', 300)
+            self.stagger_seconds = getattr(settings, 'SCHEDULED_JOB_STAGGER_SECONDS', 2)
+            self.sync_seconds = getattr(settings, 'SCHEDULED_JOB_SYNC_SECONDS', 60)
+            self.change_poll_seconds = getattr(settings, 'SCHEDULER_CHANGE_POLL_SECONDS', 2)
+            self._restore_lock = threading.Lock()
+            # Definition (func, args, intervalSeconds, executor) of every job this process scheduled, changed by the
+            # sync, the jobs and the request threads
+            self._scheduled = {}
+            self._scheduled_lock = threading.RLock()
+            # Version name -> (callback, version seen last)
+            self._watched = {self.VERSION_NAME: [self.restore, None]}
+            self._watched_lock = threading.Lock()
+            self._started = False
+            self._initialized = True
+
+    def start(self):
+        self._started = True
+        self._poll_changes(run_callbacks=False)
+        self.restore()
+        self._scheduler.add_job(
+            self.OWNER,
+            self.restore,
+            executor=SchedulerRuntime.CPU,
+            trigger='interval',
+            seconds=self.sync_seconds,
+            id='scheduled_job_sync',
+            replace_existing=True,
+        )
+        self._scheduler.add_job(
+            self.OWNER,
+            self._poll_changes,
+            executor=SchedulerRuntime.CPU,
+            trigger='interval',
+            seconds=self.change_poll_seconds,
+            id='scheduler_change_poll',
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+        )
+
+    def watch(self, name: str, callback: Callable[[], None]):
+        """
+        Call the callback on the leader when another process counted up the version with the name, see notify_change.
+        """
+        with self._watched_lock:
+            self._watched[name] = [callback, None]
+
+    @staticmethod
+    def notify_change(name: str):
+        """
+        Count up the version with the name, so the leader applies the change within SCHEDULER_CHANGE_POLL_SECONDS.
+        """
+        if not SchedulerVersion.objects.filter(name=name).update(version=F('version') + 1):
+            SchedulerVersion.objects.get_or_create(name=name)
+            SchedulerVersion.objects.filter(name=name).update(version=F('version') + 1)
+
+    def _poll_changes(self, run_callbacks: bool = True):
+        close_old_connections()
+        versions = dict(SchedulerVersion.objects.values_list('name', 'version'))
+        changed = []
+        with self._watched_lock:
+            for name, watched in self._watched.items():
+                version = versions.get(name, 0)
+                if watched[1] is not None and watched[1] != version:
+                    changed.append(watched[0])
+                watched[1] = version
+        if not run_callbacks:
+            return
+        for callback in changed:
+            try:
+                callback()
+            except Exception as e:
+                self.log.error(f"Could not apply the scheduler changes of another process: {e}")
+
+    def schedule_once(self, job_id: str, owner: str, func: Callable, run_at: datetime, args: list = None,
+                      executor: str = SchedulerRuntime.IO):
+        """
+        Store and schedule a job that runs once, replacing a stored job with the same ID.
+        :param job_id: ID of the job.
+        :param owner: Name of the service owning the job.
+        :param func: Module level function to run.
+        :param run_at: Time to run the job at.
+        :param args: JSON serializable arguments of the function.
+        :param executor: SchedulerRuntime.IO, CPU or ACTUATOR.
+        """
+        job, _ = ScheduledJob.objects.update_or_create(id=job_id, defaults={
+            'owner': owner,
+            'func': self._func_path(func),
+            'args': args or [],
+            'executor': executor,
+            'runAt': run_at,
+            'intervalSeconds': None,
+        })
+        self._add(job, replace=True)
+
+    def schedule_interval(self, job_id: str, owner: str, func: Callable, interval_seconds: int,
+                          first_run_at: datetime = None, args: list = None, executor: str = SchedulerRuntime.IO):
+        """
+        Store and schedule a job that runs every interval_seconds. A stored job with the same function, arguments and
+        interval keeps its next run time, so scheduling it again on every start does not run it again.
+        :param first_run_at: Time of the first run of a new job, default is after one interval.
+        """
+        path = self._func_path(func)
+        args = args or []
+        job = ScheduledJob.objects.filter(id=job_id).first()
+        if job and (job.func, job.args, job.intervalSeconds, job.executor) == (path, args, interval_seconds, executor):
+            self._add(job)
+            return
+
+        now = timezone.now()
+        if job and job.lastRunAt:
+            run_at = max(job.lastRunAt + timedelta(seconds=interval_seconds), now)
+        else:
+            run_at = first_run_at or now + timedelta(seconds=interval_seconds)
+        job, _ = ScheduledJob.objects.update_or_create(id=job_id, defaults={
+            'owner': owner,
+            'func': path,
+            'args': args,
+            'executor': executor,
+            'runAt': run_at,
+            'intervalSeconds': interval_seconds,
+        })
+        self._add(job, replace=True)
+
+    def remove(self, job_id: str) -> bool:
+        """
+        Remove the job from the database and the scheduler.
+        :return: False if no job with the ID was stored.
+        """
+        deleted, _ = ScheduledJob.objects.filter(id=job_id).delete()
+        with self._scheduled_lock:
+            self._scheduled.pop(job_id, None)
+            self._scheduler.remove_job(job_id)
+        if deleted and not self._started:
+            self.notify_change(self.VERSION_NAME)
+        return deleted > 0
+
+    def get_job_ids(self, owner: str) -> list[str]:
+        return list(ScheduledJob.objects.filter(owner=owner).values_list('id', flat=True))
+
+    def restore(self):
+        """
+        Schedule all stored jobs that are not scheduled yet, reschedule the jobs that were changed by another process
+        and remove the jobs that were removed from the database.
+        """
+        with self._restore_lock:
+            close_old_connections()
+            now = timezone.now()
+            grace = timedelta(seconds=self.misfire_grace_seconds)
+            stored = set()
+            overdue = 0
+            # One-off jobs first, they are the actuations that are due at a specific time
+            for job in ScheduledJob.objects.order_by(F('intervalSeconds').asc(nulls_first=True), 'runAt'):
+                if job.runAt < now and self._scheduler.get_job(job.id) is None:
+                    if job.intervalSeconds is None and now - job.runAt > grace:
+                        self.log.warning(f"Dropped job {job.id} of {job.owner}, it was due at {job.runAt.isoformat()}.")
+                        job.delete()
+                        continue
+                    # Overdue jobs run once, spread out so a restart does not run all of them at the same time
+                    job.runAt = now + timedelta(seconds=overdue * self.stagger_seconds)
+                    overdue += 1
+                stored.add(job.id)
+                self._add(job)
+
+            with self._scheduled_lock:
+                for job_id in self._scheduled.keys() - stored:
+                    self._scheduled.pop(job_id, None)
+                    self._scheduler.remove_job(job_id)
+            if overdue:
+                self.log.info(f"Restored {len(stored)} stored jobs, {overdue} of them were overdue.")
+
+    def _add(self, job: ScheduledJob, replace: bool = False):
+        if not self._started:
+            # Only stored, the leader picks the job up with its next poll of the changes
+            if replace:
+                self.notify_change(self.VERSION_NAME)
+            return
+        definition = self._definition(job)
+        with self._scheduled_lock:
+            scheduled = self._scheduler.get_job(job.id)
+            if scheduled is not None and not replace and self._scheduled.get(job.id) == definition:
+                # Jobs added before the start have no next run time yet
+                next_run_time = getattr(scheduled, 'next_run_time', None)
+                # Keep the scheduled job unless the stored one was moved by another process
+                if next_run_time is None or job.runAt <= timezone.now() or \
+                        abs((next_run_time - job.runAt).total_seconds()) < 1:
+                    return
+
+            # Overdue jobs run right away
+            run_at = max(job.runAt, timezone.now())
+            if job.intervalSeconds is None:
+                trigger = DateTrigger(run_date=run_at)
+            else:
+                trigger = IntervalTrigger(seconds=job.intervalSeconds, start_date=run_at)
+            self._scheduler.add_job(
+                job.owner,
+                self._run,
+                executor=job.executor,
+                trigger=trigger,
+                args=[job.id],
+                id=job.id,
+                replace_existing=True,
+                next_run_time=run_at,
+                misfire_grace_time=self.misfire_grace_seconds,
+            )
+            self._scheduled[job.id] = definition
+
+    def _run(self, job_id: str):
+        if not LeaderElection.get_instance().is_leader:
+            # Started right before this process stepped down, the next leader runs it
+            return
+        close_old_connections()
+        job = ScheduledJob.objects.filter(id=job_id).first()
+        if job is None:
+            # Removed by another process
+            with self._scheduled_lock:
+                self._scheduled.pop(job_id, None)
+                self._scheduler.remove_job(job_id)
+            return
+
+        with self._scheduled_lock:
+            scheduled_definition = self._scheduled.get(job_id, self._definition(job))
+        if scheduled_definition != self._definition(job):
+            # Changed by another process since it was scheduled, run it with the stored definition instead
+            self._add(job, replace=True)
+            return
+
+        if job.intervalSeconds is None:
+            # Deleted before it runs, so a crash during the run does not repeat an actuation after the restart
+            job.delete()
+            with self._scheduled_lock:
+                self._scheduled.pop(job_id, None)
+        else:
+            now = timezone.now()
+            scheduled = self._scheduler.get_job(job_id)
+            next_run_time = scheduled.trigger.get_next_fire_time(None, now) if scheduled else None
+            ScheduledJob.objects.filter(id=job_id).update(
+                lastRunAt=now, runAt=next_run_time or now + timedelta(seconds=job.intervalSeconds)
+            )
+
+        try:
+            func = import_string(job.func)
+        except ImportError as e:
+            self.log.error(f"Could not run job {job_id}: {e}")
+            return
+        func(*job.args)
+
+    @staticmethod
+    def _definition(job: ScheduledJob) -> tuple:
+        return job.func, job.args, job.intervalSeconds, job.executor
+
+    @staticmethod
+    def _func_path(func: Callable) -> str:
+        if '.' in func.__qualname__:
+            raise ValueError(f"Only module level functions can be stored, got {func.__qualname__}.")
+        return f"{func.__module__}.{func.__qualname__}"
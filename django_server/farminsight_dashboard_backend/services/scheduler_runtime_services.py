@@ -0,0 +1,193 @@
+import threading
+from typing import Callable
+
+from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR, EVENT_JOB_MISSED, EVENT_JOB_MAX_INSTANCES, \
+    EVENT_JOB_REMOVED, EVENT_ALL_JOBS_REMOVED
+from apscheduler.executors.pool import ThreadPoolExecutor
+from apscheduler.jobstores.base import JobLookupError
+from apscheduler.schedulers.background import BackgroundScheduler
+from django.conf import settings
+
+from farminsight_dashboard_backend.utils import get_logger, has_process_role, ROLE_WORKER
+
+
+class _PoolExecutor(ThreadPoolExecutor):
+    """
+    ThreadPoolExecutor that can report how many runs of its jobs are executing or waiting for a free thread.
+    """
+    def __init__(self, max_workers: int):
+        super().__init__(max_workers)
+        self.max_workers = max_workers
+
+    def get_stats(self) -> dict:
+        if self._lock is None:
+            in_flight = {}
+        else:
+            with self._lock:
+                in_flight = {job_id: runs for job_id, runs in self._instances.items() if runs}
+        total = sum(in_flight.values())
+        return {
+            "maxWorkers": self.max_workers,
+            "running": min(total, self.max_workers),
+            "queued": max(total - self.max_workers, 0),
+            "inFlight": in_flight,
+        }
+
+
+class SchedulerRuntime:
+    """
+    The one APScheduler instance of the process, shared by all schedulers of the backend, implemented as a Singleton.
+    Jobs run on named executors with their own thread pools, so slow jobs of one kind can not starve the others:
+    IO for network and database bound jobs, CPU for maintenance and computations, ACTUATOR for jobs that trigger
+    actions on the hardware. Every job is registered with its owner, so a service can remove all of its jobs.
+    By default runs of a job that were missed while it was still running are coalesced into one run and a job
+    runs at most once at a time, both can be overridden per job.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    IO = 'io'
+    CPU = 'cpu'
+    ACTUATOR = 'actuator'
+
+    @classmethod
+    def get_instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __new__(cls, *args, **kwargs):
+        return super(SchedulerRuntime, cls).__new__(cls)
+
+    def __init__(self):
+        if not getattr(self, "_initialized", False):
+            self.log = get_logger()
+            self._executors = {
+                self.IO: _PoolExecutor(getattr(settings, 'SCHEDULER_IO_WORKERS', 10)),
+                self.CPU: _PoolExecutor(getattr(settings, 'SCHEDULER_CPU_WORKERS', 2)),
+                self.ACTUATOR: _PoolExecutor(getattr(settings, 'SCHEDULER_ACTUATOR_WORKERS', 4)),
+            }
+            self._scheduler = BackgroundScheduler(
+                executors=dict(self._executors),
+                job_defaults={'coalesce': True, 'max_instances': 1},
+            )
+            self._scheduler.add_listener(
+                self._on_job_event,
+                EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES |
+                EVENT_JOB_REMOVED | EVENT_ALL_JOBS_REMOVED
+            )
+            self._start_lock = threading.Lock()
+            self._owners = {}
+            self._counters = {"executed": 0, "errors": 0, "missed": 0, "skippedMaxInstances": 0}
+            self._initialized = True
+
+    def start(self):
+        """
+        Start the scheduler, calling it again has no effect. Jobs added before are scheduled on start.
+        Only the leader of the worker processes runs the scheduler, see LeaderElection and the PROCESS_ROLES setting.
+        """
+        from farminsight_dashboard_backend.services.leader_election_services import LeaderElection
+        if not has_process_role(ROLE_WORKER) or not LeaderElection.get_instance().is_leader:
+            return
+        with self._start_lock:
+            if not self._scheduler.running:
+                self._scheduler.start()
+                self.log.info(f"SchedulerRuntime started with executors {self._executor_sizes()}.")
+
+    @property
+    def running(self) -> bool:
+        return self._scheduler.running
+
+    def pause(self):
+        """
+        Stop running jobs until resume is called, the jobs stay scheduled.
+        """
+        with self._start_lock:
+            if self._scheduler.running:
+                self._scheduler.pause()
+                self.log.info("SchedulerRuntime paused.")
+
+    def resume(self):
+        with self._start_lock:
+            if self._scheduler.running:
+                self._scheduler.resume()
+                self.log.info("SchedulerRuntime resumed.")
+
+    def shutdown(self, wait: bool = False):
+        with self._start_lock:
+            if self._scheduler.running:
+                self._scheduler.shutdown(wait=wait)
+
+    def add_job(self, owner: str, func: Callable, executor: str = IO, **kwargs):
+        """
+        Add a job, see BackgroundScheduler.add_job for the trigger and job options.
+        :param owner: Name of the service owning the job.
+        :param func: The callable to run.
+        :param executor: SchedulerRuntime.IO, CPU or ACTUATOR.
+        :return: The added job.
+        """
+        if executor not in self._executors:
+            raise ValueError(f"Unknown executor '{executor}'.")
+        job = self._scheduler.add_job(func, executor=executor, **kwargs)
+        self._owners[job.id] = owner
+        return job
+
+    def get_job(self, job_id: str):
+        return self._scheduler.get_job(job_id)
+
+    def remove_job(self, job_id: str) -> bool:
+        """
+        :return: False if no job with the ID was scheduled.
+        """
+        try:
+            self._scheduler.remove_job(job_id)
+            return True
+        except JobLookupError:
+            return False
+
+    def remove_jobs(self, owner: str):
+        """
+        Remove all jobs of the owner.
+        """
+        for job_id in [job_id for job_id, job_owner in list(self._owners.items()) if job_owner == owner]:
+            self.remove_job(job_id)
+
+    def _on_job_event(self, event):
+        if event.code == EVENT_JOB_EXECUTED:
+            self._counters["executed"] += 1
+        elif event.code == EVENT_JOB_ERROR:
+            self._counters["errors"] += 1
+        elif event.code == EVENT_JOB_MISSED:
+            self._counters["missed"] += 1
+        elif event.code == EVENT_JOB_MAX_INSTANCES:
+            self._counters["skippedMaxInstances"] += 1
+        elif event.code == EVENT_JOB_REMOVED:
+            self._owners.pop(event.job_id, None)
+        elif event.code == EVENT_ALL_JOBS_REMOVED:
+            self._owners.clear()
+
+    def _executor_sizes(self) -> dict:
+        return {name: executor.max_workers for name, executor in self._executors.items()}
+
+    def get_stats(self) -> dict:
+        """
+        :return: Dictionary with the running and queued runs per executor and all scheduled jobs by owner.
+        """
+        jobs = {}
+        for job in self._scheduler.get_jobs():
+            # Jobs added before the start get their next run time and the job defaults on start
+            next_run_time = getattr(job, 'next_run_time', None)
+            jobs.setdefault(self._owners.get(job.id, 'unknown'), []).append({
+                "id": job.id,
+                "executor": job.executor,
+                "nextRunTime": next_run_time.isoformat() if next_run_time else None,
+                "maxInstances": getattr(job, 'max_instances', None),
+                "coalesce": getattr(job, 'coalesce', None),
+            })
+        return {
+            "running": self._scheduler.running,
+            "executors": {name: executor.get_stats() for name, executor in self._executors.items()},
+            "jobs": jobs,
+            **self._counters,
+        }
@@ -0,0 +1,160 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from apscheduler.triggers.date import DateTrigger
+from django.conf import settings
+from django.db import connections
+from django.utils.timezone import now
+
+from farminsight_dashboard_backend.models import Camera
+from farminsight_dashboard_backend.services.camera_services import find_camera_smart_plug, switch_camera_plug, \
+    capture_camera_snapshot, save_livestream_snapshot
+from farminsight_dashboard_backend.services.scheduler_runtime_services import SchedulerRuntime
+from farminsight_dashboard_backend.utils import get_logger
+
+
+class SnapshotOrchestrator:
+    """
+    Takes the scheduled snapshots of the cameras, implemented as a Singleton.
+    Snapshot requests of cameras behind the same smart plug that arrive within CAMERA_SNAPSHOT_BATCH_SECONDS are
+    taken in one batch: the plug is switched on once, then all cameras of the batch are polled until they answer
+    and captured concurrently on CAMERA_SNAPSHOT_WORKERS threads. Cameras without a plug are batched on their own.
+    Cameras with a running livestream are not batched, their snapshot is the latest frame of the stream.
+    While a batch runs, its cameras are marked in LIVESTREAM_FRAME_DIR, so a livestream that stops in any process
+    leaves their plug on.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __new__(cls, *args, **kwargs):
+        return super(SnapshotOrchestrator, cls).__new__(cls)
+
+    def __init__(self):
+        if not getattr(self, "_initialized", False):
+            self._scheduler = SchedulerRuntime.get_instance()
+            self.log = get_logger()
+            self.batch_seconds = getattr(settings, 'CAMERA_SNAPSHOT_BATCH_SECONDS', 5)
+            self.ready_timeout_seconds = getattr(settings, 'CAMERA_READY_TIMEOUT_SECONDS', 30)
+            self._pool = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'CAMERA_SNAPSHOT_WORKERS', 8), thread_name_prefix='camera-snapshot'
+            )
+            # Batch key -> ids of the cameras waiting for the batch
+            self._batches = {}
+            self._batches_lock = threading.Lock()
+            self.capture_dir = getattr(settings, 'LIVESTREAM_FRAME_DIR', os.path.join(settings.MEDIA_ROOT, 'livestream'))
+            self._initialized = True
+
+    def request_snapshot(self, camera_id):
+        """
+        Add the camera to the pending batch of its plug, the batch is scheduled with the first camera.
+        Called by the snapshot jobs of the CameraScheduler.
+        :param camera_id: ID of the camera
+        """
+        try:
+            if save_livestream_snapshot(camera_id) is not None:
+                return
+        except Exception as e:
+            self.log.warning(f"Could not take the snapshot from the livestream of camera {camera_id}: {e}")
+
+        camera = Camera.objects.filter(id=camera_id, isActive=True).first()
+        if camera is None:
+            self.log.warning(f"Camera with ID {camera_id} does not exist or is not active.")
+            return
+
+        plug = find_camera_smart_plug(camera)
+        key = f"plug_{plug.id}" if plug else f"camera_{camera.id}"
+
+        with self._batches_lock:
+            batch = self._batches.get(key)
+            if batch is not None:
+                if camera.id not in batch['cameras']:
+                    batch['cameras'].append(camera.id)
+                return
+            self._batches[key] = {'plug': plug, 'cameras': [camera.id]}
+
+        self._scheduler.add_job(
+            'SnapshotOrchestrator',
+            self._run_batch,
+            executor=SchedulerRuntime.IO,
+            trigger=DateTrigger(run_date=now() + timedelta(seconds=self.batch_seconds if plug else 0)),
+            args=[key],
+            id=f"snapshot_batch_{key}",
+            replace_existing=True,
+            misfire_grace_time=None,
+        )
+
+    def _run_batch(self, key: str):
+        with self._batches_lock:
+            batch = self._batches.pop(key, None)
+        if batch is None:
+            return
+
+        cameras = list(Camera.objects.filter(id__in=batch['cameras'], isActive=True))
+        self._mark_capturing(cameras)
+        try:
+            self._capture_batch(cameras, batch['plug'])
+        finally:
+            self._unmark_capturing(cameras)
+
+    def is_capturing(self, camera_id) -> bool:
+        """
+        :param camera_id: ID of the camera
+        :return: True if a snapshot batch of any process is taking a snapshot of the camera.
+        """
+        try:
+            age_seconds = time.time() - os.path.getmtime(self._capture_path(str(camera_id)))
+        except OSError:
+            return False
+        # A batch polls its cameras for CAMERA_READY_TIMEOUT_SECONDS after switching the plug, older marks are left over
+        return age_seconds < 2 * self.ready_timeout_seconds
+
+    def _capture_batch(self, cameras: list, plug):
+        if plug is not None:
+            self.log.info(f"Switching Smart Plug '{plug.name}' on for the snapshots of {len(cameras)} camera(s).")
+            try:
+                switch_camera_plug(plug, "On")
+            except Exception as e:
+                self.log.error(f"Error triggering camera plug: {e}", extra={'resource_id': plug.id})
+
+        deadline = time.monotonic() + self.ready_timeout_seconds
+        futures = [
+            self._pool.submit(self._capture, camera.id, camera.snapshotUrl, deadline)
+            for camera in cameras
+        ]
+        for future in futures:
+            future.result()
+
+    def _mark_capturing(self, cameras: list):
+        os.makedirs(self.capture_dir, exist_ok=True)
+        for camera in cameras:
+            with open(self._capture_path(str(camera.id)), 'a'):
+                os.utime(self._capture_path(str(camera.id)))
+
+    def _unmark_capturing(self, cameras: list):
+        for camera in cameras:
+            try:
+                os.remove(self._capture_path(str(camera.id)))
+            except OSError:
+                pass
+
+    def _capture_path(self, camera_id: str) -> str:
+        return os.path.join(self.capture_dir, f"{camera_id}.capturing")
+
+    def _capture(self, camera_id, snapshot_url: str, deadline: float):
+        try:
+            capture_camera_snapshot(camera_id, snapshot_url, deadline)
+        except Exception:
+            # Logged by capture_camera_snapshot
+            pass
+        finally:
+            connections.close_all()
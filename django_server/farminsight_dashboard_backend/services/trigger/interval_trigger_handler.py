@@ -1,40 +1,54 @@
-from apscheduler.schedulers.background import BackgroundScheduler
 import json
 from datetime import timedelta
 from django.utils.timezone import now
 
+from farminsight_dashboard_backend.services.scheduler_runtime_services import SchedulerRuntime
+from farminsight_dashboard_backend.services.scheduled_job_services import ScheduledJobStore
 from farminsight_dashboard_backend.utils import get_logger
 from farminsight_dashboard_backend.serializers import ActionQueueSerializer
 from farminsight_dashboard_backend.services.trigger.base_trigger_handlers import BaseTriggerHandler
 
 logger = get_logger()
 
-scheduler = BackgroundScheduler()
-scheduler.start()
+scheduler = SchedulerRuntime.get_instance()
 
 class IntervalTriggerHandler(BaseTriggerHandler):
     def should_trigger(self, interval, **kwargs):
         pass
 
     def enqueue_if_needed(self):
-        logic = json.loads(self.trigger.triggerLogic)
-        delay = logic.get("delayInSeconds", 0)
+        if scheduler.get_job(interval_trigger_job_id(self.trigger.id)):
+            return
 
-        interval = delay + int(json.loads(self.trigger.action.additionalInformation).get("delay", 0))
+        schedule_interval_trigger(self.trigger)
+        # Triggers can be processed before the app started the schedulers
+        scheduler.start()
 
-        job_id = f"interval_trigger_{self.trigger.id}"
 
-        if scheduler.get_job(job_id):
-            return
+def interval_trigger_job_id(trigger_id) -> str:
+    return f"interval_trigger_{trigger_id}"
+
+
+def schedule_interval_trigger(trigger):
+    """
+    Schedule the job of the interval trigger, or update it if the interval changed.
+    :param trigger: The ActionTrigger of type interval.
+    """
+    logic = json.loads(trigger.triggerLogic)
+    delay = logic.get("delayInSeconds", 0)
+
+    interval = delay + int(json.loads(trigger.action.additionalInformation).get("delay", 0))
 
-        scheduler.add_job(
-            func=enqueue_interval_action,
-            args=[self.trigger.id],
-            id=job_id,
-            trigger="interval",
-            seconds=interval,
-            next_run_time=now() + timedelta(seconds=delay)
-        )
+    # Stored in the database, a restart keeps the interval instead of starting it over
+    ScheduledJobStore.get_instance().schedule_interval(
+        interval_trigger_job_id(trigger.id),
+        'IntervalTriggerHandler',
+        enqueue_interval_action,
+        interval,
+        first_run_at=now() + timedelta(seconds=delay),
+        args=[str(trigger.id)],
+        executor=SchedulerRuntime.ACTUATOR,
+    )
 
 
 def enqueue_interval_action(trigger_id):
@@ -43,12 +57,16 @@ def enqueue_interval_action(trigger_id):
     :param trigger_id:
     :return:
     """
-    from farminsight_dashboard_backend.services.action_trigger_services import get_action_trigger
+    from farminsight_dashboard_backend.models import ActionTrigger
     from farminsight_dashboard_backend.services.action_queue_services import process_action_queue, is_already_enqueued
 
-    trigger = get_action_trigger(trigger_id)
+    trigger = ActionTrigger.objects.filter(id=trigger_id).select_related('action').first()
+    if trigger is None or not trigger.isActive:
+        # The trigger schedules its job again when it is activated
+        ScheduledJobStore.get_instance().remove(interval_trigger_job_id(trigger_id))
+        return
 
-    if trigger and trigger.action.isAutomated and trigger.isActive:
+    if trigger.action.isAutomated:
         # Only enqueue if the action is new (there must not be a created action by the same trigger in the queue, which has not ended yet.)
         if not is_already_enqueued(trigger_id):
             serializer = ActionQueueSerializer(data={
@@ -1,5 +1,5 @@
 import json
-from datetime import datetime
+from datetime import datetime, time, timedelta
 
 from farminsight_dashboard_backend.utils import get_logger
 from farminsight_dashboard_backend.serializers import ActionQueueSerializer
@@ -7,17 +7,41 @@ from farminsight_dashboard_backend.services.trigger.base_trigger_handlers import
 
 logger = get_logger()
 
+
+def parse_time_of_day_window(trigger_logic: str) -> tuple[time, time]:
+    """
+    :param trigger_logic: Trigger logic like {"from": "HH:MM", "to": "HH:MM"}.
+    :return: The from and to time of the window.
+    """
+    logic = json.loads(trigger_logic)
+    return datetime.strptime(logic["from"], "%H:%M").time(), datetime.strptime(logic["to"], "%H:%M").time()
+
+
+def next_time_of_day_boundary(from_time: time, to_time: time, after: datetime) -> datetime:
+    """
+    The next time after the given time at which the trigger enters or leaves its window, in the local time of the
+    server like should_trigger. The window includes the to time, so it is left one second later.
+    :param from_time: Start of the window.
+    :param to_time: End of the window, before the from time if the window crosses midnight.
+    :param after: Timezone aware time to start from.
+    :return: Timezone aware time of the next boundary.
+    """
+    today = after.astimezone().date()
+    boundaries = []
+    for day in (today, today + timedelta(days=1)):
+        boundaries.append(datetime.combine(day, from_time).astimezone())
+        boundaries.append(datetime.combine(day, to_time).astimezone() + timedelta(seconds=1))
+    return min(boundary for boundary in boundaries if boundary > after)
+
+
 class TimeOfDayTriggerHandler(BaseTriggerHandler):
     def should_trigger(self):
         """
         :return:
         """
         try:
-            logic = json.loads(self.trigger.triggerLogic)
             now = datetime.now().time()
-
-            from_time = datetime.strptime(logic["from"], "%H:%M").time()
-            to_time = datetime.strptime(logic["to"], "%H:%M").time()
+            from_time, to_time = parse_time_of_day_window(self.trigger.triggerLogic)
 
             # Handle range that crosses midnight
             if from_time <= to_time:
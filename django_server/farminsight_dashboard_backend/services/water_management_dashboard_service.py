@@ -1,38 +1,33 @@
 import datetime
+from zoneinfo import ZoneInfo
 
 import numpy as np
-import requests
 
 from farminsight_dashboard_backend.models import Location, FPF
 from farminsight_dashboard_backend.services import InfluxDBManager
+from farminsight_dashboard_backend.services.weather_client_services import WeatherClient, WEATHER_TIMEZONE
 
 from farminsight_dashboard_backend.models import Sensor
+from farminsight_dashboard_backend.utils import fan_out
 from collections import defaultdict
 
 
 def get_current_weather_snapshot(location_id: str) -> dict:
     location = Location.objects.get(id=location_id)
     try:
-        request_url = (
-            f"https://api.open-meteo.com/v1/forecast?"
-            f"latitude={location.latitude}&longitude={location.longitude}"
-            f"&hourly=temperature_2m"
-            f"&daily=weather_code,precipitation_probability_max"
-            f"&timezone=Europe%2FBerlin"
-        )
-
-        response = requests.get(request_url)
-        raw = response.json()
-        now = datetime.datetime.now().replace(minute=0, second=0, microsecond=0)
+        raw = WeatherClient.get_instance().get_forecast(location.latitude, location.longitude)
+        # The times of the forecast are local times of its timezone
+        now = datetime.datetime.now(ZoneInfo(WEATHER_TIMEZONE))
         times = raw["hourly"]["time"]
         temps = raw["hourly"]["temperature_2m"]
 
-        idx_now = times.index(now.isoformat(timespec="minutes"))
+        idx_now = times.index(now.strftime("%Y-%m-%dT%H:00"))
+        idx_today = raw["daily"]["time"].index(now.date().isoformat())
 
         return {
-            "weatherCode": raw["daily"]["weather_code"][0],
+            "weatherCode": raw["daily"]["weather_code"][idx_today],
             "currentTemperature": temps[idx_now],
-            "rainProbabilityToday": raw["daily"]["precipitation_probability_max"][0],
+            "rainProbabilityToday": raw["daily"]["precipitation_probability_max"][idx_today],
         }
 
     except Exception as e:
@@ -185,13 +180,20 @@ def collect_water_management_dashboard_data(
     if not water_sensor_id or not soil_sensor_id:
         raise ValueError("RMM active but sensor IDs are missing")
 
-    weather = get_current_weather_snapshot(location_id)
-
-    water_level = get_latest_water_level(water_sensor_id)
-    water_levels = get_weekly_water_levels(water_sensor_id)
+    # The sources are independent of each other, a failing or slow source only leaves its part empty
+    results, errors = fan_out({
+        "weather": lambda: get_current_weather_snapshot(location_id),
+        "waterLevel": lambda: get_latest_water_level(water_sensor_id),
+        "waterLevels": lambda: get_weekly_water_levels(water_sensor_id),
+        "fieldMoisture": lambda: get_latest_field_moisture(str(fpf.id)),
+    })
+
+    weather = results["weather"]
+    water_level = results["waterLevel"]
+    water_levels = results["waterLevels"]
     avg_usage = calculate_average_daily_water_usage(water_levels) if water_levels else None
 
-    field_moisture = get_latest_field_moisture(str(fpf.id))
+    field_moisture = results["fieldMoisture"]
 
     water_status = {
         "waterLevel": water_level or -1,
@@ -201,9 +203,13 @@ def collect_water_management_dashboard_data(
         "pumpLastRun": None
     }
 
-    return {
+    response = {
         "weatherStatus": weather,
         "waterStatus": water_status,
         "fieldMoisture": field_moisture,
         "waterLevels": water_levels,
     }
+    if errors:
+        response["errors"] = errors
+
+    return response
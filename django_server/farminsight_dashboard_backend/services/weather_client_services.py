@@ -0,0 +1,245 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, time as day_start
+from zoneinfo import ZoneInfo
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+from farminsight_dashboard_backend.utils import get_logger, SingleFlight
+
+# Timezone of the days and hours of the forecasts
+WEATHER_TIMEZONE = 'Europe/Berlin'
+HOURLY_VARIABLES = ['temperature_2m']
+# Hourly values are only used for the current weather, from the current hour on
+HOURLY_FORECAST_HOURS = 48
+DAILY_VARIABLES = [
+    'rain_sum', 'sunshine_duration', 'weather_code', 'wind_speed_10m_max', 'temperature_2m_min', 'temperature_2m_max',
+    'sunrise', 'sunset', 'precipitation_sum', 'precipitation_probability_max',
+]
+
+
+def daily_forecasts(data: dict) -> list:
+    """
+    :param data: An open-meteo response.
+    :return: List of one dictionary per forecast day with the DAILY_VARIABLES and the 'time'.
+    """
+    daily = data['daily']
+    return [
+        {key: daily[key][i] for key in daily}
+        for i in range(len(daily['time']))
+    ]
+
+
+class WeatherClient:
+    """
+    Shared open-meteo client for the forecast scheduler and the dashboards, implemented as a Singleton.
+    Responses are cached per location, keyed by coordinates rounded to WEATHER_COORDINATE_PRECISION decimals.
+    An entry is fresh until the next multiple of WEATHER_CACHE_TTL_SECONDS (the update interval of the weather
+    models), afterwards it is served stale for up to WEATHER_CACHE_STALE_SECONDS while it is revalidated in the
+    background, but never after the end of the day it was fetched on, so the first day is always today.
+    At most WEATHER_CACHE_MAX_ENTRIES locations are cached, the least recently used are dropped.
+    Concurrent requests for the same location share one request, all requests share one connection pool.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __new__(cls, *args, **kwargs):
+        return super(WeatherClient, cls).__new__(cls)
+
+    def __init__(self):
+        if not getattr(self, "_initialized", False):
+            self.log = get_logger()
+            self.url = getattr(settings, 'OPEN_METEO_URL', 'https://api.open-meteo.com/v1/forecast')
+            self.timeout = getattr(settings, 'WEATHER_REQUEST_TIMEOUT_SECONDS', 10)
+            self.precision = getattr(settings, 'WEATHER_COORDINATE_PRECISION', 2)
+            self.ttl = getattr(settings, 'WEATHER_CACHE_TTL_SECONDS', 3600)
+            self.stale_ttl = getattr(settings, 'WEATHER_CACHE_STALE_SECONDS', 6 * 3600)
+            self.max_entries = getattr(settings, 'WEATHER_CACHE_MAX_ENTRIES', 1000)
+            self.batch_size = getattr(settings, 'WEATHER_BATCH_SIZE', 50)
+            self.batch_retries = getattr(settings, 'WEATHER_BATCH_RETRIES', 2)
+
+            self._session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=getattr(settings, 'WEATHER_CONNECTION_POOL_SIZE', 10))
+            self._session.mount('http://', adapter)
+            self._session.mount('https://', adapter)
+
+            self._cache = OrderedDict()
+            self._cache_lock = threading.Lock()
+            self._revalidating = set()
+            self._singleflight = SingleFlight()
+            self.hits = 0
+            self.stale_hits = 0
+            self.misses = 0
+            self._initialized = True
+
+    def coordinate_key(self, latitude, longitude) -> tuple:
+        return round(float(latitude), self.precision), round(float(longitude), self.precision)
+
+    def get_forecast(self, latitude, longitude) -> dict:
+        """
+        Returns the open-meteo forecast (HOURLY_FORECAST_HOURS hourly and 16 days of daily values) for the given
+        coordinates.
+        :param latitude: Latitude of the location.
+        :param longitude: Longitude of the location.
+        :return: The open-meteo response.
+        """
+        key = self.coordinate_key(latitude, longitude)
+        now = time.time()
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+
+        if entry is not None and now < entry['freshUntil']:
+            self.hits += 1
+            return entry['data']
+
+        if entry is not None and now < entry['staleUntil']:
+            self.stale_hits += 1
+            with self._cache_lock:
+                start_revalidation = key not in self._revalidating
+                self._revalidating.add(key)
+            if start_revalidation:
+                threading.Thread(target=self._revalidate, args=(key,), daemon=True).start()
+            return entry['data']
+
+        self.misses += 1
+        return self._singleflight.do(key, self._refresh, key)
+
+    def _revalidate(self, key: tuple):
+        try:
+            self._singleflight.do(key, self._refresh, key)
+        except Exception as e:
+            self.log.warning(f"Failed to revalidate weather forecast for {key}: {e}")
+        finally:
+            with self._cache_lock:
+                self._revalidating.discard(key)
+
+    def get_forecasts(self, coordinates: list) -> tuple[dict, dict]:
+        """
+        Batched variant of get_forecast for many locations. Locations with the same rounded coordinates are requested
+        once, locations without a fresh cache entry are requested in chunks of WEATHER_BATCH_SIZE locations per
+        request. A failed chunk is retried up to WEATHER_BATCH_RETRIES times without affecting the other chunks.
+        :param coordinates: List of (latitude, longitude) tuples.
+        :return: Tuple (forecasts, errors) of dictionaries coordinate_key -> open-meteo response and -> error message.
+        """
+        keys = list(dict.fromkeys(self.coordinate_key(latitude, longitude) for latitude, longitude in coordinates))
+        forecasts = {}
+        missing = []
+        now = time.time()
+        with self._cache_lock:
+            for key in keys:
+                entry = self._cache.get(key)
+                if entry is not None and now < entry['freshUntil']:
+                    forecasts[key] = entry['data']
+                else:
+                    missing.append(key)
+        self.hits += len(forecasts)
+        self.misses += len(missing)
+
+        errors = {}
+        for i in range(0, len(missing), self.batch_size):
+            chunk = missing[i:i + self.batch_size]
+            try:
+                results = self._request_with_retries(chunk)
+            except Exception as e:
+                self.log.warning(f"Failed to fetch weather forecasts for {len(chunk)} locations: {e}")
+                errors.update({key: str(e) for key in chunk})
+                continue
+            for key, data in zip(chunk, results):
+                self._store(key, data)
+                forecasts[key] = data
+
+        return forecasts, errors
+
+    def _request_with_retries(self, keys: list) -> list:
+        for attempt in range(self.batch_retries + 1):
+            try:
+                return self._request(keys)
+            except Exception as e:
+                if attempt == self.batch_retries:
+                    raise
+                self.log.info(f"Retrying weather forecast request for {len(keys)} locations: {e}")
+                time.sleep(2 ** attempt)
+
+    def _refresh(self, key: tuple) -> dict:
+        data = self._request([key])[0]
+        self._store(key, data)
+        return data
+
+    def _store(self, key: tuple, data: dict):
+        end_of_day = self._end_of_day()
+        fresh_until = min((time.time() // self.ttl + 1) * self.ttl, end_of_day)
+        with self._cache_lock:
+            self._cache[key] = {
+                'data': data,
+                'freshUntil': fresh_until,
+                'staleUntil': min(fresh_until + self.stale_ttl, end_of_day),
+            }
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    @staticmethod
+    def _end_of_day() -> float:
+        today = datetime.now(ZoneInfo(WEATHER_TIMEZONE)).date()
+        return datetime.combine(today + timedelta(days=1), day_start(), tzinfo=ZoneInfo(WEATHER_TIMEZONE)).timestamp()
+
+    def _request(self, keys: list) -> list:
+        """
+        Requests the forecasts of one or multiple locations with a single open-meteo request.
+        :return: List of the open-meteo responses in the order of the keys.
+        """
+        response = self._session.get(self.url, params={
+            'latitude': ','.join(str(key[0]) for key in keys),
+            'longitude': ','.join(str(key[1]) for key in keys),
+            'hourly': ','.join(HOURLY_VARIABLES),
+            'forecast_hours': HOURLY_FORECAST_HOURS,
+            'daily': ','.join(DAILY_VARIABLES),
+            'timezone': WEATHER_TIMEZONE,
+            'forecast_days': 16,
+        }, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        # open-meteo only answers with a list if multiple locations were requested
+        results = data if isinstance(data, list) else [data]
+        if len(results) != len(keys):
+            raise ValueError(f"Expected {len(keys)} forecasts from open-meteo, got {len(results)}.")
+        return results
+
+    def get_daily_forecasts(self, latitude, longitude) -> list:
+        """
+        :return: List of one dictionary per forecast day with the DAILY_VARIABLES and the 'time'.
+        """
+        return daily_forecasts(self.get_forecast(latitude, longitude))
+
+    def invalidate(self, latitude=None, longitude=None):
+        """
+        Drop the cached forecast of the given coordinates, or all cached forecasts.
+        """
+        with self._cache_lock:
+            if latitude is None or longitude is None:
+                self._cache.clear()
+            else:
+                self._cache.pop(self.coordinate_key(latitude, longitude), None)
+
+    def get_stats(self) -> dict:
+        with self._cache_lock:
+            entries = len(self._cache)
+        return {
+            "entries": entries,
+            "hits": self.hits,
+            "staleHits": self.stale_hits,
+            "misses": self.misses,
+            "requests": self._singleflight.get_stats(),
+        }
@@ -1,21 +1,26 @@
 import threading
+import time
+from collections import defaultdict
 
 from datetime import datetime, timedelta
 
-import requests
-from requests import RequestException
-
-from apscheduler.schedulers.background import BackgroundScheduler
 from django.utils import timezone
 
 from django_server import settings
 from farminsight_dashboard_backend.services import get_location_by_id
 from farminsight_dashboard_backend.services.data_retention_services import cleanup_task
+from farminsight_dashboard_backend.services.scheduled_job_services import ScheduledJobStore
+from farminsight_dashboard_backend.services.scheduler_runtime_services import SchedulerRuntime
+from farminsight_dashboard_backend.services.weather_client_services import WeatherClient, daily_forecasts
 
 from farminsight_dashboard_backend.utils import get_logger
 from farminsight_dashboard_backend.models import LogMessage, Location
 
 
+def fetch_location_weather_forecasts(location_ids: list):
+    WeatherForecastScheduler.get_instance().fetch_weather_forecasts(location_ids)
+
+
 class WeatherForecastScheduler:
     _instance = None
     _lock = threading.Lock()
@@ -39,39 +44,47 @@ class WeatherForecastScheduler:
         """
         if not getattr(self, "_initialized", False):
             #
-            self._scheduler = BackgroundScheduler()
+            self._scheduler = SchedulerRuntime.get_instance()
             self.logger = get_logger()
             self._initialized = True
 
 
     def start(self):
-        self._add_all_forecast_jobs()
-        self._scheduler.start()
+        self._scheduler.add_job(
+            'WeatherForecastScheduler',
+            self.fetch_weather_forecasts,
+            executor=SchedulerRuntime.IO,
+            trigger='cron',
+            hour='6',
+            minute='0',
+            id="weather_forecast_batch",
+            replace_existing=True,
+            next_run_time=timezone.now() + timedelta(seconds=1)
+        )
         self.logger.debug("WeatherForecastScheduler started")
 
 
 
     def stop(self):
-        self._scheduler.shutdown()
+        self._scheduler.remove_jobs('WeatherForecastScheduler')
         self.logger.debug("WeatherForecastScheduler stopped")
 
     def add_forecast_job(self, location_id: str):
         """
-        Add a get job for weather forecast.
+        Fetch the weather forecast of a new or changed location right away instead of waiting for the next daily batch.
+        The job is stored with the ScheduledJobStore, so the leader runs it even if the location changed in another process.
         :param location_id: ID of the location
         """
         try:
-            location = get_location_by_id(location_id)#
+            location = get_location_by_id(location_id)
             if location.gatherForecasts:
-                self._scheduler.add_job(
-                    self.fetch_weather_forecast,
-                    trigger='cron',
-                    hour='6',
-                    minute='0',
-                    args=[location_id, location.longitude, location.latitude],
-                    id=f"weather_forecast_{location_id}",
-                    replace_existing=True,
-                    next_run_time=timezone.now() + timedelta(seconds=1)
+                ScheduledJobStore.get_instance().schedule_once(
+                    f"weather_forecast_{location_id}",
+                    'WeatherForecastScheduler',
+                    fetch_location_weather_forecasts,
+                    timezone.now() + timedelta(seconds=1),
+                    args=[[str(location_id)]],
+                    executor=SchedulerRuntime.IO,
                 )
                 self.logger.debug(f"Weather forecast job added for location {location_id}")
         except Exception as e:
@@ -79,50 +92,55 @@ class WeatherForecastScheduler:
 
     def remove_forecast_job(self, location_id: str):
         """
-        Remove a snapshot task for a specific camera.
-        :param location_id:
-        :return:
+        Remove a pending weather forecast job of a location. Locations that stopped gathering forecasts are skipped
+        by the daily batch on their own.
+        :param location_id: ID of the location
         """
-        try:
-            location = Location.objects.get(id=location_id, gatherForecasts=True)
-            if location.gatherForecasts == False:
-                self._scheduler.remove_job(job_id=f"weather_forecast_{location_id}")
-                self.logger.debug(f"weather_forecast_{location.id} task deleted.")
-        except Exception as e:
-            self.logger.warning(f"weather_forecast with ID {location_id} does not exist or is not active.")
+        if ScheduledJobStore.get_instance().remove(f"weather_forecast_{location_id}"):
+            self.logger.debug(f"weather_forecast_{location_id} task deleted.")
 
-    def fetch_weather_forecast(self, locationId, longitude: str, latitude: str):
+    def fetch_weather_forecasts(self, location_ids: list = None):
         """
-        Fetch a Weather Forecast .
-        :param locationId: Location object
+        Fetch the weather forecasts of all locations gathering forecasts in one batch: locations with (nearly) the same
+        coordinates are fetched once, the forecasts are requested in chunks of multiple locations and written with one
+        InfluxDB write per organization.
+        :param location_ids: Only fetch the forecasts of these locations.
         """
-        try:
-            request_url = f"https://api.open-meteo.com/v1/forecast?latitude={latitude}&longitude={longitude}&daily=rain_sum,sunshine_duration,weather_code,wind_speed_10m_max,temperature_2m_min,temperature_2m_max,sunrise,sunset,precipitation_sum,precipitation_probability_max&timezone=Europe%2FBerlin&forecast_days=16"
-            response = requests.get(request_url, stream=True)
-
-            raw_data = response.json()['daily']
-            data = [
-                { key: raw_data[key][i] for key in raw_data }
-                for i in range(len(raw_data['time']))
-            ]
-        except Exception as e:
-            pass
+        from farminsight_dashboard_backend.services import InfluxDBManager
 
-        if response.status_code == 200:
-            location = Location.objects.get(id=locationId)
-
-            from farminsight_dashboard_backend.services import InfluxDBManager
-            InfluxDBManager.get_instance().write_weather_forecast(location.organization.id, location.id, data)
-
-        else:
-            raise ValueError(f"Failed to fetch Weather Forecast. HTTP {response.status_code}")
-
-
-    def _add_all_forecast_jobs(self):
-        """
-        Add all forecast jobs for all locations
-        """
+        started = time.monotonic()
         locations = Location.objects.filter(gatherForecasts=True)
+        if location_ids is not None:
+            locations = locations.filter(id__in=location_ids)
+        locations = list(locations)
+        if not locations:
+            return
+
+        client = WeatherClient.get_instance()
+        coordinates = [(location.latitude, location.longitude) for location in locations]
+        forecasts, errors = client.get_forecasts(coordinates)
+        fetched = time.monotonic()
+
+        forecasts_by_organization = defaultdict(dict)
         for location in locations:
-            if location.gatherForecasts:
-                self.add_forecast_job(location.id)
\ No newline at end of file
+            key = client.coordinate_key(location.latitude, location.longitude)
+            if key in forecasts:
+                forecasts_by_organization[location.organization_id][location.id] = daily_forecasts(forecasts[key])
+            else:
+                self.logger.error(f"Failed to fetch Weather Forecast for location {location.id}: {errors.get(key)}")
+
+        failed_writes = 0
+        for organization_id, forecasts_by_location in forecasts_by_organization.items():
+            try:
+                InfluxDBManager.get_instance().write_weather_forecasts(organization_id, forecasts_by_location)
+            except Exception as e:
+                failed_writes += 1
+                self.logger.error(f"Failed to write Weather Forecasts of organization {organization_id}: {e}")
+
+        unique_locations = len(set(client.coordinate_key(lat, lon) for lat, lon in coordinates))
+        self.logger.info(
+            f"Weather forecasts for {len(locations)} locations ({unique_locations} unique coordinates, "
+            f"{len(errors)} failed) fetched in {fetched - started:.2f}s and written for "
+            f"{len(forecasts_by_organization) - failed_writes}/{len(forecasts_by_organization)} organizations "
+            f"in {time.monotonic() - fetched:.2f}s."
+        )
@@ -1,3 +1,131 @@
-from django.test import TestCase
+import threading
+import uuid
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from farminsight_dashboard_backend.models import ActionQueue, ActionTrigger, ControllableAction, FPF, Organization, \
+    ServerProcess
+from farminsight_dashboard_backend.services import ProcessHeartbeat
+from farminsight_dashboard_backend.services import action_queue_services
+from farminsight_dashboard_backend.services.action_queue_services import fail_stale_queue_entries, \
+    process_queue_entry
+
+
+class BlockingScript:
+    """
+    Action script that runs until it is released, so it times out.
+    """
+    timeout_seconds = 0.1
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def run(self, action_value):
+        self.release.wait(5)
+
+
+def create_queue_entry(**kwargs) -> ActionQueue:
+    organization = Organization.objects.create(name=f"Organization {uuid.uuid4()}")
+    fpf = FPF.objects.create(name='FPF', sensorServiceIp='127.0.0.1', organization=organization)
+    # An action class that is not registered, its script times out after ACTION_SCRIPT_TIMEOUT_SECONDS
+    action = ControllableAction.objects.create(
+        name='Pump', actionClassId=uuid.uuid4(), isActive=True, isAutomated=False, FPF=fpf
+    )
+    trigger = ActionTrigger.objects.create(
+        type='manual', actionValueType='boolean', actionValue='On', triggerLogic='{}', isActive=True, action=action
+    )
+    return ActionQueue.objects.create(action=action, trigger=trigger, **kwargs)
+
+
+class ActionQueueTimeoutTests(TransactionTestCase):
+    def setUp(self):
+        self.script = BlockingScript()
+        self.retried = threading.Event()
+        patch_script = mock.patch.object(
+            action_queue_services.typed_action_script_factory, 'get_typed_action_script', return_value=self.script
+        )
+        patch_retry = mock.patch.object(
+            action_queue_services, 'schedule_action_queue_retry', side_effect=lambda run_at: self.retried.set()
+        )
+        patch_script.start()
+        patch_retry.start()
+        self.addCleanup(patch_script.stop)
+        self.addCleanup(patch_retry.stop)
+        self.addCleanup(self.script.release.set)
+
+    def test_timed_out_entry_stays_started_by_its_process(self):
+        queue_entry = create_queue_entry()
+
+        process_queue_entry(queue_entry)
+
+        queue_entry.refresh_from_db()
+        self.assertIsNotNone(queue_entry.startedAt)
+        self.assertIsNone(queue_entry.endedAt)
+        self.assertEqual(queue_entry.startedBy, ProcessHeartbeat.get_instance().identity)
+        self.assertIn('did not finish', queue_entry.error)
+
+    def test_late_result_ends_the_entry(self):
+        queue_entry = create_queue_entry()
+        process_queue_entry(queue_entry)
+
+        self.script.release.set()
+
+        self.assertTrue(self.retried.wait(5))
+        queue_entry.refresh_from_db()
+        self.assertIsNotNone(queue_entry.endedAt)
+
+    def test_late_result_of_an_entry_started_again_is_ignored(self):
+        queue_entry = create_queue_entry()
+        process_queue_entry(queue_entry)
+        # Failed by the leader and started again by another process
+        restarted_at = timezone.now() + timedelta(seconds=1)
+        ActionQueue.objects.filter(id=queue_entry.id).update(startedAt=restarted_at, startedBy='other')
+
+        self.script.release.set()
+
+        self.assertTrue(self.retried.wait(5))
+        queue_entry.refresh_from_db()
+        self.assertIsNone(queue_entry.endedAt)
+        self.assertEqual(queue_entry.startedAt, restarted_at)
+
+
+class StaleQueueEntryTests(TestCase):
+    def setUp(self):
+        patch_retry = mock.patch.object(action_queue_services, 'schedule_action_queue_retry')
+        self.schedule_retry = patch_retry.start()
+        self.addCleanup(patch_retry.stop)
+
+    def test_entry_of_a_gone_process_is_failed(self):
+        queue_entry = create_queue_entry(startedAt=timezone.now() - timedelta(minutes=5), startedBy='gone')
+
+        fail_stale_queue_entries()
+
+        queue_entry.refresh_from_db()
+        self.assertIsNone(queue_entry.startedAt)
+        self.assertIsNone(queue_entry.startedBy)
+        self.assertIsNotNone(queue_entry.failedAt)
+        self.schedule_retry.assert_called_once()
+
+    def test_entry_of_a_live_process_is_kept(self):
+        now = timezone.now()
+        ServerProcess.objects.create(identity='live', startedAt=now, lastSeenAt=now)
+        queue_entry = create_queue_entry(startedAt=now - timedelta(minutes=5), startedBy='live')
+
+        fail_stale_queue_entries()
+
+        queue_entry.refresh_from_db()
+        self.assertIsNotNone(queue_entry.startedAt)
+        self.assertIsNone(queue_entry.failedAt)
+        self.schedule_retry.assert_not_called()
+
+    def test_entry_is_kept_until_its_script_timed_out(self):
+        queue_entry = create_queue_entry(startedAt=timezone.now() - timedelta(seconds=5), startedBy='gone')
+
+        fail_stale_queue_entries()
+
+        queue_entry.refresh_from_db()
+        self.assertIsNotNone(queue_entry.startedAt)
+        self.assertIsNone(queue_entry.failedAt)
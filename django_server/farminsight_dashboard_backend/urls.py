@@ -20,6 +20,8 @@ from farminsight_dashboard_backend.views import (
     CameraView,
     get_camera_images,
     get_camera_livestream,
+    get_camera_hls_playlist,
+    get_camera_hls_segment,
     OrganizationView,
     get_growing_cycles,
     post_harvest,
@@ -47,7 +49,7 @@ from farminsight_dashboard_backend.views import (
     post_log_message_insecure, get_reset_userprofile_password, get_all_userprofiles, post_sensor_order,
     post_growing_cycle_order, post_camera_order, post_controllable_action_order, post_organization_order,
     post_hardware_order, HardwareEditViews, post_hardware, ActionTriggerView, post_fpf_order,
-    post_userprofile_active_status, forgot_password_view, reset_password_view, get_all_organizations,
+    post_userprofile_active_status, get_influx_stats, get_scheduler_stats, forgot_password_view, reset_password_view, get_all_organizations,
     post_model, ResourceManagementModelView, ModelParamsView, get_forecasts, set_active_scenario,
     get_notifications, post_notification, NotificationView,
     EnergyConsumerView, post_energy_consumer, get_energy_consumers_by_fpf,
@@ -98,6 +100,8 @@ urlpatterns = [
     path('cameras', post_camera, name='post_camera'),
     path('cameras/<str:camera_id>', CameraView.as_view(), name='camera_operations'),
     path('cameras/<str:camera_id>/livestream', get_camera_livestream, name='get_camera_livestream'),
+    path('cameras/<str:camera_id>/hls/index.m3u8', get_camera_hls_playlist, name='get_camera_hls_playlist'),
+    path('cameras/<str:camera_id>/hls/<str:segment>', get_camera_hls_segment, name='get_camera_hls_segment'),
     path('cameras/<str:camera_id>/images', get_camera_images, name='get_camera_snapshots'),
     path('cameras/sort-order/<str:fpf_id>', post_camera_order, name='post_camera_order'),
 
@@ -159,6 +163,8 @@ urlpatterns = [
     path('admin/userprofiles-all', get_all_userprofiles, name='get_all_userprofiles'),
     path('admin/set-active/<str:userprofile_id>', post_userprofile_active_status,
          name='post_userprofile_active_status'),
+    path('admin/influx-stats', get_influx_stats, name='get_influx_stats'),
+    path('admin/scheduler-stats', get_scheduler_stats, name='get_scheduler_stats'),
 
     path('notifications', get_notifications, name='get_notifications'),
     path('notifications/create', post_notification, name='post_notification'),
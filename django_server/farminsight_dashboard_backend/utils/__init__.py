@@ -4,4 +4,10 @@ from .api_key_generator import generate_random_api_key, generate_random_token
 from .check_uuid import is_valid_uuid
 from .logging_utils import get_logger
 from .is_named_tuple import is_named_tuple
-from .data_validation import _validate_forecasts_structure
\ No newline at end of file
+from .data_validation import _validate_forecasts_structure
+from .singleflight import SingleFlight
+from .fan_out import fan_out
+from .open_meteo_stub import OpenMeteoStubServer
+from .mqtt_broker_stub import MqttBrokerStub
+from .livestream_frame_buffer import LivestreamFrameBuffer
+from .process_roles import has_process_role, get_process_roles, parse_process_roles, PROCESS_ROLES, ROLE_ALL, ROLE_WEB, ROLE_INGEST, ROLE_REALTIME, ROLE_WORKER
@@ -0,0 +1,93 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Callable
+
+from django.conf import settings
+from django.db import connections
+
+from .logging_utils import get_logger
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'FAN_OUT_MAX_WORKERS', 16),
+                thread_name_prefix='fan-out',
+            )
+        return _executor
+
+
+class _Call:
+    def __init__(self):
+        self.started = threading.Event()
+        self.started_at = None
+
+
+def _run(call: _Call, fn: Callable):
+    call.started_at = time.monotonic()
+    call.started.set()
+    try:
+        return fn()
+    finally:
+        # Worker threads open their own database connections, don't keep them around
+        connections.close_all()
+
+
+def fan_out(calls: dict, timeout: float = None, timeouts: dict = None, defaults: dict = None) -> tuple[dict, dict]:
+    """
+    Runs independent calls concurrently on a shared thread pool and waits for all of them, so the total latency is
+    that of the slowest call instead of the sum of all calls.
+    A call that fails or does not finish in time is replaced by its default value and reported in the errors.
+    The timeout of a call starts when a worker starts it. A call that waited in the queue of the busy pool for
+    FAN_OUT_QUEUE_TIMEOUT_SECONDS is not started at all.
+    Timed out calls can not be interrupted, they finish in the background and their result is discarded.
+    :param calls: Dictionary name -> callable without arguments.
+    :param timeout: Timeout per call in seconds from its start, defaults to FAN_OUT_TIMEOUT_SECONDS.
+    :param timeouts: Dictionary name -> timeout in seconds, overriding the timeout for single calls.
+    :param defaults: Dictionary name -> value used if the call fails, None otherwise.
+    :return: Tuple (results, errors) of dictionaries name -> result and name -> error message.
+    """
+    if timeout is None:
+        timeout = getattr(settings, 'FAN_OUT_TIMEOUT_SECONDS', 10)
+    timeouts = timeouts or {}
+    defaults = defaults or {}
+
+    queue_timeout = getattr(settings, 'FAN_OUT_QUEUE_TIMEOUT_SECONDS', timeout)
+
+    executor = _get_executor()
+    submitted = time.monotonic()
+    futures = {}
+    for name, fn in calls.items():
+        call = _Call()
+        futures[name] = (call, executor.submit(_run, call, fn))
+
+    results = {}
+    errors = {}
+    for name, (call, future) in futures.items():
+        call_timeout = timeouts.get(name, timeout)
+        try:
+            if not call.started.wait(max(submitted + queue_timeout - time.monotonic(), 0)):
+                if future.cancel():
+                    errors[name] = f"Not started within {queue_timeout} seconds, the pool is busy."
+                    results[name] = defaults.get(name)
+                    continue
+                # Started in the meantime
+                call.started.wait()
+            results[name] = future.result(timeout=max(call.started_at + call_timeout - time.monotonic(), 0))
+        except FutureTimeoutError:
+            errors[name] = f"Timed out after {call_timeout} seconds."
+            results[name] = defaults.get(name)
+        except Exception as e:
+            errors[name] = str(e)
+            results[name] = defaults.get(name)
+
+    for name, error in errors.items():
+        get_logger().warning(f"Partial result, '{name}' is unavailable: {error}")
+
+    return results, errors
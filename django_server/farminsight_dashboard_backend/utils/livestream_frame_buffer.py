@@ -0,0 +1,104 @@
+import asyncio
+import os
+import threading
+import time
+
+from django.conf import settings
+
+from .process_roles import has_process_role, ROLE_WORKER
+
+
+class LivestreamFrameBuffer:
+    """
+    The latest JPEG frame of every camera that is currently streamed, implemented as a Singleton.
+    The livestream task puts every encoded frame, the scheduled snapshots take the frame from here instead of fetching
+    one from the camera. If other processes may need them (without the worker role or with several SERVER_WORKERS),
+    the frames are also written to LIVESTREAM_FRAME_DIR, at most once per LIVESTREAM_FRAME_SHARE_SECONDS per camera.
+    """
+    _instance = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls):
+        with cls._lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def __new__(cls, *args, **kwargs):
+        return super(LivestreamFrameBuffer, cls).__new__(cls)
+
+    def __init__(self):
+        if not getattr(self, "_initialized", False):
+            self.frame_dir = getattr(settings, 'LIVESTREAM_FRAME_DIR', os.path.join(settings.MEDIA_ROOT, 'livestream'))
+            self.share_seconds = getattr(settings, 'LIVESTREAM_FRAME_SHARE_SECONDS', 1)
+            # Also shared with several server processes, their livestreams keep the camera plugs of each other on
+            self._share = not has_process_role(ROLE_WORKER) or getattr(settings, 'SERVER_WORKERS', 1) > 1
+            # Camera id -> (jpeg bytes, time.time() of the frame)
+            self._frames = {}
+            self._shared_at = {}
+            self._frames_lock = threading.Lock()
+            self._initialized = True
+
+    async def put(self, camera_id, jpeg: bytes):
+        """
+        Store the latest frame of the camera. The shared file is written in the executor of the event loop.
+        :param camera_id: ID of the camera
+        :param jpeg: The JPEG encoded frame
+        """
+        camera_id = str(camera_id)
+        received_at = time.time()
+        with self._frames_lock:
+            self._frames[camera_id] = (jpeg, received_at)
+            share = self._share and received_at - self._shared_at.get(camera_id, 0) >= self.share_seconds
+            if share:
+                self._shared_at[camera_id] = received_at
+        if share:
+            await asyncio.get_running_loop().run_in_executor(None, self._write_shared, camera_id, jpeg)
+
+    def get(self, camera_id, max_age_seconds: float) -> bytes | None:
+        """
+        :param camera_id: ID of the camera
+        :param max_age_seconds: Maximum age of the frame, older frames mean the camera is not streamed anymore.
+        :return: The latest frame of the camera, None if there is no recent one.
+        """
+        camera_id = str(camera_id)
+        with self._frames_lock:
+            frame = self._frames.get(camera_id)
+        if frame is not None and time.time() - frame[1] <= max_age_seconds:
+            return frame[0]
+
+        path = self._path(camera_id)
+        try:
+            if time.time() - os.path.getmtime(path) <= max_age_seconds:
+                with open(path, 'rb') as f:
+                    return f.read()
+        except OSError:
+            pass
+        return None
+
+    def remove(self, camera_id):
+        """
+        Drop the frame of the camera when its livestream stopped.
+        """
+        camera_id = str(camera_id)
+        with self._frames_lock:
+            self._frames.pop(camera_id, None)
+            shared = self._shared_at.pop(camera_id, None)
+        if shared is not None:
+            try:
+                os.remove(self._path(camera_id))
+            except OSError:
+                pass
+
+    def _path(self, camera_id: str) -> str:
+        return os.path.join(self.frame_dir, f"{camera_id}.jpg")
+
+    def _write_shared(self, camera_id: str, jpeg: bytes):
+        os.makedirs(self.frame_dir, exist_ok=True)
+        path = self._path(camera_id)
+        # Replaced atomically, so a reader never sees a partial frame
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(jpeg)
+        os.replace(tmp_path, path)
@@ -0,0 +1,176 @@
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+
+def _topic_matches(topic_filter: str, topic: str) -> bool:
+    filter_levels = topic_filter.split('/')
+    topic_levels = topic.split('/')
+    for i, level in enumerate(filter_levels):
+        if level == '#':
+            return True
+        if i >= len(topic_levels) or (level != '+' and level != topic_levels[i]):
+            return False
+    return len(filter_levels) == len(topic_levels)
+
+
+def _encode_length(length: int) -> bytes:
+    encoded = bytearray()
+    while True:
+        byte, length = length % 128, length // 128
+        encoded.append(byte | 0x80 if length else byte)
+        if not length:
+            return bytes(encoded)
+
+
+def _encode_string(value: str) -> bytes:
+    data = value.encode()
+    return struct.pack('!H', len(data)) + data
+
+
+class MqttBrokerStub:
+    """
+    Minimal in-process MQTT 3.1.1 broker for tests and benchmarks, a stand-in for mosquitto.
+    Supports connect, publish with QoS 0 to 2, subscribe with + and # wildcards, ping and disconnect, subscribers
+    receive all messages with QoS 0. No sessions, retained messages or authentication.
+    Like a Shelly plug, a message to a topic ending in /command is answered with the lowercased payload on the topic
+    without /command, so state confirmations can be tested. Counts the connections and the published messages.
+    """
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0):
+        """
+        :param host: Interface to bind.
+        :param port: Port to bind, 0 for a free port.
+        :param latency: Artificial latency before every answer of the broker in seconds.
+        """
+        self.latency = latency
+        self.connections = 0
+        self.messages = 0
+        self._lock = threading.Lock()
+        self._subscribers = []
+        self._thread = None
+
+        stub = self
+
+        class Handler(socketserver.BaseRequestHandler):
+            def setup(self):
+                # PUBACK and the state message are written back to back, don't let Nagle delay the second one
+                self.request.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                self.write_lock = threading.Lock()
+                self.filters = []
+
+            def handle(self):
+                try:
+                    while True:
+                        packet_type, flags, body = self._read_packet()
+                        if packet_type == 1:  # CONNECT
+                            with stub._lock:
+                                stub.connections += 1
+                            self.send(b'\x20\x02\x00\x00')
+                        elif packet_type == 3:  # PUBLISH
+                            self._on_publish(flags, body)
+                        elif packet_type == 6:  # PUBREL
+                            self.send(b'\x70\x02' + body[:2])
+                        elif packet_type == 8:  # SUBSCRIBE
+                            self._on_subscribe(body)
+                        elif packet_type == 12:  # PINGREQ
+                            self.send(b'\xd0\x00')
+                        elif packet_type == 14:  # DISCONNECT
+                            return
+                except (ConnectionError, OSError):
+                    return
+                finally:
+                    with stub._lock:
+                        if self in stub._subscribers:
+                            stub._subscribers.remove(self)
+
+            def _read_exactly(self, size: int) -> bytes:
+                data = b''
+                while len(data) < size:
+                    chunk = self.request.recv(size - len(data))
+                    if not chunk:
+                        raise ConnectionError("Client closed the connection.")
+                    data += chunk
+                return data
+
+            def _read_packet(self) -> tuple[int, int, bytes]:
+                header = self._read_exactly(1)[0]
+                length, multiplier = 0, 1
+                while True:
+                    byte = self._read_exactly(1)[0]
+                    length += (byte & 0x7f) * multiplier
+                    multiplier *= 128
+                    if not byte & 0x80:
+                        break
+                return header >> 4, header & 0x0f, self._read_exactly(length) if length else b''
+
+            def _on_publish(self, flags: int, body: bytes):
+                qos = (flags >> 1) & 0x03
+                topic_length = struct.unpack('!H', body[:2])[0]
+                topic = body[2:2 + topic_length].decode()
+                offset = 2 + topic_length
+                if qos:
+                    packet_id, offset = body[offset:offset + 2], offset + 2
+                    # PUBACK for QoS 1, PUBREC for QoS 2
+                    self.send((b'\x40\x02' if qos == 1 else b'\x50\x02') + packet_id)
+                payload = body[offset:]
+                with stub._lock:
+                    stub.messages += 1
+                stub.deliver(topic, payload)
+                if topic.endswith('/command'):
+                    stub.deliver(topic[:-len('/command')], payload.lower())
+
+            def _on_subscribe(self, body: bytes):
+                packet_id, offset, granted = body[:2], 2, b''
+                while offset < len(body):
+                    topic_length = struct.unpack('!H', body[offset:offset + 2])[0]
+                    self.filters.append(body[offset + 2:offset + 2 + topic_length].decode())
+                    offset += 2 + topic_length + 1
+                    granted += b'\x00'
+                with stub._lock:
+                    if self not in stub._subscribers:
+                        stub._subscribers.append(self)
+                self.send(b'\x90' + _encode_length(2 + len(granted)) + packet_id + granted)
+
+            def send(self, data: bytes, delayed: bool = True):
+                if delayed and stub.latency:
+                    time.sleep(stub.latency)
+                with self.write_lock:
+                    self.request.sendall(data)
+
+        class Server(socketserver.ThreadingTCPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        self._server = Server((host, port), Handler)
+
+    @property
+    def address(self) -> tuple[str, int]:
+        return self._server.server_address[:2]
+
+    def deliver(self, topic: str, payload: bytes):
+        """
+        Send a message to all clients subscribed to the topic.
+        """
+        body = _encode_string(topic) + payload
+        packet = b'\x30' + _encode_length(len(body)) + body
+        with self._lock:
+            subscribers = [s for s in self._subscribers if any(_topic_matches(f, topic) for f in s.filters)]
+        for subscriber in subscribers:
+            try:
+                subscriber.send(packet, delayed=False)
+            except OSError:
+                pass
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
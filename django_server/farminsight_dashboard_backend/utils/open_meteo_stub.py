@@ -0,0 +1,136 @@
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from zoneinfo import ZoneInfo
+
+
+def _stub_location(latitude: float, longitude: float, hourly: list, daily: list, timezone: str, forecast_days: int,
+                   forecast_hours: int = None) -> dict:
+    """
+    Deterministic fake forecast for one location, the values only depend on the coordinates and the date.
+    """
+    today = datetime.now(ZoneInfo(timezone)).replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+    rng = random.Random(f"{latitude},{longitude},{today.date()}")
+
+    result = {
+        "latitude": latitude,
+        "longitude": longitude,
+        "timezone": timezone,
+    }
+    if hourly:
+        if forecast_hours:
+            # Like open-meteo, from the current hour on
+            current_hour = datetime.now(ZoneInfo(timezone)).replace(minute=0, second=0, microsecond=0, tzinfo=None)
+            times = [current_hour + timedelta(hours=i) for i in range(forecast_hours)]
+        else:
+            times = [today + timedelta(hours=i) for i in range(forecast_days * 24)]
+        result["hourly"] = {"time": [t.isoformat(timespec="minutes") for t in times]}
+        for variable in hourly:
+            result["hourly"][variable] = [round(rng.uniform(-5, 30), 1) for _ in times]
+    if daily:
+        days = [today + timedelta(days=i) for i in range(forecast_days)]
+        result["daily"] = {"time": [d.date().isoformat() for d in days]}
+        for variable in daily:
+            if variable == "sunrise":
+                values = [(d + timedelta(hours=6, minutes=rng.randint(0, 59))).isoformat(timespec="minutes") for d in days]
+            elif variable == "sunset":
+                values = [(d + timedelta(hours=19, minutes=rng.randint(0, 59))).isoformat(timespec="minutes") for d in days]
+            elif variable == "weather_code":
+                values = [rng.choice([0, 1, 2, 3, 45, 61, 63, 80, 95]) for _ in days]
+            elif variable.startswith("precipitation_probability"):
+                values = [rng.randint(0, 100) for _ in days]
+            elif variable == "sunshine_duration":
+                values = [round(rng.uniform(0, 50000), 2) for _ in days]
+            else:
+                values = [round(rng.uniform(0, 25), 1) for _ in days]
+            result["daily"][variable] = values
+    return result
+
+
+class OpenMeteoStubServer:
+    """
+    Local stand-in for the open-meteo forecast API, for tests and benchmarks (set OPEN_METEO_URL to its url).
+    Answers /v1/forecast for single locations and for comma-separated coordinate lists like open-meteo does,
+    optionally with an artificial latency. Counts the requests and the locations it was asked for.
+    """
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0):
+        """
+        :param host: Interface to bind.
+        :param port: Port to bind, 0 for a free port.
+        :param latency: Artificial latency per request in seconds.
+        """
+        self.latency = latency
+        self.requests = 0
+        self.locations = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != '/v1/forecast':
+                    self._send(404, {"error": True, "reason": "Not found"})
+                    return
+
+                params = {key: values[0] for key, values in parse_qs(url.query).items()}
+                try:
+                    latitudes = [float(v) for v in params['latitude'].split(',')]
+                    longitudes = [float(v) for v in params['longitude'].split(',')]
+                    if len(latitudes) != len(longitudes):
+                        raise ValueError("latitude and longitude must have the same number of elements")
+                except (KeyError, ValueError) as e:
+                    self._send(400, {"error": True, "reason": str(e)})
+                    return
+
+                with stub._lock:
+                    stub.requests += 1
+                    stub.locations += len(latitudes)
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                hourly = [v for v in params.get('hourly', '').split(',') if v]
+                daily = [v for v in params.get('daily', '').split(',') if v]
+                timezone = params.get('timezone', 'GMT')
+                forecast_days = int(params.get('forecast_days', 7))
+                forecast_hours = int(params['forecast_hours']) if params.get('forecast_hours') else None
+                results = [
+                    _stub_location(latitude, longitude, hourly, daily, timezone, forecast_days, forecast_hours)
+                    for latitude, longitude in zip(latitudes, longitudes)
+                ]
+                self._send(200, results[0] if len(results) == 1 else results)
+
+            def _send(self, status: int, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1/forecast"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
@@ -0,0 +1,38 @@
+from django.conf import settings
+
+ROLE_ALL = 'all'
+ROLE_WEB = 'web'
+ROLE_INGEST = 'ingest'
+ROLE_REALTIME = 'realtime'
+ROLE_WORKER = 'worker'
+
+# web: REST API, ingest: measurement and log endpoints of the FPFs, realtime: WebSocket consumers,
+# worker: schedulers and background jobs
+PROCESS_ROLES = [ROLE_WEB, ROLE_INGEST, ROLE_REALTIME, ROLE_WORKER]
+
+
+def parse_process_roles(roles) -> set:
+    """
+    :param roles: Comma separated string or list of roles, 'all' stands for every role.
+    :return: Set of the roles.
+    """
+    if isinstance(roles, str):
+        roles = roles.split(',')
+    parsed = {role.strip().lower() for role in roles if role.strip()}
+    unknown = parsed - set(PROCESS_ROLES) - {ROLE_ALL}
+    if unknown:
+        raise ValueError(f"Unknown process roles: {', '.join(sorted(unknown))}. Valid roles: {', '.join([ROLE_ALL] + PROCESS_ROLES)}.")
+    if not parsed or ROLE_ALL in parsed:
+        return set(PROCESS_ROLES)
+    return parsed
+
+
+def get_process_roles() -> set:
+    return parse_process_roles(getattr(settings, 'PROCESS_ROLES', [ROLE_ALL]))
+
+
+def has_process_role(role: str) -> bool:
+    """
+    Check if this process runs the role, configured by the PROCESS_ROLES setting.
+    """
+    return role in get_process_roles()
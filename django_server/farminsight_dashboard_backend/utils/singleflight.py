@@ -0,0 +1,70 @@
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into a single execution.
+    The first caller executes the function, every caller that arrives while it is still in flight waits for it and
+    receives the same result (or exception). Nothing is kept once the execution has finished, so results are never stale.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.calls = 0
+        self.executions = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        """
+        Execute fn(*args, **kwargs) or join an in-flight execution with the same key.
+        :param key: Hashable key identifying identical calls.
+        :param fn: Function to execute.
+        :return: The result of the (shared) execution.
+        """
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            if call is not None:
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executions += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def get_stats(self) -> dict:
+        """
+        :return: Number of calls, actual executions, coalesced calls and the ratio of coalesced calls.
+        """
+        with self._lock:
+            coalesced = self.calls - self.executions
+            return {
+                "calls": self.calls,
+                "executions": self.executions,
+                "coalesced": coalesced,
+                "coalescingRatio": coalesced / self.calls if self.calls else 0.0,
+                "inFlight": len(self._calls),
+            }
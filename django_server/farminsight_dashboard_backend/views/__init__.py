@@ -7,7 +7,7 @@ from .membership_views import MembershipView
 from .growing_cycle_views import post_growing_cycle, GrowingCycleEditViews, get_growing_cycles, post_growing_cycle_order
 from .sensor_views import SensorView, get_fpf_sensor_types, post_sensor_order
 from .auth_views import login_view, signup_view, logout_view, change_password_view, forgot_password_view, reset_password_view
-from .camera_views import CameraView, post_camera, get_camera_livestream, post_camera_order
+from .camera_views import CameraView, post_camera, get_camera_livestream, get_camera_hls_playlist, get_camera_hls_segment, post_camera_order
 from .harvest_views import post_harvest, HarvestEditViews, get_harvests
 from .log_views import post_log_message, get_log_messages, post_log_message_insecure
 from .location_views import LocationView, get_location, post_location
@@ -17,7 +17,7 @@ from .hardware_views import get_fpf_hardware, post_hardware_order, HardwareEditV
 from .action_trigger_views import post_action_trigger, ActionTriggerView
 from .threshold_views import post_threshold, ThresholdEditViews
 from .utility_views import get_direct_ping
-from .admin_views import get_reset_userprofile_password, get_all_userprofiles, post_userprofile_active_status
+from .admin_views import get_reset_userprofile_password, get_all_userprofiles, post_userprofile_active_status, get_influx_stats, get_scheduler_stats
 from .resource_management_model_views import ResourceManagementModelView, post_model, ModelParamsView, get_forecasts, set_active_scenario, post_model_order
 from .notification_views import get_notifications, post_notification, NotificationView
 from .energy_consumer_views import EnergyConsumerView, post_energy_consumer, get_energy_consumers_by_fpf
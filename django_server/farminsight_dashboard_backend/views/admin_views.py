@@ -3,7 +3,8 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from farminsight_dashboard_backend.serializers import UserprofileSerializer
 from farminsight_dashboard_backend.services import set_password_to_random_password, is_system_admin, all_userprofiles, \
-    set_active_status
+    set_active_status, InfluxDBManager, get_background_job_stats
+from farminsight_dashboard_backend.services.measurement_cache_services import MeasurementChunkCache
 from rest_framework.decorators import api_view, permission_classes
 
 
@@ -36,3 +37,25 @@ def post_userprofile_active_status(request, userprofile_id: str):
     serializer = set_active_status(userprofile_id, active)
 
     return Response(data=serializer.data, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_influx_stats(request):
+    if not is_system_admin(request.user):
+        return Response(status=status.HTTP_403_FORBIDDEN)
+
+    return Response(data={
+        'connection': InfluxDBManager.get_instance().get_connection_stats(),
+        'queryCoalescing': InfluxDBManager.get_instance().get_query_stats(),
+        'measurementCache': MeasurementChunkCache.get_instance().get_stats(),
+    }, status=status.HTTP_200_OK)
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_scheduler_stats(request):
+    if not is_system_admin(request.user):
+        return Response(status=status.HTTP_403_FORBIDDEN)
+
+    return Response(data=get_background_job_stats(), status=status.HTTP_200_OK)
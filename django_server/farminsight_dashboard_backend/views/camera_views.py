@@ -1,14 +1,16 @@
-from urllib.parse import urlparse
-from django.http import StreamingHttpResponse
+import re
+from urllib.parse import urlparse, urlencode
+from django.conf import settings
+from django.http import StreamingHttpResponse, HttpResponse, FileResponse
 from rest_framework import views
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, AllowAny
 from farminsight_dashboard_backend.serializers.camera_serializer import CameraSerializer
 from farminsight_dashboard_backend.services import get_active_camera_by_id, update_camera, delete_camera, \
     get_fpf_by_id, create_camera, is_member, get_camera_by_id, get_organization_by_camera_id, \
-    get_organization_by_fpf_id, is_admin, set_camera_order
+    get_organization_by_fpf_id, is_admin, set_camera_order, HlsStreamingManager
 from farminsight_dashboard_backend.utils import get_logger
 
 
@@ -138,6 +140,77 @@ def get_camera_livestream(request, camera_id):
         )
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_camera_hls_playlist(request, camera_id):
+    """
+    HLS playlist of the livestream, an alternative to the websocket for any number of viewers.
+    Starts the encoder of the camera in the background with the first viewer and answers 503 with Retry-After until
+    the stream is ready, players keep it running by reloading the playlist.
+    A short-lived segment token is added to the segment URIs, so the player does not need to send its credentials.
+    :param request:
+    :param camera_id:
+    :return:
+    """
+    if not is_member(request.user, get_organization_by_camera_id(camera_id)):
+        logger.warning(f"Unauthorized attempt to access camera livestream by user '{request.user.name}'")
+        return Response(status=status.HTTP_403_FORBIDDEN)
+
+    camera = get_active_camera_by_id(camera_id)
+    hls = HlsStreamingManager.get_instance()
+    try:
+        playlist = hls.get_playlist(camera)
+    except (TimeoutError, ConnectionError) as e:
+        logger.error(f"Error starting HLS stream for camera '{camera.name}': {e}", extra={'resource_id': camera_id})
+        return Response({"error": f"Could not start HLS stream: {e}"}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    if playlist is None:
+        response = Response({"error": "The HLS stream is starting."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        response['Retry-After'] = str(getattr(settings, 'HLS_SEGMENT_SECONDS', 2))
+        return response
+
+    query = urlencode({'st': hls.create_segment_token(camera_id)})
+    playlist = re.sub(r'^([^#\s].*)$', lambda match: f"{match.group(1)}?{query}", playlist, flags=re.MULTILINE)
+    playlist = re.sub(r'URI="([^"]+)"', lambda match: f'URI="{match.group(1)}?{query}"', playlist)
+
+    response = HttpResponse(playlist, content_type='application/vnd.apple.mpegurl')
+    response['Cache-Control'] = 'private, no-store'
+    return response
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def get_camera_hls_segment(request, camera_id, segment):
+    """
+    Init or media segment of the HLS livestream. The names are unique per encoder run, so segments are cached.
+    Authorized by the segment token of the playlist, or for members of the organization of the camera.
+    :param request:
+    :param camera_id:
+    :param segment: File name from the playlist
+    :return:
+    """
+    hls = HlsStreamingManager.get_instance()
+    token = request.query_params.get('st')
+    if not (token and hls.is_valid_segment_token(camera_id, token)):
+        if not request.user.is_authenticated:
+            return Response(status=status.HTTP_401_UNAUTHORIZED)
+        if not is_member(request.user, get_organization_by_camera_id(camera_id)):
+            logger.warning(f"Unauthorized attempt to access camera livestream by user '{request.user.name}'")
+            return Response(status=status.HTTP_403_FORBIDDEN)
+
+    path = hls.get_file_path(camera_id, segment)
+    if path is None:
+        return Response(status=status.HTTP_404_NOT_FOUND)
+
+    try:
+        response = FileResponse(open(path, 'rb'), content_type='video/mp4' if segment.endswith('.mp4') else 'video/iso.segment')
+    except FileNotFoundError:
+        # Left the ring in the meantime
+        return Response(status=status.HTTP_404_NOT_FOUND)
+    max_age = getattr(settings, 'HLS_SEGMENT_SECONDS', 2) * getattr(settings, 'HLS_PLAYLIST_SEGMENTS', 6)
+    response['Cache-Control'] = f'private, max-age={max_age}, immutable'
+    return response
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def post_camera_order(request, fpf_id):
@@ -27,7 +27,7 @@ from farminsight_dashboard_backend.services.action_queue_services import is_alre
 from farminsight_dashboard_backend.action_scripts.grid_connection_action_script import GridConnectionActionScript
 from farminsight_dashboard_backend.serializers.energy_consumer_serializer import EnergyConsumerDetailSerializer
 from farminsight_dashboard_backend.serializers.energy_source_serializer import EnergySourceSerializer, EnergySourceDetailSerializer
-from farminsight_dashboard_backend.utils import get_logger
+from farminsight_dashboard_backend.utils import get_logger, fan_out
 
 
 logger = get_logger()
@@ -233,31 +233,55 @@ def get_energy_dashboard(request, fpf_id: str):
         consumers = get_energy_consumers_by_fpf_id(fpf_id)
         sources = get_energy_sources_by_fpf_id(fpf_id)
 
+        # The live readings and summaries are independent of each other and fetched concurrently.
+        # A failing or slow part is left empty (live readings fall back to the DB values) instead of failing the dashboard.
+        calls = {
+            "state": lambda: get_energy_state_summary(fpf_id, battery_level_wh),
+            "runtime_hours": lambda: estimate_runtime_hours(fpf_id, battery_level_wh),
+            "total_consumption_watts": lambda: get_total_consumption_by_fpf_id(fpf_id),
+            "total_available_watts": lambda: get_total_available_power_by_fpf_id(fpf_id),
+            "current_output_watts": lambda: get_current_power_output_by_fpf_id(fpf_id),
+        }
+        defaults = {}
+        for consumer in consumers:
+            calls[f"consumer_{consumer.id}"] = lambda c=consumer: get_live_consumption_watts(c)
+            defaults[f"consumer_{consumer.id}"] = consumer.consumptionWatts
+        for source in sources:
+            calls[f"source_{source.id}"] = lambda s=source: get_live_output_watts(s)
+            defaults[f"source_{source.id}"] = source.currentOutputWatts
+        if include_graph_data:
+            calls["graph_data"] = lambda: get_energy_graph_data(fpf_id, hours_back, hours_ahead)
+
+        results, errors = fan_out(calls, defaults=defaults)
+
         # Inject live sensor data into model instances before serialization
         # so the response contains actual readings instead of DB defaults (0)
         for consumer in consumers:
-            consumer.consumptionWatts = round(get_live_consumption_watts(consumer))
+            live_watts = results[f"consumer_{consumer.id}"]
+            if live_watts is not None:
+                consumer.consumptionWatts = round(live_watts)
 
         for source in sources:
-            source.currentOutputWatts = round(get_live_output_watts(source))
+            live_watts = results[f"source_{source.id}"]
+            if live_watts is not None:
+                source.currentOutputWatts = round(live_watts)
 
-        energy_state = get_energy_state_summary(fpf_id, battery_level_wh)
-        runtime_hours = estimate_runtime_hours(fpf_id, battery_level_wh)
+        runtime_hours = results["runtime_hours"]
 
         response_data = {
             "fpf_id": fpf_id,
             "consumers": {
                 "list": EnergyConsumerDetailSerializer(consumers, many=True).data,
-                "total_consumption_watts": get_total_consumption_by_fpf_id(fpf_id),
+                "total_consumption_watts": results["total_consumption_watts"],
                 "count": len(consumers)
             },
             "sources": {
                 "list": EnergySourceDetailSerializer(sources, many=True).data,
-                "total_available_watts": get_total_available_power_by_fpf_id(fpf_id),
-                "current_output_watts": get_current_power_output_by_fpf_id(fpf_id),
+                "total_available_watts": results["total_available_watts"],
+                "current_output_watts": results["current_output_watts"],
                 "count": len(sources)
             },
-            "state": energy_state,
+            "state": results["state"],
             "estimated_runtime_hours": runtime_hours if runtime_hours != float('inf') else None,
             "thresholds": {
                 "grid_connect_percent": config['grid_connect_threshold'],
@@ -270,7 +294,10 @@ def get_energy_dashboard(request, fpf_id: str):
 
         # Include graph data with forecasts if requested
         if include_graph_data:
-            response_data["graph_data"] = get_energy_graph_data(fpf_id, hours_back, hours_ahead)
+            response_data["graph_data"] = results["graph_data"]
+
+        if errors:
+            response_data["errors"] = errors
 
         return Response(response_data, status=status.HTTP_200_OK)
 
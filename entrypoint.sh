@@ -1,3 +1,5 @@
 #!/bin/sh
 python manage.py migrate
-python manage.py runserver 0.0.0.0:8000
+# PROCESS_ROLES selects what this container runs (web, ingest, realtime, worker or all), SERVER_WORKERS the processes.
+# Schedule changes of web processes reach the leader of the worker processes through the database.
+exec python manage.py serve --role "${PROCESS_ROLES:-all}" --workers "${SERVER_WORKERS:-1}" --port 8000